@@ -0,0 +1,209 @@
+"""
+In-process fake of the GDMC HTTP interface for benchmarks and integration tests.
+Answers /command, /chunks, /blocks and /buildarea with configurable latency and
+counts requests, commands and bytes per endpoint. command_cost adds a delay per
+command line or PUT block (a server whose tick slows with batch size) and fail_commands makes the next N
+/command requests answer 503 without running anything.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlparse, parse_qs
+
+MAX_FILL_VOLUME = 32768
+
+
+class MockGDMCServer:
+    """
+    Usage:
+        with MockGDMCServer(latency=0.002) as server:
+            mc = MinecraftInterface(server.url)
+            ...
+            server.stats()
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0, command_cost: float = 0.0):
+        self.latency = latency
+        self.command_cost = command_cost
+        self.fail_commands = 0
+        self.blocks: Dict[Tuple[int, int, int], str] = {}
+        # Block id with state, e.g. minecraft:chain_command_block[facing=east,conditional=false]
+        self.states: Dict[Tuple[int, int, int], str] = {}
+        self.player = {'pos': (10.5, 64.0, -3.25), 'rot': (90.0, 12.5)}
+        self.build_area = {'xFrom': 0, 'yFrom': 0, 'zFrom': 0, 'xTo': 255, 'yTo': 255, 'zTo': 255}
+        self._lock = threading.Lock()
+        self.reset_stats()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests: Counter = Counter()
+            self.commands: Counter = Counter()
+            self.bytes_in = 0
+            self.bytes_out = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': sum(self.requests.values()),
+                'requests_by_endpoint': dict(self.requests),
+                'commands': sum(self.commands.values()),
+                'commands_by_type': dict(self.commands),
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+            }
+
+    def start(self) -> 'MockGDMCServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-gdmc', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'MockGDMCServer':
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    # Request handling
+
+    def _run_command(self, line: str) -> Dict[str, Any]:
+        parts = line.split()
+        if not parts:
+            return {'status': 0, 'message': 'Empty command'}
+        name = parts[0]
+        with self._lock:
+            self.commands[name] += 1
+        if name == 'fill' and len(parts) >= 8:
+            x1, y1, z1, x2, y2, z2 = (int(p) for p in parts[1:7])
+            volume = (abs(x2 - x1) + 1) * (abs(y2 - y1) + 1) * (abs(z2 - z1) + 1)
+            if volume > MAX_FILL_VOLUME:
+                return {'status': 0, 'message': f'Too many blocks in the specified area (maximum {MAX_FILL_VOLUME}, specified {volume})'}
+            return {'status': 1, 'message': f'Successfully filled {volume} block(s)'}
+        if name == 'setblock' and len(parts) >= 5:
+            x, y, z = (int(p) for p in parts[1:4])
+            state = parts[4].split('{')[0]
+            if not state.startswith('minecraft:'):
+                state = f'minecraft:{state}'
+            with self._lock:
+                # Like vanilla: new NBT alone does not count as a change
+                if self.states.get((x, y, z), 'minecraft:air') == state:
+                    return {'status': 0, 'message': 'Could not set the block'}
+                self.states[(x, y, z)] = state
+                self.blocks[(x, y, z)] = state.split('[')[0]
+            return {'status': 1, 'message': f'Changed the block at {x}, {y}, {z}'}
+        if name == 'data' and parts[1:3] == ['merge', 'block'] and len(parts) >= 7:
+            x, y, z = (int(p) for p in parts[3:6])
+            with self._lock:
+                is_command_block = 'command_block' in self.blocks.get((x, y, z), '')
+            if not is_command_block:
+                return {'status': 0, 'message': 'The target block is not a block entity'}
+            return {'status': 1, 'message': f'Modified block data of {x}, {y}, {z}'}
+        if name == 'data' and line.endswith(' Pos'):
+            x, y, z = self.player['pos']
+            return {'status': 1, 'message': f'Steve has the following entity data: [{x}d, {y}d, {z}d]'}
+        if name == 'data' and line.endswith(' Rotation'):
+            yaw, pitch = self.player['rot']
+            return {'status': 1, 'message': f'Steve has the following entity data: [{yaw}f, {pitch}f]'}
+        if name == 'time':
+            return {'status': 1, 'message': 'The time is 6000'}
+        return {'status': 1, 'message': ''}
+
+    def _get_blocks(self, query: Dict[str, Any]) -> list:
+        x, y, z = (int(query.get(k, ['0'])[0]) for k in ('x', 'y', 'z'))
+        dx, dy, dz = (int(query.get(k, ['1'])[0]) for k in ('dx', 'dy', 'dz'))
+        with self._lock:
+            return [{'x': bx, 'y': by, 'z': bz, 'id': self.blocks.get((bx, by, bz), 'minecraft:air')}
+                    for by in range(y, y + dy) for bz in range(z, z + dz) for bx in range(x, x + dx)]
+
+    def _put_blocks(self, blocks: list) -> list:
+        results = []
+        with self._lock:
+            for b in blocks:
+                key = (int(b['x']), int(b['y']), int(b['z']))
+                changed = self.blocks.get(key, 'minecraft:air') != b['id']
+                self.blocks[key] = b['id']
+                self.states[key] = b['id']
+                results.append({'status': 1 if changed else 0})
+            self.commands['put_block'] += len(blocks)
+        return results
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _body(self) -> bytes:
+                length = int(self.headers.get('Content-Length') or 0)
+                return self.rfile.read(length) if length else b''
+
+            def _reply(self, status: int, payload: Any, content_type: str = 'application/json') -> None:
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+                with server._lock:
+                    server.bytes_out += len(data)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _begin(self) -> Tuple[str, Dict[str, Any], bytes]:
+                parsed = urlparse(self.path)
+                body = self._body()
+                with server._lock:
+                    server.requests[parsed.path] += 1
+                    server.bytes_in += len(body)
+                if server.latency:
+                    time.sleep(server.latency)
+                return parsed.path, parse_qs(parsed.query), body
+
+            def do_POST(self) -> None:
+                path, _, body = self._begin()
+                if path != '/command':
+                    return self._reply(404, {'message': 'Not found'})
+                with server._lock:
+                    fail, server.fail_commands = server.fail_commands > 0, max(0, server.fail_commands - 1)
+                if fail:
+                    return self._reply(503, {'message': 'Server overloaded'})
+                lines = [line for line in body.decode('utf-8').split('\n') if line.strip()]
+                if server.command_cost:
+                    time.sleep(server.command_cost * len(lines))
+                self._reply(200, [server._run_command(line.strip()) for line in lines])
+
+            def do_GET(self) -> None:
+                path, query, _ = self._begin()
+                if path == '/buildarea':
+                    return self._reply(200, server.build_area)
+                if path == '/chunks':
+                    return self._reply(200, b'{Chunks: []}', 'text/plain')
+                if path == '/blocks':
+                    return self._reply(200, server._get_blocks(query))
+                self._reply(404, {'message': 'Not found'})
+
+            def do_PUT(self) -> None:
+                path, _, body = self._begin()
+                if path != '/blocks':
+                    return self._reply(404, {'message': 'Not found'})
+                blocks = json.loads(body or b'[]')
+                if server.command_cost:
+                    time.sleep(server.command_cost * len(blocks))
+                self._reply(200, server._put_blocks(blocks))
+
+        return Handler
@@ -0,0 +1,213 @@
+"""
+Benchmark suite run against an in-process mock GDMC server.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --quick --baseline bench.json
+
+Every result records wall time, CPU time and the HTTP requests / commands the
+mock server saw, so both CPU regressions and round-trip regressions show up.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Benchmarks import the project modules from the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.gdmc_mock import MockGDMCServer  # noqa: E402
+from core.screen import MinecraftScreen  # noqa: E402
+from core.state import ScreenStateStore  # noqa: E402
+from core.quantize import quantize_indices  # noqa: E402
+from core.pipeline import dither_parallel, worker_count  # noqa: E402
+from core.utils import apply_floyd_steinberg  # noqa: E402
+
+SCREEN_SIZES = {'small': (128, 72), 'medium': (192, 108), 'large': (256, 144)}
+# Relative slowdown (and request-count growth) that counts as a regression
+REGRESSION_THRESHOLD = 1.25
+# Modules that must not be imported by `import server` (they load on first use of a tool)
+HEAVY_MODULES = ('numpy', 'PIL', 'requests', 'core.screen', 'core.utils', 'core.blockcache')
+STARTUP_PROBE = (
+    "import json, sys, time; t = time.perf_counter(); import server; t = time.perf_counter() - t; "
+    "print(json.dumps([t, [m for m in {heavy!r} if m in sys.modules]]))"
+)
+
+
+def make_dashboard(path: str, width: int = 640, height: int = 360, seed: int = 0) -> str:
+    """Synthetic chart: flat background, solid bars, a gradient strip and some noise."""
+    rng = np.random.default_rng(seed)
+    img = Image.new('RGB', (width, height), (245, 245, 245))
+    draw = ImageDraw.Draw(img)
+    colours = [(200, 40, 40), (40, 80, 200), (40, 160, 60), (230, 140, 30), (120, 60, 170)]
+    for i, colour in enumerate(colours):
+        bar = int(rng.integers(height // 4, height - 40))
+        x0 = 40 + i * (width - 80) // len(colours)
+        draw.rectangle([x0, height - bar, x0 + (width - 80) // len(colours) - 20, height - 20], fill=colour)
+    pixels = np.array(img).astype(np.int16)
+    pixels[:30] = np.linspace(0, 255, width, dtype=np.int16)[None, :, None]
+    pixels += rng.integers(-6, 7, pixels.shape, dtype=np.int16)
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(path)
+    return path
+
+
+class Bench:
+    def __init__(self, server: MockGDMCServer, repeat: int):
+        self.server = server
+        self.repeat = repeat
+        self.results: List[Dict[str, Any]] = []
+
+    def measure(self, name: str, fn: Callable[[], Any], setup: Optional[Callable[[], Any]] = None, **params: Any) -> None:
+        """Run fn `repeat` times and keep the fastest run (wall, cpu and server counters of that run)."""
+        best: Optional[Dict[str, Any]] = None
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            self.server.reset_stats()
+            wall, cpu = time.perf_counter(), time.process_time()
+            fn()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            stats = self.server.stats()
+            run = {'name': name, 'params': params, 'wall_s': round(wall, 5), 'cpu_s': round(cpu, 5),
+                   'requests': stats['requests'], 'commands': stats['commands'], 'bytes_in': stats['bytes_in']}
+            if best is None or run['wall_s'] < best['wall_s']:
+                best = run
+        self.results.append(best)
+        print(f"{name:<28} {json.dumps(params, sort_keys=True):<62} {best['wall_s'] * 1000:9.1f} ms "
+              f"{best['requests']:6d} req {best['commands']:7d} cmd", flush=True)
+
+
+def run_benchmarks(latency: float, repeat: int, quick: bool) -> List[Dict[str, Any]]:
+    sizes = ['small'] if quick else list(SCREEN_SIZES)
+    workdir = tempfile.mkdtemp(prefix='mc-bench-')
+    image_a = make_dashboard(os.path.join(workdir, 'a.png'), seed=1)
+    image_b = make_dashboard(os.path.join(workdir, 'b.png'), seed=2)
+
+    with MockGDMCServer(latency=latency) as server:
+        os.environ['GDMC_URL'] = server.url
+        import server as tools  # noqa: E402  (binds the MCP tools to the mock server)
+        tools.init()
+        bench = Bench(server, repeat)
+        store = ScreenStateStore(os.path.join(workdir, 'state'))
+
+        for size in sizes:
+            w, h = SCREEN_SIZES[size]
+            screen = MinecraftScreen(tools.mc, 0, 64, 0, w, h, store=store)
+            for mode in ('floyd_steinberg', 'none'):
+                params = {'size': size, 'dithering': mode}
+                bench.measure('render_image.cold', lambda: screen.render_image(image_a, dither_mode=mode, smart_diff=False),
+                              setup=screen.grid_cache.clear, **params)
+                # Known image, unknown screen contents: skips decode and dither, still sends every fill
+                bench.measure('render_image.cached_grid', lambda: screen.render_image(image_a, dither_mode=mode, smart_diff=False),
+                              setup=lambda: screen.quantize(image_a, mode), **params)
+                bench.measure('render_image.unchanged', lambda: screen.render_image(image_a, dither_mode=mode),
+                              setup=lambda: screen.render_image(image_a, dither_mode=mode), **params)
+                bench.measure('render_image.changed', lambda: screen.render_image(image_b, dither_mode=mode),
+                              setup=lambda: screen.render_image(image_a, dither_mode=mode), **params)
+
+        for size in sizes:
+            w, h = SCREEN_SIZES[size]
+            pixels = np.array(Image.open(image_a).convert('RGB').resize((w, h)))
+            bench.measure('apply_floyd_steinberg', lambda: apply_floyd_steinberg(pixels), size=size)
+            bench.measure('quantize_indices', lambda: quantize_indices(pixels), size=size)
+
+            # Floyd-Steinberg bands across the worker pool (one full pass without one)
+            bench.measure('dither_parallel', lambda: dither_parallel(pixels), size=size, workers=worker_count())
+
+        extent = 64 if quick else 256
+        bench.measure('fill_area', lambda: tools.fill_area(0, 0, 0, extent - 1, 63, extent - 1, 'stone'),
+                      blocks=extent * 64 * extent)
+        for count in ((50,) if quick else (50, 500)):
+            bench.measure('spawn_entities', lambda: tools.spawn_entities('zombie', 0, 64, 0, count=count), count=count)
+        return bench.results
+
+
+def measure_startup(repeat: int) -> Dict[str, Any]:
+    """Time `import server` in fresh interpreters and list heavy modules it pulled in."""
+    best: Optional[Dict[str, Any]] = None
+    for _ in range(max(repeat, 3)):
+        wall = time.perf_counter()
+        out = subprocess.check_output([sys.executable, '-c', STARTUP_PROBE.format(heavy=HEAVY_MODULES)], cwd=ROOT,
+                                      stderr=subprocess.DEVNULL)
+        wall = time.perf_counter() - wall
+        import_s, heavy = json.loads(out.decode().strip().splitlines()[-1])
+        run = {'name': 'startup.import_server', 'params': {}, 'wall_s': round(wall, 5), 'import_s': round(import_s, 5),
+               'cpu_s': 0.0, 'requests': 0, 'commands': 0, 'bytes_in': 0, 'heavy_modules': heavy}
+        if best is None or run['wall_s'] < best['wall_s']:
+            best = run
+    print(f"{best['name']:<28} {'{}':<62} {best['wall_s'] * 1000:9.1f} ms  (import {best['import_s'] * 1000:.1f} ms, "
+          f"heavy modules: {', '.join(best['heavy_modules']) or 'none'})", flush=True)
+    return best
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> List[str]:
+    """Names of benchmarks that got slower or chattier than the baseline beyond the threshold."""
+    with open(baseline_path, 'r') as f:
+        baseline = {(r['name'], json.dumps(r['params'], sort_keys=True)): r for r in json.load(f)['results']}
+    regressions = []
+    for r in results:
+        old = baseline.get((r['name'], json.dumps(r['params'], sort_keys=True)))
+        if old is None:
+            continue
+        label = f"{r['name']} {r['params']}"
+        added = sorted(set(r.get('heavy_modules', [])) - set(old.get('heavy_modules', [])))
+        if added:
+            regressions.append(f"{label}: now imports {', '.join(added)} at startup")
+        if r['requests'] > max(old['requests'] * REGRESSION_THRESHOLD, old['requests'] + 1):
+            regressions.append(f"{label}: requests {old['requests']} -> {r['requests']}")
+        if r['wall_s'] > old['wall_s'] * REGRESSION_THRESHOLD and r['wall_s'] - old['wall_s'] > 0.005:
+            regressions.append(f"{label}: wall {old['wall_s']:.4f}s -> {r['wall_s']:.4f}s")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.002, help='simulated server latency per request, seconds')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark; the fastest is kept')
+    parser.add_argument('--quick', action='store_true', help='small sizes only (for CI smoke runs)')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='compare against a previous JSON result and fail on regressions')
+    args = parser.parse_args(argv)
+
+    results = [measure_startup(args.repeat)]
+    results += run_benchmarks(args.latency, max(1, args.repeat), args.quick)
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'latency_s': args.latency,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        regressions = compare(results, args.baseline)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
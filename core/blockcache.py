@@ -0,0 +1,240 @@
+import time
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, List
+
+logger = logging.getLogger(__name__)
+
+SECTION_SIZE = 16
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Rough per-entry cost of a palette string, counted against the memory budget
+PALETTE_ENTRY_BYTES = 64
+DEFAULT_BLOCK = "minecraft:air"
+
+SectionKey = Tuple[int, int, int]  # section x, y, z (block coordinate // 16)
+
+
+def normalize_box(x: int, y: int, z: int, dx: int, dy: int, dz: int) -> Tuple[int, int, int, int, int, int]:
+    """GDMC-style origin + signed size -> origin at the minimum corner with positive size."""
+    coords = []
+    for origin, size in ((x, dx), (y, dy), (z, dz)):
+        if size == 0:
+            size = 1
+        if size < 0:
+            origin, size = origin + size + 1, -size
+        coords.append((int(origin), int(size)))
+    (x, dx), (y, dy), (z, dz) = coords
+    return x, y, z, dx, dy, dz
+
+
+class Section:
+    """One 16x16x16 section: a local palette plus an index array ordered [y, z, x]."""
+
+    __slots__ = ('palette', 'indices', 'fetched_at')
+
+    def __init__(self, palette: List[str], indices: np.ndarray, fetched_at: float):
+        self.palette = palette
+        self.indices = indices
+        self.fetched_at = fetched_at
+
+    @property
+    def nbytes(self) -> int:
+        return self.indices.nbytes + PALETTE_ENTRY_BYTES * len(self.palette)
+
+
+class BlockGrid:
+    """Block ids for a box as a compact palette + uint16 index array ordered [y, z, x]."""
+
+    def __init__(self, origin: Tuple[int, int, int], palette: List[str], indices: np.ndarray):
+        self.origin = origin
+        self.palette = palette
+        self.indices = indices
+
+    @property
+    def size(self) -> Tuple[int, int, int]:
+        dy, dz, dx = self.indices.shape
+        return dx, dy, dz
+
+    def block_at(self, x: int, y: int, z: int) -> str:
+        ox, oy, oz = self.origin
+        return self.palette[self.indices[y - oy, z - oz, x - ox]]
+
+    def counts(self) -> Dict[str, int]:
+        totals = np.bincount(self.indices.ravel(), minlength=len(self.palette))
+        return {self.palette[i]: int(n) for i, n in enumerate(totals) if n}
+
+    def bounding_boxes(self) -> Dict[str, Tuple[int, int, int, int, int, int]]:
+        """World-space (x1, y1, z1, x2, y2, z2) bounds of every block type present."""
+        ox, oy, oz = self.origin
+        boxes = {}
+        for i, name in enumerate(self.palette):
+            ys, zs, xs = np.nonzero(self.indices == i)
+            if ys.size:
+                boxes[name] = (ox + int(xs.min()), oy + int(ys.min()), oz + int(zs.min()),
+                               ox + int(xs.max()), oy + int(ys.max()), oz + int(zs.max()))
+        return boxes
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'origin': self.origin,
+            'size': self.size,
+            'counts': self.counts(),
+            'bounding_boxes': self.bounding_boxes(),
+        }
+
+
+def grid_from_blocks(origin: Tuple[int, int, int], size: Tuple[int, int, int], blocks: List[Dict[str, Any]]) -> BlockGrid:
+    """Parse a /blocks list of {x, y, z, id} into a grid of the box at origin with size (dx, dy, dz)."""
+    x, y, z = origin
+    dx, dy, dz = size
+    ids = np.zeros((dy, dz, dx), dtype=np.uint16)
+    palette = {DEFAULT_BLOCK: 0}
+    for block in blocks:
+        bx, by, bz = block['x'] - x, block['y'] - y, block['z'] - z
+        if 0 <= bx < dx and 0 <= by < dy and 0 <= bz < dz:
+            ids[by, bz, bx] = palette.setdefault(block['id'], len(palette))
+    return BlockGrid(origin, list(palette), ids)
+
+
+class BlockCache:
+    """
+    Read-through cache of world blocks keyed by 16^3 chunk section.
+    Sections are evicted least-recently-used once the memory budget is exceeded,
+    dropped when our own writes touch them, and optionally expire after `ttl`
+    seconds to pick up changes made by players or the game.
+    """
+
+    def __init__(self, mc: Any, max_bytes: int = DEFAULT_MAX_BYTES, ttl: Optional[float] = None):
+        self.mc = mc
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._sections: 'OrderedDict[SectionKey, Section]' = OrderedDict()
+        self._bytes = 0
+        # Bumped by every invalidation; a fetch that overlapped one may hold pre-write blocks
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def _get(self, key: SectionKey) -> Optional[Section]:
+        section = self._sections.get(key)
+        if section is None:
+            return None
+        if self.ttl is not None and time.monotonic() - section.fetched_at > self.ttl:
+            self._drop(key)
+            return None
+        self._sections.move_to_end(key)
+        return section
+
+    def _drop(self, key: SectionKey) -> None:
+        section = self._sections.pop(key, None)
+        if section is not None:
+            self._bytes -= section.nbytes
+
+    def _put(self, key: SectionKey, section: Section) -> None:
+        self._drop(key)
+        self._sections[key] = section
+        self._bytes += section.nbytes
+        while self._bytes > self.max_bytes and len(self._sections) > 1:
+            oldest = next(iter(self._sections))
+            self._drop(oldest)
+
+    def invalidate_box(self, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int) -> None:
+        """Forget every cached section overlapping the box (inclusive corners)."""
+        lo = [min(a, b) // SECTION_SIZE for a, b in ((x1, x2), (y1, y2), (z1, z2))]
+        hi = [max(a, b) // SECTION_SIZE for a, b in ((x1, x2), (y1, y2), (z1, z2))]
+        with self._lock:
+            self._generation += 1
+            if (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) * (hi[2] - lo[2] + 1) > len(self._sections):
+                stale = [k for k in self._sections if all(lo[i] <= k[i] <= hi[i] for i in range(3))]
+            else:
+                stale = [(sx, sy, sz) for sx in range(lo[0], hi[0] + 1) for sy in range(lo[1], hi[1] + 1)
+                         for sz in range(lo[2], hi[2] + 1)]
+            for key in stale:
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._sections.clear()
+            self._bytes = 0
+
+    def _fetch_column(self, column: Tuple[int, int, int, int]) -> Dict[SectionKey, Section]:
+        """Fetch a vertical run of sections (sx, sz, sy_min, sy_max) in one request."""
+        sx, sz, sy0, sy1 = column
+        x, y, z = sx * SECTION_SIZE, sy0 * SECTION_SIZE, sz * SECTION_SIZE
+        height = (sy1 - sy0 + 1) * SECTION_SIZE
+        blocks = self.mc.get_block_list(x, y, z, SECTION_SIZE, height, SECTION_SIZE)
+        if blocks is None:
+            raise IOError(f"Could not read blocks at section column {sx},{sz}")
+        column_grid = grid_from_blocks((x, y, z), (SECTION_SIZE, height, SECTION_SIZE), blocks)
+        ids, names = column_grid.indices, column_grid.palette
+        dtype = np.uint8 if len(names) <= 256 else np.uint16
+        fetched_at = time.monotonic()
+        sections = {}
+        for sy in range(sy0, sy1 + 1):
+            chunk = ids[(sy - sy0) * SECTION_SIZE:(sy - sy0 + 1) * SECTION_SIZE]
+            used = np.unique(chunk)
+            remap = np.zeros(len(names), dtype=dtype)
+            remap[used] = np.arange(len(used), dtype=dtype)
+            sections[(sx, sy, sz)] = Section([names[i] for i in used], remap[chunk], fetched_at)
+        return sections
+
+    def get_region(self, x: int, y: int, z: int, dx: int, dy: int, dz: int) -> BlockGrid:
+        """Return the blocks of a box, fetching only the sections that are not cached."""
+        x, y, z, dx, dy, dz = normalize_box(x, y, z, dx, dy, dz)
+        x2, y2, z2 = x + dx - 1, y + dy - 1, z + dz - 1
+        keys = [(sx, sy, sz)
+                for sx in range(x // SECTION_SIZE, x2 // SECTION_SIZE + 1)
+                for sy in range(y // SECTION_SIZE, y2 // SECTION_SIZE + 1)
+                for sz in range(z // SECTION_SIZE, z2 // SECTION_SIZE + 1)]
+
+        found: Dict[SectionKey, Section] = {}
+        missing: List[SectionKey] = []
+        with self._lock:
+            for key in keys:
+                section = self._get(key)
+                if section is None:
+                    missing.append(key)
+                else:
+                    found[key] = section
+            self.hits += len(found)
+            self.misses += len(missing)
+            generation = self._generation
+
+        if missing:
+            # Group missing sections into vertical runs so each column is one request
+            columns: List[Tuple[int, int, int, int]] = []
+            for sx, sy, sz in sorted(missing, key=lambda k: (k[0], k[2], k[1])):
+                if columns and columns[-1][:2] == (sx, sz) and columns[-1][3] == sy - 1:
+                    columns[-1] = (sx, sz, columns[-1][2], sy)
+                else:
+                    columns.append((sx, sz, sy, sy))
+            for fetched in self.mc.transport.map(self._fetch_column, columns):
+                with self._lock:
+                    # Don't cache what a write may have changed while we were reading
+                    if self._generation == generation:
+                        for key, section in fetched.items():
+                            self._put(key, section)
+                found.update(fetched)
+
+        palette: Dict[str, int] = {}
+        indices = np.zeros((dy, dz, dx), dtype=np.uint16)
+        for (sx, sy, sz), section in found.items():
+            remap = np.array([palette.setdefault(name, len(palette)) for name in section.palette], dtype=np.uint16)
+            bx, by, bz = sx * SECTION_SIZE, sy * SECTION_SIZE, sz * SECTION_SIZE
+            # Overlap of this section with the requested box, in world coordinates
+            lx, ly, lz = max(x, bx), max(y, by), max(z, bz)
+            hx, hy, hz = min(x2, bx + 15) + 1, min(y2, by + 15) + 1, min(z2, bz + 15) + 1
+            part = section.indices[ly - by:hy - by, lz - bz:hz - bz, lx - bx:hx - bx]
+            indices[ly - y:hy - y, lz - z:hz - z, lx - x:hx - x] = remap[part]
+        return BlockGrid((x, y, z), list(palette), indices)
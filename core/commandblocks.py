@@ -0,0 +1,184 @@
+import os
+import json
+import logging
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+from .minecraft import command_block_spec
+from .state import DEFAULT_STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = {
+    'north': (0, 0, -1), 'south': (0, 0, 1),
+    'east': (1, 0, 0), 'west': (-1, 0, 0),
+    'up': (0, 1, 0), 'down': (0, -1, 0),
+}
+HEAD_MODES = ('impulse', 'repeating')
+# Answers of setblock and data merge when the block already is what was asked for
+UNCHANGED_MESSAGES = ("Could not set the block", "Nothing changed")
+
+Position = Tuple[int, int, int]
+ChainBlock = Tuple[Position, str]  # position, setblock block spec
+
+
+def parse_script(script: str) -> List[Tuple[str, bool]]:
+    """
+    Script lines -> (command, conditional) pairs. Blank lines and lines starting with
+    '#' are skipped, a leading '/' is dropped, and a leading '?' makes the block
+    conditional (runs only if the previous block in the chain succeeded), so the first
+    command cannot have one.
+    """
+    commands = []
+    for raw in script.splitlines():
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        conditional = line.startswith('?')
+        if conditional:
+            line = line[1:].lstrip()
+        if conditional and not commands:
+            raise ValueError(f"The first command cannot be conditional ('?'), no block runs before it: {raw.strip()}")
+        commands.append((line.lstrip('/'), conditional))
+    return commands
+
+
+def chain_positions(x: int, y: int, z: int, facing: str, length: int) -> List[Position]:
+    dx, dy, dz = DIRECTIONS[facing]
+    return [(x + i * dx, y + i * dy, z + i * dz) for i in range(length)]
+
+
+def compile_chain(script: str, x: int, y: int, z: int, facing: str = 'east', head: str = 'impulse',
+                  always_active: bool = False) -> List[ChainBlock]:
+    """
+    Lay out a script as a straight command block chain starting at x, y, z and running
+    towards `facing`: an impulse or repeating head followed by always-active chain
+    blocks, each pointing into the next.
+    """
+    if facing not in DIRECTIONS:
+        raise ValueError(f"Unknown facing '{facing}'. Choose from: {', '.join(DIRECTIONS)}")
+    if head not in HEAD_MODES:
+        raise ValueError(f"Unknown head mode '{head}'. Choose from: {', '.join(HEAD_MODES)}")
+    commands = parse_script(script)
+    chain = []
+    for i, (pos, (command, conditional)) in enumerate(zip(chain_positions(x, y, z, facing, len(commands)), commands)):
+        mode, auto = (head, always_active) if i == 0 else ('chain', True)
+        chain.append((pos, command_block_spec(command, mode, facing, conditional=conditional, auto=auto)))
+    return chain
+
+
+def split_spec(spec: str) -> Tuple[str, str]:
+    """Block spec -> (block id with state, NBT compound)."""
+    i = spec.index('{')
+    return spec[:i], spec[i:]
+
+
+def _landed(result: Any) -> bool:
+    """The block is in place: set now, or it already was."""
+    return result.success or (result.message or '').startswith(UNCHANGED_MESSAGES)
+
+
+class ChainStore:
+    """
+    Deployed chains, one JSON file per chain origin: the facing, the block spec at each
+    position along it (None = unknown) and positions of old blocks not yet cleared.
+    """
+
+    def __init__(self, state_dir: str = DEFAULT_STATE_DIR):
+        self.state_dir = state_dir
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.state_dir, f"{key}.json")
+
+    def load(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            if key in self._cache:
+                return dict(self._cache[key])
+        try:
+            with open(self.path(key), 'r') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not load chain state {key}: {e}")
+            return {}
+        with self._lock:
+            self._cache[key] = record
+        return dict(record)
+
+    def save(self, key: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[key] = dict(record)
+        path = self.path(key)
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(f"{path}.tmp", 'w') as f:
+                json.dump(record, f)
+            os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            logger.error(f"Could not save chain state {key}: {e}")
+
+
+default_chain_store = ChainStore()
+
+
+def deploy_chain(mc: Any, script: str, x: int, y: int, z: int, facing: str = 'east', head: str = 'impulse',
+                 always_active: bool = False, store: Optional[ChainStore] = None, force: bool = False) -> Dict[str, int]:
+    """
+    Compile and place a script as a command block chain in one batched request.
+    Blocks whose spec matches the last deploy at this origin are skipped (unless force),
+    and blocks of the previous chain outside the new one (a longer chain, or one running
+    another way) are cleared to air.
+    Minecraft refuses a setblock that keeps the block state, even with new NBT, so a
+    block whose state is unchanged gets its command through `data merge block`, and one
+    in an unknown state is cleared to air before it is set.
+    """
+    store = store if store is not None else default_chain_store
+    key = f"chain_{x}_{y}_{z}"
+    chain = compile_chain(script, x, y, z, facing, head, always_active)
+    record = store.load(key)
+    old_blocks = record.get('blocks', [])
+    old_positions = chain_positions(x, y, z, record.get('facing', facing), len(old_blocks))
+    previous = {} if force else dict(zip(old_positions, old_blocks))
+    footprint = {pos for pos, _ in chain}
+    stale_positions = list(dict.fromkeys(
+        pos for pos in old_positions + [tuple(p) for p in record.get('leftovers', [])] if pos not in footprint))
+
+    writes = []
+    merges = []
+    with mc.batch() as batch:
+        # Tail first, so an always-active head never fires into a half-built chain
+        for i, (pos, spec) in reversed(list(enumerate(chain))):
+            old = previous.get(pos)
+            if old == spec:
+                continue
+            state, nbt = split_spec(spec)
+            if old is not None and split_spec(old)[0] == state:
+                merges.append((i, batch.add(f"data merge block {pos[0]} {pos[1]} {pos[2]} {nbt}")))
+                continue
+            if old is None:
+                # Whatever is there may already be this block state; clearing it first makes the setblock stick
+                batch.set_block(*pos, 'air')
+            writes.append((i, batch.set_block(*pos, spec)))
+        # Old blocks outside the new chain (the previous record may include unknowns)
+        stale = [(pos, batch.set_block(*pos, 'air')) for pos in stale_positions]
+
+    deployed: List[Optional[str]] = [spec for _, spec in chain]
+    # A setblock that "could not set" kept the old NBT, so only merges and clears may count as already done
+    landed = [(i, r.success) for i, r in writes] + [(i, _landed(r)) for i, r in merges]
+    for i, ok in landed:
+        if not ok:
+            deployed[i] = None
+    # Keep uncleared leftovers in the record so the next deploy retries them
+    leftovers = [list(pos) for pos, r in stale if not _landed(r)]
+    cleared = len(stale) - len(leftovers)
+    store.save(key, {'facing': facing, 'blocks': deployed, 'leftovers': leftovers})
+    return {
+        'blocks': len(chain),
+        'written': sum(1 for _, ok in landed if ok),
+        'unchanged': len(chain) - len(landed),
+        'cleared': cleared,
+        'failed': sum(1 for _, ok in landed if not ok) + len(stale) - cleared,
+        'requests': batch.requests_sent,
+    }
@@ -0,0 +1,119 @@
+import numpy as np
+from typing import Optional
+from .utils import PALETTE_ARRAY
+from .quantize import palette_lut, quantize_indices
+
+DITHER_MODES = ('floyd_steinberg', 'ordered', 'none')
+
+# Table resolution used inside the error-diffusion loop (64x64x64 cells)
+DIFFUSION_LUT_BITS = 6
+
+# Amplitude of the ordered-dither threshold map, roughly the spacing between palette colours
+ORDERED_SPREAD = 48.0
+
+
+def uniform_region_mask(pixels: np.ndarray, threshold: int = 10) -> np.ndarray:
+    """
+    True where every in-bounds pixel of the 3x3 neighbourhood is within `threshold`
+    of the centre on all channels. Vectorized equivalent of utils.is_uniform_region.
+    """
+    h, w = pixels.shape[:2]
+    img = pixels.astype(np.int16)
+    # Edge padding repeats in-bounds neighbours, so it never changes the result
+    padded = np.pad(img, ((1, 1), (1, 1), (0, 0)), mode='edge')
+    mask = np.ones((h, w), dtype=bool)
+    for dy in range(3):
+        for dx in range(3):
+            diff = np.abs(padded[dy:dy + h, dx:dx + w] - img).max(axis=2)
+            mask &= diff <= threshold
+    return mask
+
+
+def bayer_matrix(order: int) -> np.ndarray:
+    """Normalized Bayer threshold map of size 2**order, centred on zero."""
+    m = np.zeros((1, 1), dtype=np.float32)
+    for _ in range(order):
+        m = np.block([[4 * m, 4 * m + 2], [4 * m + 3, 4 * m + 1]])
+    return (m + 0.5) / m.size - 0.5
+
+
+def floyd_steinberg_indices(pixels: np.ndarray, skip_uniform: bool = True, lut_bits: int = DIFFUSION_LUT_BITS,
+                            uniform: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Floyd-Steinberg error diffusion returning palette indices.
+    Works on flat per-row float buffers with a one-pixel pad on each side, so the
+    inner loop does no bounds checks and allocates nothing per pixel. Pixels in
+    uniform regions are quantized without spreading error, as before. A precomputed
+    uniform mask can be passed in (e.g. when dithering one band of a larger image).
+    """
+    h, w = pixels.shape[:2]
+    if uniform is None:
+        uniform = uniform_region_mask(pixels) if skip_uniform else np.zeros((h, w), dtype=bool)
+    shift = 8 - lut_bits
+    lut = palette_lut(lut_bits).ravel().tolist()
+    palette = PALETTE_ARRAY.tolist()
+    rows = pixels.astype(np.float64).reshape(h, w * 3).tolist()
+    uniform_rows = uniform.tolist()
+    out = np.empty((h, w), dtype=np.uint8)
+
+    stride = 3 * (w + 2)
+    err_next = [0.0] * stride
+    for y in range(h):
+        row = rows[y]
+        uni = uniform_rows[y]
+        err_cur, err_next = err_next, [0.0] * stride
+        out_row = [0] * w
+        for x in range(w):
+            i = 3 * x
+            e = i + 3
+            r = row[i] + err_cur[e]
+            g = row[i + 1] + err_cur[e + 1]
+            b = row[i + 2] + err_cur[e + 2]
+            ri = 0 if r < 0 else (255 if r > 255 else int(r))
+            gi = 0 if g < 0 else (255 if g > 255 else int(g))
+            bi = 0 if b < 0 else (255 if b > 255 else int(b))
+            idx = lut[(((ri >> shift) << lut_bits | (gi >> shift)) << lut_bits) | (bi >> shift)]
+            out_row[x] = idx
+            if uni[x]:
+                continue
+            pr, pg, pb = palette[idx]
+            er = r - pr
+            eg = g - pg
+            eb = b - pb
+            err_cur[e + 3] += er * 0.4375
+            err_cur[e + 4] += eg * 0.4375
+            err_cur[e + 5] += eb * 0.4375
+            err_next[e - 3] += er * 0.1875
+            err_next[e - 2] += eg * 0.1875
+            err_next[e - 1] += eb * 0.1875
+            err_next[e] += er * 0.3125
+            err_next[e + 1] += eg * 0.3125
+            err_next[e + 2] += eb * 0.3125
+            err_next[e + 3] += er * 0.0625
+            err_next[e + 4] += eg * 0.0625
+            err_next[e + 5] += eb * 0.0625
+        out[y] = out_row
+    return out
+
+
+def ordered_indices(pixels: np.ndarray, skip_uniform: bool = True, order: int = 3, spread: float = ORDERED_SPREAD) -> np.ndarray:
+    """Fully vectorized ordered (Bayer) dithering returning palette indices."""
+    h, w = pixels.shape[:2]
+    matrix = bayer_matrix(order)
+    n = matrix.shape[0]
+    threshold = np.tile(matrix, ((h + n - 1) // n, (w + n - 1) // n))[:h, :w]
+    if skip_uniform:
+        threshold = np.where(uniform_region_mask(pixels), 0.0, threshold)
+    noisy = pixels.astype(np.float32) + spread * threshold[:, :, None]
+    return quantize_indices(np.clip(np.rint(noisy), 0, 255).astype(np.uint8))
+
+
+def dither_indices(pixels: np.ndarray, mode: Optional[str] = 'floyd_steinberg', skip_uniform: bool = True) -> np.ndarray:
+    """Quantize an RGB image to palette indices with the selected dithering mode."""
+    if mode is None or mode == 'none':
+        return quantize_indices(pixels)
+    if mode == 'floyd_steinberg':
+        return floyd_steinberg_indices(pixels, skip_uniform=skip_uniform)
+    if mode == 'ordered':
+        return ordered_indices(pixels, skip_uniform=skip_uniform)
+    raise ValueError(f"Unknown dithering mode '{mode}'. Choose from: {', '.join(DITHER_MODES)}")
@@ -0,0 +1,83 @@
+import math
+import random
+import logging
+from string import Template
+from typing import Optional, Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SPREAD_PATTERNS = ('point', 'grid', 'ring', 'random')
+DEFAULT_SPACING = 2.0
+
+Position = Tuple[float, float, float]
+
+
+def spread_positions(pattern: str, count: int, center: Position, radius: float = 0.0, spacing: float = DEFAULT_SPACING,
+                     seed: Optional[int] = None) -> List[Position]:
+    """
+    Positions for `count` entities around center, all on center's y level.
+    - point: every entity at the centre
+    - grid: a square grid with `spacing` blocks between entities, centred on the centre
+    - ring: evenly spaced on a circle of `radius` (default: wide enough for `spacing` between neighbours)
+    - random: uniformly distributed inside a disc of `radius` (default: about `spacing`
+      squared of area per entity; reproducible with seed)
+    """
+    if pattern not in SPREAD_PATTERNS:
+        raise ValueError(f"Unknown spread pattern '{pattern}'. Choose from: {', '.join(SPREAD_PATTERNS)}")
+    cx, cy, cz = center
+    if count <= 0:
+        return []
+    if pattern == 'point':
+        return [(cx, cy, cz)] * count
+    if pattern == 'grid':
+        side = math.ceil(math.sqrt(count))
+        offset = (side - 1) * spacing / 2
+        return [(round(cx - offset + (i % side) * spacing, 2), cy, round(cz - offset + (i // side) * spacing, 2))
+                for i in range(count)]
+    if pattern == 'ring':
+        r = radius if radius > 0 else max(spacing, count * spacing / (2 * math.pi))
+        return [(round(cx + r * math.cos(2 * math.pi * i / count), 2), cy, round(cz + r * math.sin(2 * math.pi * i / count), 2))
+                for i in range(count)]
+    disc = radius if radius > 0 else max(spacing, spacing * math.sqrt(count / math.pi))
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        # sqrt keeps the density uniform over the disc's area
+        r = disc * math.sqrt(rng.random())
+        angle = rng.uniform(0, 2 * math.pi)
+        positions.append((round(cx + r * math.cos(angle), 2), cy, round(cz + r * math.sin(angle), 2)))
+    return positions
+
+
+def render_nbt(template: str, index: int, count: int, position: Position) -> str:
+    """
+    Fill in a per-entity NBT template. Placeholders: $i (0-based index), $n (1-based),
+    $count, $x, $y, $z. Anything else, including NBT braces, is left as is.
+    """
+    if '$' not in template:
+        return template
+    x, y, z = position
+    return Template(template).safe_substitute(i=index, n=index + 1, count=count, x=x, y=y, z=z)
+
+
+def spawn_entities(mc: Any, entity_type: str, center: Position, count: int, pattern: str = 'point', radius: float = 0.0,
+                   spacing: float = DEFAULT_SPACING, nbt: str = '', seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Summon `count` entities laid out by a spread pattern, batched into size-bounded
+    /command requests sent concurrently. Returns totals plus per-request results.
+    """
+    positions = spread_positions(pattern, count, center, radius=radius, spacing=spacing, seed=seed)
+    with mc.batch(concurrent=True) as batch:
+        for i, (x, y, z) in enumerate(positions):
+            batch.spawn_entity(entity_type, x, y, z, render_nbt(nbt, i, count, (x, y, z)) if nbt else None)
+    batches: List[Dict[str, Any]] = []
+    for chunk in batch.sent:
+        failures = [r for r in chunk if not r.success]
+        entry: Dict[str, Any] = {'commands': len(chunk), 'succeeded': len(chunk) - len(failures)}
+        if failures:
+            entry['first_error'] = failures[0].message
+        batches.append(entry)
+    spawned = batch.succeeded
+    if spawned < count:
+        logger.warning(f"Spawned {spawned}/{count} {entity_type}")
+    return {'requested': count, 'spawned': spawned, 'failed': count - spawned, 'requests': batch.requests_sent, 'batches': batches}
@@ -0,0 +1,64 @@
+import os
+import logging
+import numpy as np
+from typing import Any, Callable, Iterable, Iterator, Union
+from PIL import Image, ImageSequence
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp', '.tif', '.tiff')
+
+Frame = Union[str, Image.Image, np.ndarray]
+FrameSource = Union[str, Iterable[Frame], Callable[[], Iterable[Frame]]]
+
+
+def _iter_once(source: FrameSource) -> Iterator[Frame]:
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            names = sorted(n for n in os.listdir(source) if n.lower().endswith(IMAGE_EXTENSIONS))
+            for name in names:
+                yield os.path.join(source, name)
+            return
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Frame source not found: {source}")
+        with Image.open(source) as img:
+            # GIF/APNG/WebP frames share one decoder, so copy each out as RGB
+            for frame in ImageSequence.Iterator(img):
+                yield frame.convert('RGB')
+        return
+    if callable(source):
+        source = source()
+    yield from source
+
+
+def iter_frames(source: FrameSource, loops: int = 1) -> Iterator[Frame]:
+    """
+    Yield frames from an animated image file, a folder of images (sorted by name),
+    an iterable of images/arrays/paths, or a callable returning such an iterable.
+    loops <= 0 repeats forever.
+    """
+    played = 0
+    while loops <= 0 or played < loops:
+        count = 0
+        for frame in _iter_once(source):
+            count += 1
+            yield frame
+        if count == 0:
+            # An exhausted generator cannot be replayed
+            return
+        played += 1
+
+
+def load_frame(frame: Any) -> Image.Image:
+    """Open a single frame (path, PIL image or HxWx3 array) as an RGB image."""
+    if isinstance(frame, str):
+        if not os.path.exists(frame):
+            logger.error(f"Image not found: {frame}")
+            raise FileNotFoundError(f"Image not found: {frame}")
+        with Image.open(frame) as img:
+            return img.convert('RGB')
+    if isinstance(frame, np.ndarray):
+        return Image.fromarray(np.asarray(frame, dtype=np.uint8)).convert('RGB')
+    if isinstance(frame, Image.Image):
+        return frame.convert('RGB')
+    raise TypeError(f"Unsupported frame type: {type(frame).__name__}")
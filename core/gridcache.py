@@ -0,0 +1,140 @@
+import os
+import hashlib
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Optional, Any, Tuple
+from PIL import Image
+from .utils import PALETTE_VERSION
+from .pipeline import CONTRAST, dither_layout
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRID_CAPACITY = 256
+# Set to a directory (e.g. .state/grids) to keep quantized grids across restarts
+GRID_CACHE_DIR_ENV = "MC_MCP_GRID_CACHE_DIR"
+
+_HASH_CHUNK = 1 << 20
+
+
+def content_digest(image: Any) -> Optional[str]:
+    """Hash of an image's content: file bytes for paths, pixel data for PIL images and arrays."""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(image, str):
+        with open(image, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                h.update(chunk)
+    elif isinstance(image, Image.Image):
+        h.update(f"{image.mode}{image.size}".encode())
+        h.update(image.tobytes())
+    elif isinstance(image, np.ndarray):
+        h.update(f"{image.dtype}{image.shape}".encode())
+        h.update(np.ascontiguousarray(image).tobytes())
+    else:
+        return None
+    return h.hexdigest()
+
+
+class QuantizedGridCache:
+    """
+    Final palette-index grids keyed by image content, target size, dithering mode and
+    palette version, so re-rendering a known image (elsewhere, after a clear, with another
+    facing) skips decode, resize and dither. In-memory LRU, optionally backed by `.npy`
+    files in cache_dir. File digests are memoized by (mtime, size) so a hit costs a stat.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_GRID_CAPACITY, cache_dir: Optional[str] = None):
+        self.capacity = capacity
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._grids: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._file_digests: 'OrderedDict[str, Tuple[int, int, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._grids)
+
+    def _digest(self, image: Any) -> Optional[str]:
+        if not isinstance(image, str):
+            return content_digest(image)
+        try:
+            st = os.stat(image)
+        except OSError:
+            return None
+        with self._lock:
+            memo = self._file_digests.get(image)
+        if memo is not None and memo[:2] == (st.st_mtime_ns, st.st_size):
+            return memo[2]
+        digest = content_digest(image)
+        with self._lock:
+            self._file_digests[image] = (st.st_mtime_ns, st.st_size, digest)
+            self._file_digests.move_to_end(image)
+            while len(self._file_digests) > self.capacity:
+                self._file_digests.popitem(last=False)
+        return digest
+
+    def key(self, image: Any, size: Tuple[int, int], mode: Optional[str]) -> Optional[str]:
+        """Cache key for rendering image at size (width, height) with mode; None if the image can't be hashed."""
+        digest = self._digest(image)
+        if digest is None:
+            return None
+        spec = f"{digest}-{size[0]}x{size[1]}-{mode or 'none'}-{PALETTE_VERSION}-c{CONTRAST}-{dither_layout()}"
+        return hashlib.sha1(spec.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _remember(self, key: str, grid: np.ndarray) -> None:
+        self._grids[key] = grid
+        self._grids.move_to_end(key)
+        while len(self._grids) > self.capacity:
+            self._grids.popitem(last=False)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            grid = self._grids.get(key)
+            if grid is not None:
+                self._grids.move_to_end(key)
+                self.hits += 1
+                return grid
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            try:
+                grid = np.load(self._path(key))
+            except Exception as e:
+                logger.warning(f"Could not load cached grid {key}: {e}")
+            else:
+                grid.setflags(write=False)
+                with self._lock:
+                    self._remember(key, grid)
+                    self.hits += 1
+                return grid
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, grid: np.ndarray) -> np.ndarray:
+        """Store a grid and return the read-only copy that is cached."""
+        grid = np.array(grid, dtype=np.uint8, copy=True)
+        grid.setflags(write=False)
+        with self._lock:
+            self._remember(key, grid)
+        if self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(f"{path}.tmp", 'wb') as f:
+                    np.save(f, grid)
+                os.replace(f"{path}.tmp", path)
+            except Exception as e:
+                logger.error(f"Could not save cached grid {key}: {e}")
+        return grid
+
+    def clear(self) -> None:
+        with self._lock:
+            self._grids.clear()
+            self._file_digests.clear()
+
+
+default_grid_cache = QuantizedGridCache(cache_dir=os.environ.get(GRID_CACHE_DIR_ENV) or None)
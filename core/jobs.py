@@ -0,0 +1,230 @@
+import time
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, List
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_WORKERS = 2
+# Finished jobs kept for status queries
+DEFAULT_JOB_HISTORY = 100
+# Minimum seconds between progress notifications of one job
+PROGRESS_NOTIFY_INTERVAL = 2.0
+
+FINISHED_STATES = ('done', 'failed', 'cancelled', 'superseded')
+
+
+class Job:
+    """
+    A unit of background work. The job function receives the Job and should poll
+    `cancelled` between steps and call `report(fraction, message)` as it goes.
+    """
+
+    def __init__(self, job_id: str, kind: str, fn: Callable[['Job'], Any], key: Optional[str] = None, description: str = ''):
+        self.id = job_id
+        self.kind = kind
+        self.key = key
+        self.description = description or kind
+        self.fn = fn
+        self.status = 'queued'
+        self.progress: Optional[float] = 0.0
+        self.message = ''
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._cancel = threading.Event()
+        self._cancel_status = 'cancelled'
+        self._done = threading.Event()
+        self._notify: Optional[Callable[['Job'], None]] = None
+        self._last_notified = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self, status: str = 'cancelled') -> None:
+        self._cancel_status = status
+        self._cancel.set()
+
+    def report(self, fraction: Optional[float], message: str = '') -> None:
+        """Record progress; notifications are throttled to one per PROGRESS_NOTIFY_INTERVAL."""
+        self.progress = None if fraction is None else max(0.0, min(1.0, fraction))
+        if message:
+            self.message = message
+        now = time.monotonic()
+        if self._notify is not None and now - self._last_notified >= PROGRESS_NOTIFY_INTERVAL:
+            self._last_notified = now
+            self._notify(self)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job has finished. Returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished or time.time()
+        info: Dict[str, Any] = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'description': self.description,
+            'status': self.status,
+            'progress': None if self.progress is None else round(self.progress, 3),
+            'message': self.message,
+            'elapsed_seconds': round(end - self.started, 3) if self.started else 0.0,
+        }
+        if self.key is not None:
+            info['key'] = self.key
+        if self.result is not None:
+            info['result'] = self.result
+        if self.error is not None:
+            info['error'] = self.error
+        return info
+
+
+class JobQueue:
+    """
+    Worker pool for long-running operations.
+    Jobs with the same key (e.g. one screen) run one at a time and coalesce: submitting
+    a new one supersedes any job still waiting for that key and asks the running one
+    to stop, so only the latest submission is drawn. Jobs with different keys run in
+    parallel up to max_workers.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_JOB_WORKERS, history: int = DEFAULT_JOB_HISTORY,
+                 notify: Optional[Callable[[Job], None]] = None):
+        self.max_workers = max_workers
+        self.history = history
+        self.notify = notify
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._active: Dict[str, Job] = {}   # key -> job submitted to the pool
+        self._waiting: Dict[str, Job] = {}  # key -> latest job queued behind it
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        return self._executor
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], key: Optional[str] = None, description: str = '') -> Job:
+        job = Job(str(next(self._ids)), kind, fn, key=key, description=description)
+        job._notify = self._send_notification
+        superseded: Optional[Job] = None
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+            if key is None or key not in self._active:
+                if key is not None:
+                    self._active[key] = job
+                self._pool().submit(self._run, job)
+            else:
+                superseded = self._waiting.pop(key, None)
+                if superseded is not None:
+                    self._finish(superseded, 'superseded')
+                self._waiting[key] = job
+                self._active[key].cancel('superseded')
+        if superseded is not None:
+            self._send_notification(superseded)
+        logger.info(f"Queued job {job.id} ({job.description})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, active_only: bool = False) -> List[Job]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [j for j in jobs if not active_only or j.status not in FINISHED_STATES]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job, or ask a running one to stop. Returns False if it already finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return False
+            job.cancel()
+            if job.key is not None and self._waiting.get(job.key) is job:
+                del self._waiting[job.key]
+                self._finish(job, 'cancelled')
+        if job.status == 'cancelled':
+            self._send_notification(job)
+        return True
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status not in FINISHED_STATES:
+                    job.cancel()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, job: Job) -> None:
+        try:
+            if job.cancelled:
+                with self._lock:
+                    self._finish(job, job._cancel_status)
+            else:
+                self._execute(job)
+            self._send_notification(job)
+        finally:
+            self._release(job)
+
+    def _execute(self, job: Job) -> None:
+        job.status = 'running'
+        job.started = time.time()
+        self._send_notification(job)
+        try:
+            job.result = job.fn(job)
+            status = job._cancel_status if job.cancelled else 'done'
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.description}) failed: {e}")
+            job.error = str(e)
+            status = 'failed'
+        with self._lock:
+            self._finish(job, status)
+        metrics.observe('job', job.kind, job.finished - job.started, error=status == 'failed')
+
+    def _release(self, job: Job) -> None:
+        """Hand the job's key to the job waiting behind it, if any."""
+        if job.key is None:
+            return
+        with self._lock:
+            if self._active.get(job.key) is not job:
+                return
+            successor = self._waiting.pop(job.key, None)
+            if successor is None:
+                del self._active[job.key]
+            else:
+                self._active[job.key] = successor
+                self._pool().submit(self._run, successor)
+
+    def _finish(self, job: Job, status: str) -> None:
+        # Caller holds the lock
+        job.status = status
+        job.finished = time.time()
+        if status == 'done':
+            job.progress = 1.0
+        job._done.set()
+
+    def _trim(self) -> None:
+        # Caller holds the lock; drop the oldest finished jobs beyond the history limit
+        excess = len(self._jobs) - self.history
+        for job_id in [j.id for j in self._jobs.values() if j.status in FINISHED_STATES][:max(0, excess)]:
+            del self._jobs[job_id]
+
+    def _send_notification(self, job: Job) -> None:
+        if self.notify is None:
+            return
+        job._last_notified = time.monotonic()
+        try:
+            self.notify(job)
+        except Exception as e:
+            logger.error(f"Job notification failed: {e}")
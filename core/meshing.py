@@ -0,0 +1,38 @@
+import numpy as np
+from typing import List, Tuple
+from .regions import MAX_FILL_VOLUME
+
+Rect = Tuple[int, int, int, int, int]  # x0, y0, x1, y1 (inclusive), value
+
+
+def count_row_runs(grid: np.ndarray, mask: np.ndarray) -> int:
+    """Number of fills needed when only merging identical masked cells along rows."""
+    starts = mask.copy()
+    starts[:, 1:] &= ~(mask[:, :-1] & (grid[:, 1:] == grid[:, :-1]))
+    return int(starts.sum())
+
+
+def greedy_rectangles(grid: np.ndarray, mask: np.ndarray, max_area: int = MAX_FILL_VOLUME) -> List[Rect]:
+    """
+    Cover every masked cell of a 2D grid with single-valued axis-aligned rectangles.
+    Rectangles grow right then down and may extend over unmasked cells that already
+    hold the same value, since rewriting those is a no-op. No rectangle exceeds max_area.
+    """
+    h, w = grid.shape
+    covered = np.zeros((h, w), dtype=bool)
+    rects: List[Rect] = []
+    for y, x in np.argwhere(mask):
+        if covered[y, x]:
+            continue
+        value = grid[y, x]
+        row = grid[y, x:min(w, x + max_area)]
+        mismatch = np.flatnonzero(row != value)
+        x1 = x + (int(mismatch[0]) if mismatch.size else row.size) - 1
+        width = x1 - x + 1
+        max_rows = max(1, max_area // width)
+        y1 = y
+        while y1 + 1 < h and y1 + 1 - y < max_rows and np.all(grid[y1 + 1, x:x1 + 1] == value):
+            y1 += 1
+        covered[y:y1 + 1, x:x1 + 1] = True
+        rects.append((int(x), int(y), int(x1), int(y1), int(value)))
+    return rects
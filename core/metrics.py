@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import bisect
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency buckets, in milliseconds; the last bucket is open-ended
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+BUCKET_LABELS = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+
+# Set MC_MCP_METRICS_LOG=1 to emit one JSON log line per observation
+LOG_ENV = "MC_MCP_METRICS_LOG"
+
+
+class LatencyHistogram:
+    """Fixed log-spaced latency buckets plus count/total/min/max and byte counters."""
+
+    __slots__ = ('counts', 'count', 'total_ms', 'min_ms', 'max_ms', 'errors', 'bytes_out', 'bytes_in')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float('inf')
+        self.max_ms = 0.0
+        self.errors = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+    def observe(self, ms: float, error: bool = False, bytes_out: int = 0, bytes_in: int = 0) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        self.errors += int(error)
+        self.bytes_out += bytes_out
+        self.bytes_in += bytes_in
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (capped at the observed max)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                bound = BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+                return min(float(bound), self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min_ms, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'buckets': {label: n for label, n in zip(BUCKET_LABELS, self.counts) if n},
+        }
+        if self.bytes_out or self.bytes_in:
+            result['bytes_out'] = self.bytes_out
+            result['bytes_in'] = self.bytes_in
+        return result
+
+
+class Metrics:
+    """Thread-safe registry of latency histograms grouped by category (tool, http, render_stage...)."""
+
+    def __init__(self, log_lines: Optional[bool] = None):
+        self.log_lines = os.environ.get(LOG_ENV, '') not in ('', '0') if log_lines is None else log_lines
+        self.started = time.time()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, category: str, name: str, seconds: float, error: bool = False, bytes_out: int = 0, bytes_in: int = 0) -> None:
+        ms = seconds * 1000.0
+        with self._lock:
+            histogram = self._histograms.get((category, name))
+            if histogram is None:
+                histogram = self._histograms[(category, name)] = LatencyHistogram()
+            histogram.observe(ms, error=error, bytes_out=bytes_out, bytes_in=bytes_in)
+        if self.log_lines:
+            line = {'metric': category, 'name': name, 'ms': round(ms, 3)}
+            if error:
+                line['error'] = True
+            if bytes_out or bytes_in:
+                line.update(bytes_out=bytes_out, bytes_in=bytes_in)
+            logger.info(json.dumps(line))
+
+    @contextmanager
+    def timer(self, category: str, name: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """Time a block; also stores the elapsed milliseconds in `timings[name]` if given."""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if timings is not None:
+                timings[name] = round(timings.get(name, 0.0) + elapsed * 1000.0, 3)
+            self.observe(category, name, elapsed, error=error)
+
+    def instrument(self, category: str, name: Optional[str] = None) -> Callable[[Callable], Callable]:
+        """Decorator recording every call of the function under category/name."""
+        def decorator(fn: Callable) -> Callable:
+            label = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.timer(category, label):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self, category: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            items: List[Tuple[Tuple[str, str], Dict[str, Any]]] = [(k, h.to_dict()) for k, h in self._histograms.items()]
+        result: Dict[str, Any] = {'uptime_s': round(time.time() - self.started, 1)}
+        for (cat, name), data in sorted(items):
+            if category is None or cat == category:
+                result.setdefault(cat, {})[name] = data
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+        self.started = time.time()
+
+
+metrics = Metrics()
@@ -1,106 +1,520 @@
-import requests
-import re
 import math
 import json
+import time
 import logging
-from typing import Optional, Dict, Any, Tuple
+from concurrent.futures import Future, wait
+from typing import Optional, Dict, Any, Tuple, List, Callable, TYPE_CHECKING
+from .transport import HttpTransport, AsyncHttpTransport, DEFAULT_MAX_IN_FLIGHT
+from .regions import split_box
+from .ratecontrol import RateController, is_idempotent, is_read, DEFAULT_TARGET_LATENCY
+from .players import PlayerCache, PlayerTracker, fetch_players, DEFAULT_PLAYER_TTL, DEFAULT_POLL_INTERVAL
+
+if TYPE_CHECKING:
+    from .blockcache import BlockCache, BlockGrid
 
 logger = logging.getLogger(__name__)
 
+# GDMC executes every line of a /command body as its own command. These bound
+# a single POST so one batch never stalls the server tick for too long.
+DEFAULT_BATCH_COMMANDS = 1000
+# Full-size /fill regions per request when a fill runs with cancellation or progress hooks,
+# so a typical fill is several requests and should_stop is consulted between them
+FILL_SLICE_REGIONS = 16
+# Blocks per PUT /blocks request before the rate controller adapts it
+DEFAULT_PUT_BATCH = 4096
+DEFAULT_BATCH_BYTES = 128 * 1024
+
+# Optional hooks for long writes: should_stop() is polled between slices of requests,
+# progress(fraction, message) is called after each slice
+StopCheck = Optional[Callable[[], bool]]
+ProgressCallback = Optional[Callable[[Optional[float], str], None]]
+
+
+def _namespaced(block_type: str) -> str:
+    if not block_type.startswith("minecraft:"):
+        block_type = f"minecraft:{block_type}"
+    return block_type
+
+
+def fill_command(x1: int, y1: int, z1: int, x2: int, y2: int, z2: int, block_type: str) -> str:
+    return f'fill {int(x1)} {int(y1)} {int(z1)} {int(x2)} {int(y2)} {int(z2)} {_namespaced(block_type)}'
+
+
+def setblock_command(x: int, y: int, z: int, block_type: str) -> str:
+    return f'setblock {int(x)} {int(y)} {int(z)} {_namespaced(block_type)}'
+
+
+COMMAND_BLOCK_TYPES = {
+    "impulse": "minecraft:command_block",
+    "repeating": "minecraft:repeating_command_block",
+    "chain": "minecraft:chain_command_block",
+}
+
+
+def snbt_string(text: str) -> str:
+    """Quote text as an SNBT string, escaping backslashes and double quotes."""
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def command_block_spec(command: str, mode: str = "impulse", facing: str = "north", conditional: bool = False, auto: bool = False) -> str:
+    """Block id, state and NBT of a configured command block, as used by setblock."""
+    block_type = COMMAND_BLOCK_TYPES.get(mode.lower(), COMMAND_BLOCK_TYPES["impulse"])
+    state = f"[facing={facing},conditional={str(conditional).lower()}]"
+    # auto:1b is "Always Active", auto:0b is "Needs Redstone"
+    return f'{block_type}{state}{{Command:{snbt_string(command)},auto:{1 if auto else 0}b}}'
+
+
+def tellraw_command(message: str, color: str = "white") -> str:
+    payload = json.dumps([
+        "",
+        {"text": "🤖 [MCP] ", "color": "aqua", "bold": True},
+        {"text": message, "color": color}
+    ])
+    return f'tellraw @a {payload}'
+
+
+def _coord(value: float) -> str:
+    # Whole numbers stay integers so Minecraft centres the entity on the block
+    return str(int(value)) if float(value).is_integer() else f"{value:.2f}"
+
+
+def summon_command(entity_type: str, x: float, y: float, z: float, nbt: Optional[str] = None) -> str:
+    nbt_str = nbt if nbt else ""
+    return f'summon {entity_type} {_coord(x)} {_coord(y)} {_coord(z)} {nbt_str}'.strip()
+
+
+class CommandResult:
+    """Outcome of one command queued on a CommandBatch, filled in when the batch flushes."""
+
+    __slots__ = ('command', 'success', 'message', 'done')
+
+    def __init__(self, command: str):
+        self.command = command
+        self.success = False
+        self.message = ""
+        self.done = False
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    def __repr__(self) -> str:
+        state = ("ok" if self.success else "failed") if self.done else "pending"
+        return f"CommandResult({self.command!r}, {state})"
+
+
+class CommandBatch:
+    """
+    Buffer of commands sent to /command as newline-separated bodies.
+    Flushes automatically when the size bounds are reached and on context exit.
+    Each queued command gets a CommandResult that is resolved by the flush.
+    With concurrent=True full chunks are sent through the transport's in-flight
+    window while more commands are queued; only use it when the commands do not
+    depend on each other's order (e.g. disjoint fills of a screen render).
+    Without an explicit max_commands the chunk size follows the interface's rate
+    controller, shrinking while the server is slow.
+    """
+
+    def __init__(self, mc: 'MinecraftInterface', max_commands: Optional[int] = None, max_bytes: int = DEFAULT_BATCH_BYTES, concurrent: bool = False):
+        if max_commands is not None and max_commands < 1:
+            raise ValueError("max_commands must be at least 1")
+        self.mc = mc
+        self.max_commands = max_commands
+        self.max_bytes = max_bytes
+        self.concurrent = concurrent
+        self.results: List[CommandResult] = []
+        # Commands of each request, in send order
+        self.sent: List[List[CommandResult]] = []
+        self.requests_sent = 0
+        self._pending: List[CommandResult] = []
+        self._pending_bytes = 0
+        self._in_flight: List[Future] = []
+        self._touched: List[Tuple[int, int, int, int, int, int]] = []
+
+    def __enter__(self) -> 'CommandBatch':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+        else:
+            if self._pending:
+                logger.warning(f"Discarding {len(self._pending)} queued commands after error: {exc}")
+                self._pending = []
+                self._pending_bytes = 0
+            # Requests already sent may still be landing; invalidating before they finish
+            # would let a concurrent read re-cache the pre-write sections
+            in_flight, self._in_flight = self._in_flight, []
+            wait(in_flight)
+            self._invalidate_touched()
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def add(self, command: str) -> CommandResult:
+        """Queue a raw command and return its (pending) result."""
+        command = command.strip()
+        if '\n' in command or '\r' in command:
+            raise ValueError("Batched commands must be single-line")
+        size = len(command.encode('utf-8')) + 1
+        max_commands = self.max_commands or self.mc.rate.batch_commands
+        if self._pending and (len(self._pending) >= max_commands or self._pending_bytes + size > self.max_bytes):
+            self._send_pending(wait=not self.concurrent)
+        result = CommandResult(command)
+        self._pending.append(result)
+        self._pending_bytes += size
+        self.results.append(result)
+        return result
+
+    def fill_region(self, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int, block_type: str) -> CommandResult:
+        self._touched.append((x1, y1, z1, x2, y2, z2))
+        return self.add(fill_command(x1, y1, z1, x2, y2, z2, block_type))
+
+    def fill_box(self, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int, block_type: str) -> List[CommandResult]:
+        """Queue a fill of any size, split into chunk-aligned boxes within the /fill volume limit."""
+        return [self.fill_region(*box, block_type) for box in split_box(x1, y1, z1, x2, y2, z2)]
+
+    def set_block(self, x: int, y: int, z: int, block_type: str) -> CommandResult:
+        self._touched.append((x, y, z, x, y, z))
+        return self.add(setblock_command(x, y, z, block_type))
+
+    def tellraw(self, message: str, color: str = "white") -> CommandResult:
+        return self.add(tellraw_command(message, color))
+
+    def spawn_entity(self, entity_type: str, x: float, y: float, z: float, nbt: Optional[str] = None) -> CommandResult:
+        return self.add(summon_command(entity_type, x, y, z, nbt))
+
+    def _send_pending(self, wait: bool) -> None:
+        if not self._pending:
+            return
+        pending, self._pending, self._pending_bytes = self._pending, [], 0
+        self.sent.append(pending)
+        self.requests_sent += 1
+        if wait:
+            self._deliver(pending)
+            if not self._in_flight:
+                self._invalidate_touched()
+        else:
+            self._in_flight.append(self.mc.transport.submit(self._deliver, pending))
+
+    def _deliver(self, pending: List[CommandResult]) -> None:
+        outcomes = self.mc._post_commands([r.command for r in pending])
+        for result, (success, message) in zip(pending, outcomes):
+            result.success = success
+            result.message = message
+            result.done = True
+
+    def flush(self) -> bool:
+        """Send all pending commands and wait for in-flight requests. Returns True if every line succeeded."""
+        self._send_pending(wait=not self._in_flight)
+        in_flight, self._in_flight = self._in_flight, []
+        for future in in_flight:
+            future.result()
+        self._invalidate_touched()
+        return self.failed == 0
+
+    def _invalidate_touched(self) -> None:
+        # Cached reads of blocks we just wrote are stale once the writes have landed
+        touched, self._touched = self._touched, []
+        for box in touched:
+            self.mc.invalidate_blocks(*box)
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for r in self.results if r.done and r.success)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for r in self.results if r.done and not r.success)
+
+
 class MinecraftInterface:
-    def __init__(self, base_url: str = 'http://localhost:9000'):
+    def __init__(self, base_url: str = 'http://localhost:9000', max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 target_latency: float = DEFAULT_TARGET_LATENCY, target_throughput: Optional[float] = None,
+                 block_ttl: Optional[float] = None, **transport_options: Any):
         self.base_url = base_url
+        self.transport = HttpTransport(base_url, max_in_flight=max_in_flight, **transport_options)
+        # Paces writes: batch size and concurrency adapt to server latency and errors,
+        # separately for /command bodies and PUT /blocks payloads
+        self.rate = RateController(DEFAULT_BATCH_COMMANDS, max_in_flight, target_latency=target_latency,
+                                   target_throughput=target_throughput)
+        self.block_rate = RateController(DEFAULT_PUT_BATCH, max_in_flight, target_latency=target_latency,
+                                         target_throughput=target_throughput)
+        # Block reads and bulk writes need NumPy; it is imported on their first use
+        self._block_cache: Optional['BlockCache'] = None
+        # Seconds before a cached read is refetched, to pick up edits by players (None = until we write)
+        self.block_ttl = block_ttl
+        self.player_cache = PlayerCache()
+        self.player_tracker: Optional[PlayerTracker] = None
 
-    def send_command(self, command: str) -> bool:
-        """Send a command to Minecraft via GDMC HTTP."""
+    @property
+    def block_cache(self) -> 'BlockCache':
+        """Section cache for block reads, created on first use."""
+        if self._block_cache is None:
+            from .blockcache import BlockCache
+            self._block_cache = BlockCache(self, ttl=self.block_ttl)
+        return self._block_cache
+
+    def invalidate_blocks(self, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int) -> None:
+        """Drop cached reads of a box; nothing to do until the cache has been used."""
+        if self._block_cache is not None:
+            self._block_cache.invalidate_box(x1, y1, z1, x2, y2, z2)
+
+    def async_transport(self) -> AsyncHttpTransport:
+        """asyncio view of this interface's pooled transport."""
+        return AsyncHttpTransport(self.transport)
+
+    def _post_commands(self, commands: List[str], attempt: int = 0) -> List[Tuple[bool, str]]:
+        """
+        POST commands as one newline-separated body and map the per-line results back.
+        When the request as a whole fails (HTTP error, timeout) and every command is
+        idempotent, it is retried with backoff, re-split to the rate controller's
+        (by then smaller) batch size. Anything else, e.g. a summon, is never replayed.
+        """
+        data, error = self._post_command_body(commands)
+        if data is not None:
+            return self._command_outcomes(commands, data)
+        if attempt >= self.rate.max_retries or not all(is_idempotent(c) for c in commands):
+            return [(False, error)] * len(commands)
+        delay = self.rate.retry_delay(attempt)
+        logger.warning(f"Retrying {len(commands)} commands in {delay:.2f}s (attempt {attempt + 1}) after: {error}")
+        time.sleep(delay)
+        self.rate.note_retry()
+        step = max(1, self.rate.batch_commands)
+        outcomes: List[Tuple[bool, str]] = []
+        for start in range(0, len(commands), step):
+            outcomes += self._post_commands(commands[start:start + step], attempt + 1)
+        return outcomes
+
+    def _post_command_body(self, commands: List[str]) -> Tuple[Optional[List[Any]], str]:
+        """
+        One /command request; writes go through the rate controller, pure queries (player
+        polls) skip it. Returns (results, '') or (None, error).
+        """
+        if all(is_read(c) for c in commands):
+            return self._send_command_body(commands)
+        with self.rate.slot(len(commands)):
+            start = time.perf_counter()
+            data, error = self._send_command_body(commands)
+            self.rate.record(len(commands), time.perf_counter() - start, ok=data is not None)
+        return data, error
+
+    def _send_command_body(self, commands: List[str]) -> Tuple[Optional[List[Any]], str]:
         try:
-            url = f'{self.base_url}/command'
-            response = requests.post(url, data=command, timeout=5)
+            response = self.transport.post('/command', data='\n'.join(commands).encode('utf-8'))
             if response.status_code != 200:
                 logger.error(f"Command failed with status {response.status_code}: {response.text}")
-            return response.status_code == 200
+                return None, f"Error {response.status_code}: {response.text}"
+            return response.json(), ''
         except Exception as e:
             logger.error(f"Command error: {e}")
-            return False
+            return None, f"Exception: {str(e)}"
+
+    @staticmethod
+    def _command_outcomes(commands: List[str], data: List[Any]) -> List[Tuple[bool, str]]:
+        outcomes = []
+        for i in range(len(commands)):
+            if i < len(data) and isinstance(data[i], dict):
+                entry = data[i]
+                outcomes.append((bool(entry.get('status', 1)), str(entry.get('message', ''))))
+            else:
+                outcomes.append((False, "No result returned for command."))
+        return outcomes
 
-    def get_player_info(self) -> Optional[Dict[str, Any]]:
-        """Get current player position and rotation."""
+    def batch(self, max_commands: Optional[int] = None, max_bytes: int = DEFAULT_BATCH_BYTES, concurrent: bool = False) -> CommandBatch:
+        """Create a command batch; use as a context manager to flush on exit."""
+        return CommandBatch(self, max_commands=max_commands, max_bytes=max_bytes, concurrent=concurrent)
+
+    def send_command(self, command: str) -> bool:
+        """Send a command to Minecraft via GDMC HTTP (paced and, if idempotent, retried on request failure)."""
+        success, _ = self._post_commands([command])[0]
+        return success
+
+    def get_player_info(self, selector: str = '@p', max_age: float = DEFAULT_PLAYER_TTL) -> Optional[Dict[str, Any]]:
+        """
+        Get a player's position and rotation.
+        Served from the snapshot cache (kept fresh by a PlayerTracker if one is running)
+        when it is younger than max_age; otherwise fetched in a single request.
+        """
+        if self.player_tracker is not None and self.player_tracker.running and selector in self.player_tracker.players:
+            # The tracker keeps this player fresh; allow for one poll interval of age
+            max_age = max(max_age, 2 * self.player_tracker.interval)
+        cached = self.player_cache.get(selector, max_age)
+        if cached is not None:
+            return cached
         try:
-            # Get position via data command
-            pos_resp = requests.post(f'{self.base_url}/command', data='data get entity @p Pos')
-            rot_resp = requests.post(f'{self.base_url}/command', data='data get entity @p Rotation')
-            
-            if pos_resp.status_code == 200 and rot_resp.status_code == 200:
-                pos_data = pos_resp.json()
-                rot_data = rot_resp.json()
-                
-                # Parse position: [159.81d, 136.47d, 320.27d]
-                pos_match = re.search(r'\[([-\d.]+)d?, ([-\d.]+)d?, ([-\d.]+)d?\]', pos_data[0]['message'])
-                rot_match = re.search(r'\[([-\d.]+)f?, ([-\d.]+)f?\]', rot_data[0]['message'])
-                
-                if pos_match and rot_match:
-                    pos = (int(float(pos_match.group(1))), 
-                           int(float(pos_match.group(2))), 
-                           int(float(pos_match.group(3))))
-                    yaw = float(rot_match.group(1))
-                    pitch = float(rot_match.group(2))
-                    return {'position': pos, 'yaw': yaw, 'pitch': pitch}
-                else:
-                    logger.warning(f"Could not parse player info from response. Pos: {pos_data}, Rot: {rot_data}")
+            info = fetch_players(self, [selector])[selector]
         except Exception as e:
             logger.error(f"Could not get player info: {e}")
-        return None
+            return None
+        if info is None:
+            return None
+        self.player_cache.put(selector, info)
+        return dict(info)
+
+    def track_players(self, players: List[str], interval: float = DEFAULT_POLL_INTERVAL) -> PlayerTracker:
+        """Start (or retarget) a background poller that keeps player snapshots fresh."""
+        if self.player_tracker is not None:
+            self.player_tracker.stop()
+        self.player_tracker = PlayerTracker(self, players, interval).start()
+        return self.player_tracker
+
+    def fill_box(self, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int, block_type: str,
+                 should_stop: StopCheck = None, progress: ProgressCallback = None) -> Dict[str, int]:
+        """
+        Fill a box of any size. Boxes over the /fill volume limit are split into
+        chunk-aligned sub-boxes sent through one batch. Returns a per-region tally;
+        regions left unsent because should_stop() returned True count as 'skipped'.
+        """
+        boxes = split_box(x1, y1, z1, x2, y2, z2)
+        # Without hooks everything goes out as one batch; with them, one in-flight window of
+        # FILL_SLICE_REGIONS-region requests at a time
+        hooked = should_stop is not None or progress is not None
+        step = self.transport.max_in_flight * FILL_SLICE_REGIONS if hooked else len(boxes)
+        results: List[CommandResult] = []
+        requests = 0
+        for start in range(0, len(boxes), step):
+            if should_stop is not None and should_stop():
+                break
+            # Sub-boxes are disjoint, so their batches can go out concurrently
+            with self.batch(max_commands=FILL_SLICE_REGIONS if hooked else None, concurrent=True) as batch:
+                for box in boxes[start:start + step]:
+                    results.append(batch.fill_region(*box, block_type))
+            requests += batch.requests_sent
+            if progress is not None:
+                progress(len(results) / len(boxes), f"{len(results)}/{len(boxes)} regions filled")
+        return {
+            'regions': len(boxes),
+            'succeeded': sum(1 for r in results if r.success),
+            'failed': sum(1 for r in results if not r.success),
+            'skipped': len(boxes) - len(results),
+            'requests': requests,
+        }
 
     def fill_region(self, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int, block_type: str) -> bool:
-        """Execute a /fill command."""
-        if not block_type.startswith("minecraft:"):
-            block_type = f"minecraft:{block_type}"
-        command = f'fill {int(x1)} {int(y1)} {int(z1)} {int(x2)} {int(y2)} {int(z2)} {block_type}'
-        return self.send_command(command)
+        """Execute a /fill command, splitting it if it exceeds the volume limit."""
+        return self.fill_box(x1, y1, z1, x2, y2, z2, block_type)['failed'] == 0
 
     def set_block(self, x: int, y: int, z: int, block_type: str) -> bool:
         """Execute a /setblock command."""
-        if not block_type.startswith("minecraft:"):
-            block_type = f"minecraft:{block_type}"
-        command = f'setblock {int(x)} {int(y)} {int(z)} {block_type}'
-        return self.send_command(command)
+        success = self.send_command(setblock_command(x, y, z, block_type))
+        self.invalidate_blocks(x, y, z, x, y, z)
+        return success
 
     def tellraw(self, message: str, color: str = "white") -> bool:
         """Send a tellraw message to all players."""
-        payload = json.dumps([
-            "",
-            {"text": "🤖 [MCP] ", "color": "aqua", "bold": True},
-            {"text": message, "color": color}
-        ])
-        return self.send_command(f'tellraw @a {payload}')
+        return self.send_command(tellraw_command(message, color))
 
     def get_build_area(self) -> Optional[Dict[str, Any]]:
         """Get the defined build area from GDMC."""
         try:
-            response = requests.get(f'{self.base_url}/buildarea', timeout=5)
+            response = self.transport.get('/buildarea')
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
             logger.error(f"Could not get build area: {e}")
         return None
 
-    def get_blocks(self, x: int, y: int, z: int, dx: int, dy: int, dz: int) -> Optional[str]:
-        """Get block data for a region as a string (block types)."""
+    def get_block_list(self, x: int, y: int, z: int, dx: int, dy: int, dz: int) -> Optional[List[Dict[str, Any]]]:
+        """Get the blocks of a region from /blocks as a list of {x, y, z, id} dicts."""
         try:
-            url = f'{self.base_url}/chunks?x={x}&y={y}&z={z}&dx={dx}&dy={dy}&dz={dz}'
-            response = requests.get(url, headers={'Accept': 'text/plain'}, timeout=10)
+            params = {'x': x, 'y': y, 'z': z, 'dx': dx, 'dy': dy, 'dz': dz, 'includeState': 'false', 'includeData': 'false'}
+            response = self.transport.get('/blocks', params=params, headers={'Accept': 'application/json'})
             if response.status_code == 200:
-                return response.text
+                return response.json()
+            logger.error(f"Block read failed with status {response.status_code}: {response.text}")
         except Exception as e:
             logger.error(f"Could not get blocks: {e}")
         return None
 
+    def _put_block_batch(self, blocks: List[Dict[str, Any]], params: Dict[str, str]) -> Tuple[int, int, int]:
+        """PUT one batch to /blocks. Returns (placed, unchanged, failed)."""
+        # PUT is idempotent, so the transport's retry policy already replays it on 5xx/connection errors
+        with self.block_rate.slot(len(blocks)):
+            start = time.perf_counter()
+            try:
+                response = self.transport.put('/blocks', params=params, data=json.dumps(blocks), headers={'Content-Type': 'application/json'})
+                data = response.json() if response.status_code == 200 else None
+                if data is None:
+                    logger.error(f"Block placement failed with status {response.status_code}: {response.text}")
+            except Exception as e:
+                logger.error(f"Block placement error: {e}")
+                data = None
+            self.block_rate.record(len(blocks), time.perf_counter() - start, ok=data is not None)
+        if data is None:
+            return 0, 0, len(blocks)
+        placed = unchanged = failed = 0
+        for i in range(len(blocks)):
+            entry = data[i] if i < len(data) and isinstance(data[i], dict) else None
+            if entry is None or (not entry.get('status') and entry.get('message')):
+                failed += 1
+            elif entry.get('status'):
+                placed += 1
+            else:
+                # status 0 without a message: the block was already there
+                unchanged += 1
+        return placed, unchanged, failed
+
+    def put_blocks(self, x: int, y: int, z: int, indices: Any, palette: List[Optional[str]], block_updates: bool = True,
+                   spawn_drops: bool = False, batch_size: Optional[int] = None, mask: Any = None,
+                   should_stop: StopCheck = None, progress: ProgressCallback = None) -> Dict[str, int]:
+        """
+        Write a (dy, dz, dx) palette-index grid with its minimum corner at x, y, z through
+        the bulk PUT /blocks endpoint, in chunk-ordered batches. Without batch_size the
+        batch size and concurrency follow block_rate, re-read between waves of requests
+        so a long build shrinks its batches while the server is slow. Palette entries of
+        None/'' leave the existing block. block_updates=False suppresses neighbour updates
+        (no falling sand, flowing water or redstone ticks).
+        """
+        from .voxels import iter_block_batches
+        params = {'doBlockUpdates': str(block_updates).lower(), 'spawnDrops': str(spawn_drops).lower()}
+        blocks = [b for batch in iter_block_batches((x, y, z), indices, palette, mask=mask) for b in batch]
+        outcomes: List[Tuple[int, int, int]] = []
+        sent = 0
+        while sent < len(blocks):
+            if should_stop is not None and should_stop():
+                break
+            size = batch_size or self.block_rate.batch_commands
+            wave = []
+            for _ in range(2 * self.block_rate.concurrency):
+                if sent >= len(blocks):
+                    break
+                wave.append(blocks[sent:sent + size])
+                sent += len(wave[-1])
+            # Batches cover disjoint blocks, so they can go out concurrently
+            outcomes += self.transport.map(lambda b: self._put_block_batch(b, params), wave)
+            if progress is not None:
+                progress(sent / len(blocks), f"{sent}/{len(blocks)} blocks written")
+        dy, dz, dx = indices.shape
+        self.invalidate_blocks(x, y, z, x + dx - 1, y + dy - 1, z + dz - 1)
+        return {
+            'placed': sum(o[0] for o in outcomes),
+            'unchanged': sum(o[1] for o in outcomes),
+            'failed': sum(o[2] for o in outcomes),
+            'requests': len(outcomes),
+        }
+
+    def read_region(self, x: int, y: int, z: int, dx: int, dy: int, dz: int) -> 'BlockGrid':
+        """Blocks of a region as a palette + index grid, served from the section cache where possible."""
+        return self.block_cache.get_region(x, y, z, dx, dy, dz)
+
+    def read_box(self, x: int, y: int, z: int, dx: int, dy: int, dz: int) -> 'BlockGrid':
+        """
+        Fresh blocks of exactly this box in one /blocks request, bypassing the section
+        cache (which would fetch whole 16-block columns around it).
+        """
+        from .blockcache import normalize_box, grid_from_blocks
+        x, y, z, dx, dy, dz = normalize_box(x, y, z, dx, dy, dz)
+        blocks = self.get_block_list(x, y, z, dx, dy, dz)
+        if blocks is None:
+            raise IOError(f"Could not read blocks at {x},{y},{z} size {dx}x{dy}x{dz}")
+        return grid_from_blocks((x, y, z), (dx, dy, dz), blocks)
+
     def get_world_info(self) -> Dict[str, Any]:
         """Get world-wide information like time and weather."""
         info = {}
         try:
             # Get time
-            time_resp = requests.post(f'{self.base_url}/command', data='time query daytime')
+            time_resp = self.transport.post('/command', data='time query daytime')
             if time_resp.status_code == 200:
                 info['daytime'] = time_resp.json()[0]['message']
             
@@ -112,9 +526,11 @@ class MinecraftInterface:
 
     def execute_command(self, command: str) -> str:
         """Execute a raw Minecraft command and return the response message."""
+        # A raw command may change blocks anywhere, so cached reads can no longer be trusted
+        if self._block_cache is not None:
+            self._block_cache.clear()
         try:
-            url = f'{self.base_url}/command'
-            response = requests.post(url, data=command, timeout=5)
+            response = self.transport.post('/command', data=command.encode('utf-8'))
             if response.status_code == 200:
                 data = response.json()
                 return data[0]['message'] if data else "Command executed."
@@ -125,9 +541,7 @@ class MinecraftInterface:
 
     def spawn_entity(self, entity_type: str, x: int, y: int, z: int, nbt: Optional[str] = None) -> bool:
         """Spawn an entity at the specified coordinates."""
-        nbt_str = nbt if nbt else ""
-        command = f'summon {entity_type} {x} {y} {z} {nbt_str}'.strip()
-        return self.send_command(command)
+        return self.send_command(summon_command(entity_type, x, y, z, nbt))
 
     def set_world_property(self, property_type: str, value: str) -> bool:
         """Set a world property like weather, time, or gamerule."""
@@ -147,21 +561,8 @@ class MinecraftInterface:
         Modes: impulse, repeating, chain
         Facings: north, south, east, west, up, down
         """
-        block_types = {
-            "impulse": "minecraft:command_block",
-            "repeating": "minecraft:repeating_command_block",
-            "chain": "minecraft:chain_command_block"
-        }
-        bt = block_types.get(mode.lower(), "minecraft:command_block")
-        
-        # Build block state
-        state = f"[facing={facing},conditional={str(conditional).lower()}]"
-        
-        # Build NBT
-        # auto=1 makes it "Always Active", auto=0 is "Needs Redstone"
-        nbt = f'{{Command:"{command_to_run}",auto:{1 if auto else 0}b}}'
-        
-        # Use setblock with state and NBT
-        full_command = f'setblock {x} {y} {z} {bt}{state}{nbt}'
-        return self.send_command(full_command)
+        spec = command_block_spec(command_to_run, mode, facing, conditional=conditional, auto=auto)
+        success = self.send_command(setblock_command(x, y, z, spec))
+        self.invalidate_blocks(x, y, z, x, y, z)
+        return success
 
@@ -0,0 +1,147 @@
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Any, List, Tuple, Union
+import numpy as np
+from PIL import Image, ImageEnhance
+from .dither import dither_indices, floyd_steinberg_indices, uniform_region_mask, DIFFUSION_LUT_BITS
+from .quantize import palette_lut
+from .frames import load_frame
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for preprocessing; 0 or 1 keeps everything in-process.
+# Defaults to the CPU count (capped at MAX_WORKERS).
+WORKERS_ENV = "MC_MCP_PROCESS_WORKERS"
+MAX_WORKERS = 8
+
+# Floyd-Steinberg runs in bands of BAND_ROWS rows. Each band first diffuses over the
+# BAND_OVERLAP rows above it (discarding their output) so the error entering the band
+# is close to what a full-image pass would carry across the seam.
+BAND_ROWS = 32
+BAND_OVERLAP = 8
+
+# Images with fewer pixels are dithered in-process; pickling would cost more than it saves
+PARALLEL_MIN_PIXELS = 64 * 64
+
+CONTRAST = 1.2
+
+Size = Tuple[int, int]  # width, height
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def prepare_image(image: Any, size: Size) -> np.ndarray:
+    """Decode, LANCZOS-resize and contrast-enhance an image (path, PIL image or array) to size."""
+    img = load_frame(image)
+    img = img.resize(size, Image.Resampling.LANCZOS)
+    img = ImageEnhance.Contrast(img).enhance(CONTRAST)
+    return np.array(img)
+
+
+def band_spans(height: int, band_rows: int = BAND_ROWS, overlap: int = BAND_OVERLAP) -> List[Tuple[int, int, int]]:
+    """(first warm-up row, first kept row, end row) for each band of an image of the given height."""
+    return [(max(0, start - overlap), start, min(height, start + band_rows)) for start in range(0, height, band_rows)]
+
+
+def _dither_band(pixels: np.ndarray, uniform: np.ndarray, keep_from: int) -> np.ndarray:
+    return floyd_steinberg_indices(pixels, uniform=uniform)[keep_from:]
+
+
+def dither_bands(pixels: np.ndarray, band_rows: int = BAND_ROWS, overlap: int = BAND_OVERLAP) -> np.ndarray:
+    """In-process equivalent of the banded Floyd-Steinberg pass the pool runs."""
+    uniform = uniform_region_mask(pixels)
+    return np.concatenate([_dither_band(pixels[lo:hi], uniform[lo:hi], start - lo)
+                           for lo, start, hi in band_spans(pixels.shape[0], band_rows, overlap)])
+
+
+def _init_worker() -> None:
+    # Build the diffusion lookup table once per worker instead of on its first band
+    palette_lut(DIFFUSION_LUT_BITS)
+
+
+def worker_count() -> int:
+    value = os.environ.get(WORKERS_ENV, '')
+    if value:
+        return max(0, int(value))
+    return min(os.cpu_count() or 1, MAX_WORKERS)
+
+
+def dither_layout() -> str:
+    """
+    How dither_parallel runs Floyd-Steinberg: in bands when there is a pool to spread
+    them over, as one full-image pass otherwise. Part of the grid cache key.
+    """
+    return f"b{BAND_ROWS}.{BAND_OVERLAP}" if worker_count() >= 2 else "full"
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared worker pool, started on first use and kept warm; None when disabled."""
+    global _pool
+    workers = worker_count()
+    if workers < 2:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # By now the process runs HTTP and job threads, so forking it could hand the
+            # workers held locks. A fork server started from a clean process with just
+            # this module preloaded keeps worker startup cheap without that risk.
+            context = None
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(['core.pipeline'])
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker)
+            logger.info(f"Started image preprocessing pool with {workers} workers")
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_pool)
+
+Pending = Union[np.ndarray, List[Future]]
+
+
+def _banded(pixels: np.ndarray, mode: Optional[str]) -> bool:
+    h, w = pixels.shape[:2]
+    return mode == 'floyd_steinberg' and h * w >= PARALLEL_MIN_PIXELS and h > BAND_ROWS
+
+
+def _submit_dither(pool: ProcessPoolExecutor, pixels: np.ndarray, mode: Optional[str]) -> Pending:
+    """Queue the bands of a Floyd-Steinberg pass; other modes are vectorized and run inline."""
+    if not _banded(pixels, mode):
+        return dither_indices(pixels, mode)
+    h = pixels.shape[0]
+    uniform = uniform_region_mask(pixels)
+    return [pool.submit(_dither_band, pixels[lo:hi], uniform[lo:hi], start - lo) for lo, start, hi in band_spans(h)]
+
+
+def _collect(pending: Pending) -> np.ndarray:
+    if isinstance(pending, np.ndarray):
+        return pending
+    return np.concatenate([future.result() for future in pending])
+
+
+def dither_parallel(pixels: np.ndarray, mode: Optional[str] = 'floyd_steinberg') -> np.ndarray:
+    """dither_indices that spreads Floyd-Steinberg bands over the worker pool."""
+    pool = get_pool()
+    if pool is None:
+        return dither_indices(pixels, mode)
+    try:
+        return _collect(_submit_dither(pool, pixels, mode))
+    except BrokenProcessPool:
+        logger.warning("Preprocessing pool broke; dithering in-process")
+        shutdown_pool()
+        return dither_indices(pixels, mode)
+
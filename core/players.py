@@ -0,0 +1,120 @@
+import re
+import math
+import time
+import logging
+import threading
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLAYER_TTL = 0.25
+DEFAULT_POLL_INTERVAL = 0.5
+
+# "Steve has the following entity data: [159.81d, 136.47d, 320.27d]"
+POS_PATTERN = re.compile(r'\[([-\d.E]+)d?, ([-\d.E]+)d?, ([-\d.E]+)d?\]')
+# "Steve has the following entity data: [-90.3f, 12.5f]"
+ROT_PATTERN = re.compile(r'\[([-\d.E]+)f?, ([-\d.E]+)f?\]')
+
+
+def player_commands(selector: str) -> List[str]:
+    return [f'data get entity {selector} Pos', f'data get entity {selector} Rotation']
+
+
+def parse_player_info(pos_message: str, rot_message: str) -> Optional[Dict[str, Any]]:
+    """Turn the Pos and Rotation replies of `data get entity` into a player info dict."""
+    pos_match = POS_PATTERN.search(pos_message)
+    rot_match = ROT_PATTERN.search(rot_message)
+    if not (pos_match and rot_match):
+        return None
+    # Floor, not truncate, so negative coordinates land on the block the player is in
+    pos = tuple(math.floor(float(pos_match.group(i))) for i in (1, 2, 3))
+    return {'position': pos, 'yaw': float(rot_match.group(1)), 'pitch': float(rot_match.group(2))}
+
+
+def fetch_players(mc: Any, selectors: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Fetch position and rotation for every selector in a single /command request."""
+    commands = [c for selector in selectors for c in player_commands(selector)]
+    outcomes = mc._post_commands(commands)
+    players: Dict[str, Optional[Dict[str, Any]]] = {}
+    for i, selector in enumerate(selectors):
+        (pos_ok, pos_msg), (rot_ok, rot_msg) = outcomes[2 * i], outcomes[2 * i + 1]
+        info = parse_player_info(pos_msg, rot_msg) if pos_ok and rot_ok else None
+        if info is None:
+            logger.warning(f"Could not parse player info for {selector}. Pos: {pos_msg}, Rot: {rot_msg}")
+        players[selector] = info
+    return players
+
+
+class PlayerCache:
+    """Player snapshots with their fetch time; entries older than the caller's max_age are misses."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, selector: str, max_age: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(selector)
+        if entry is None or time.monotonic() - entry[0] > max_age:
+            return None
+        # Callers decorate the result (e.g. with facing), so never hand out the cached dict
+        return dict(entry[1])
+
+    def put(self, selector: str, info: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[selector] = (time.monotonic(), info)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class PlayerTracker:
+    """
+    Background poller that refreshes the snapshots of several players in one request
+    per interval, so lookups are served from memory.
+    """
+
+    def __init__(self, mc: Any, players: Sequence[str] = ('@p',), interval: float = DEFAULT_POLL_INTERVAL):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.mc = mc
+        self.players = list(players)
+        self.interval = interval
+        self.polls = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def poll_once(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        players = fetch_players(self.mc, self.players)
+        for selector, info in players.items():
+            if info is not None:
+                self.mc.player_cache.put(selector, info)
+        self.polls += 1
+        return players
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Player poll failed: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self) -> 'PlayerTracker':
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='player-tracker', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
@@ -0,0 +1,66 @@
+import functools
+import numpy as np
+from typing import Optional
+from .utils import PALETTE_ARRAY, PALETTE_VERSION
+
+# Pixels processed per distance evaluation; bounds the (N, palette, 3) temporary
+CHUNK_PIXELS = 1 << 16
+
+
+def _nearest_indices(colors: np.ndarray) -> np.ndarray:
+    """Exact nearest palette index for an (N, 3) array, matching find_closest_color_index."""
+    colors = colors.astype(np.float32, copy=False)
+    out = np.empty(len(colors), dtype=np.uint8)
+    for start in range(0, len(colors), CHUNK_PIXELS):
+        chunk = colors[start:start + CHUNK_PIXELS]
+        distances = np.sum((PALETTE_ARRAY[None, :, :] - chunk[:, None, :]) ** 2, axis=2)
+        out[start:start + CHUNK_PIXELS] = np.argmin(distances, axis=1)
+    return out
+
+
+@functools.lru_cache(maxsize=4)
+def _build_lut(bits: int, palette_version: str) -> np.ndarray:
+    size = 1 << bits
+    shift = 8 - bits
+    # Each cell maps to the palette colour nearest its centre; with 8 bits that is exact
+    centres = (np.arange(size, dtype=np.int32) << shift) + ((1 << shift) >> 1)
+    palette = PALETTE_ARRAY.astype(np.int32)
+    sq = [(centres[:, None] - palette[None, :, c]) ** 2 for c in range(3)]
+    lut = np.empty((size, size, size), dtype=np.uint8)
+    for r in range(size):
+        distances = sq[0][r][None, None, :] + sq[1][:, None, :] + sq[2][None, :, :]
+        lut[r] = np.argmin(distances, axis=2)
+    return lut
+
+
+def palette_lut(bits: int = 5) -> np.ndarray:
+    """
+    RGB -> palette index table with 2**bits cells per channel, built once per palette.
+    bits=5 is a 32x32x32 table; bits=8 is the exact full 24-bit table (16 MiB).
+    """
+    if not 1 <= bits <= 8:
+        raise ValueError("bits must be between 1 and 8")
+    return _build_lut(bits, PALETTE_VERSION)
+
+
+def quantize_indices(pixels: np.ndarray, lut_bits: Optional[int] = None) -> np.ndarray:
+    """
+    Map an (..., 3) image to palette indices in one vectorized call.
+    Without lut_bits the result is exactly the nearest colour per pixel; integer images
+    are reduced to their distinct colours first, which makes dithered output nearly free.
+    With lut_bits the cached lookup table is used instead.
+    """
+    shape = pixels.shape[:-1]
+    if lut_bits is not None:
+        rgb = np.clip(np.rint(pixels), 0, 255).astype(np.uint8).reshape(-1, 3)
+        shift = 8 - lut_bits
+        lut = palette_lut(lut_bits)
+        return lut[rgb[:, 0] >> shift, rgb[:, 1] >> shift, rgb[:, 2] >> shift].reshape(shape)
+
+    flat = pixels.reshape(-1, 3)
+    if np.issubdtype(flat.dtype, np.integer):
+        packed = (flat[:, 0].astype(np.int64) << 16) | (flat[:, 1].astype(np.int64) << 8) | flat[:, 2].astype(np.int64)
+        unique, inverse = np.unique(packed, return_inverse=True)
+        colors = np.stack([(unique >> 16) & 0xFF, (unique >> 8) & 0xFF, unique & 0xFF], axis=1)
+        return _nearest_indices(colors)[inverse.reshape(-1)].reshape(shape)
+    return _nearest_indices(flat).reshape(shape)
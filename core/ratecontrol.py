@@ -0,0 +1,140 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+# A /command request slower than this means the server tick is stalling on our writes
+DEFAULT_TARGET_LATENCY = 0.5
+DEFAULT_MIN_BATCH = 50
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.25
+
+# Commands that leave the world in the same state however often they run, so a
+# request that failed (or timed out after the server ran it) can be replayed
+IDEMPOTENT_PREFIXES = (
+    'fill ', 'setblock ', 'data get ', 'data merge ', 'gamerule ', 'weather ', 'time set ', 'time query ', 'difficulty ',
+)
+# Queries that change nothing; they are neither paced nor counted as write traffic
+READ_PREFIXES = ('data get ', 'time query ')
+
+
+def is_idempotent(command: str) -> bool:
+    return command.lstrip('/').startswith(IDEMPOTENT_PREFIXES)
+
+
+def is_read(command: str) -> bool:
+    return command.lstrip('/').startswith(READ_PREFIXES)
+
+
+class RateController:
+    """
+    Adaptive pacing for write traffic (AIMD, as in TCP congestion control).
+    Every request reports its latency and whether it failed. Fast, healthy requests
+    grow the batch size additively and, after a run of them, allow one more request
+    in flight; slow or failed ones shrink the batch size multiplicatively and drop
+    concurrency, so bulk writes settle at the rate the server can absorb without
+    stalling its tick. Only requests that used at least half the current batch size
+    can grow it: a fast one-liner says nothing about how a full batch would fare.
+    An optional target_throughput (items per second) caps the send rate regardless.
+    Use one controller per endpoint, since a command and a block differ in cost.
+    """
+
+    def __init__(self, max_batch: int, max_concurrency: int, target_latency: float = DEFAULT_TARGET_LATENCY,
+                 target_throughput: Optional[float] = None, min_batch: int = DEFAULT_MIN_BATCH,
+                 max_retries: int = DEFAULT_MAX_RETRIES, retry_backoff: float = DEFAULT_RETRY_BACKOFF):
+        self.max_batch = max_batch
+        self.min_batch = min(min_batch, max_batch)
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.target_throughput = target_throughput
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.batch_commands = max_batch
+        self.concurrency = max_concurrency
+        self.latency_ewma: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.commands_sent = 0
+        self._healthy_streak = 0
+        self._in_flight = 0
+        self._next_send = 0.0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, commands: int) -> Iterator[None]:
+        """
+        Hold one of the `concurrency` request slots for a request of `commands` lines,
+        waiting for the throughput budget first.
+        """
+        with self._cond:
+            while self._in_flight >= self.concurrency:
+                self._cond.wait()
+            self._in_flight += 1
+            delay = 0.0
+            if self.target_throughput:
+                now = time.monotonic()
+                start = max(now, self._next_send)
+                self._next_send = start + commands / self.target_throughput
+                delay = start - now
+        try:
+            if delay > 0:
+                time.sleep(delay)
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+
+    def record(self, commands: int, seconds: float, ok: bool) -> None:
+        """Feed back one request's outcome and adjust batch size and concurrency."""
+        with self._cond:
+            self.requests += 1
+            self.commands_sent += commands
+            self.latency_ewma = seconds if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * seconds
+            if not ok:
+                self.errors += 1
+                self._decrease(0.5)
+                self.concurrency = max(1, self.concurrency // 2)
+            elif seconds > self.target_latency:
+                self._decrease(0.7)
+                if seconds > 2 * self.target_latency:
+                    self.concurrency = max(1, self.concurrency - 1)
+            elif seconds < self.target_latency / 2 and 2 * commands >= self.batch_commands:
+                self.batch_commands = min(self.max_batch, self.batch_commands + max(1, self.max_batch // 10))
+                self._healthy_streak += 1
+                if self._healthy_streak >= self.concurrency and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self._healthy_streak = 0
+                    self._cond.notify()
+
+    def _decrease(self, factor: float) -> None:
+        previous = self.batch_commands
+        self.batch_commands = max(self.min_batch, int(self.batch_commands * factor))
+        self._healthy_streak = 0
+        if self.batch_commands != previous:
+            logger.info(f"Server under load: batch size {previous} -> {self.batch_commands}, concurrency {self.concurrency}")
+
+    def note_retry(self) -> None:
+        with self._cond:
+            self.retries += 1
+
+    def retry_delay(self, attempt: int) -> float:
+        return self.retry_backoff * (2 ** attempt)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'batch_commands': self.batch_commands,
+                'concurrency': self.concurrency,
+                'target_latency_s': self.target_latency,
+                'target_throughput': self.target_throughput,
+                'latency_ewma_ms': round(self.latency_ewma * 1000, 3) if self.latency_ewma is not None else None,
+                'requests': self.requests,
+                'errors': self.errors,
+                'retries': self.retries,
+                'commands_sent': self.commands_sent,
+            }
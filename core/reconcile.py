@@ -0,0 +1,104 @@
+import logging
+import numpy as np
+from typing import Optional, Dict, Any, Tuple, List, Sequence, Callable
+from .meshing import greedy_rectangles, MAX_FILL_VOLUME
+from .voxels import namespaced, KEEP
+
+logger = logging.getLogger(__name__)
+
+# Largest box diffed against the world; the read comes back as ~60 bytes of JSON per block
+MAX_DIFF_VOLUME = 512 * 1024
+
+Box = Tuple[int, int, int, int, int, int, int]  # x0, y0, z0, x1, y1, z1 (grid, inclusive), palette index
+
+
+def world_diff_mask(mc: Any, origin: Tuple[int, int, int], indices: np.ndarray, palette: Sequence[Optional[str]],
+                    refresh: bool = True) -> np.ndarray:
+    """
+    Read the target box once in bulk and return a (dy, dz, dx) mask of the cells whose
+    world block differs from the desired one. refresh=True reads exactly the box, fresh
+    from the server, so changes made by players are seen; otherwise cached sections are
+    used. Cells with a KEEP palette entry never differ.
+    """
+    x, y, z = origin
+    dy, dz, dx = indices.shape
+    if indices.size > MAX_DIFF_VOLUME:
+        raise ValueError(f"Box of {indices.size} blocks is too large to diff against the world (max {MAX_DIFF_VOLUME})")
+    world = mc.read_box(x, y, z, dx, dy, dz) if refresh else mc.read_region(x, y, z, dx, dy, dz)
+    # Translate the desired palette into the world grid's palette; -1 never matches
+    lookup = {name: i for i, name in enumerate(world.palette)}
+    desired = np.array([lookup.get(namespaced(p), -1) if p not in KEEP else -1 for p in palette], dtype=np.int32)
+    keep = np.array([p in KEEP for p in palette], dtype=bool)
+    return (desired[indices] != world.indices) & ~keep[indices]
+
+
+def plan_fills(indices: np.ndarray, mask: np.ndarray, max_volume: int = MAX_FILL_VOLUME) -> List[Box]:
+    """
+    Cover the masked cells with fill boxes: greedy rectangles per horizontal layer,
+    stacked vertically while the same rectangle repeats and the volume limit allows.
+    """
+    dy = indices.shape[0]
+    boxes: List[Box] = []
+    open_boxes: Dict[Tuple[int, int, int, int, int], int] = {}
+    for y in range(dy):
+        next_open: Dict[Tuple[int, int, int, int, int], int] = {}
+        for x0, z0, x1, z1, value in greedy_rectangles(indices[y], mask[y], max_area=max_volume):
+            key = (x0, z0, x1, z1, value)
+            area = (x1 - x0 + 1) * (z1 - z0 + 1)
+            i = open_boxes.get(key)
+            if i is not None and (boxes[i][4] - boxes[i][1] + 2) * area <= max_volume:
+                bx0, by0, bz0, bx1, _, bz1, bv = boxes[i]
+                boxes[i] = (bx0, by0, bz0, bx1, y, bz1, bv)
+                next_open[key] = i
+            else:
+                next_open[key] = len(boxes)
+                boxes.append((x0, y, z0, x1, y, z1, value))
+        open_boxes = next_open
+    return boxes
+
+
+def reconcile(mc: Any, x: int, y: int, z: int, indices: np.ndarray, palette: Sequence[Optional[str]],
+              method: str = 'auto', block_updates: bool = True, refresh: bool = True,
+              should_stop: Optional[Callable[[], bool]] = None,
+              progress: Optional[Callable[[Optional[float], str], None]] = None) -> Dict[str, Any]:
+    """
+    Make the world match a (dy, dz, dx) palette-index grid with minimum corner x, y, z
+    using one bulk read and only the writes that are needed.
+    method: 'fill' (merged /fill boxes), 'blocks' (PUT /blocks of just the differing
+    cells) or 'auto' (fills when merging pays off, bulk writes otherwise).
+    /fill always triggers block updates, so block_updates=False forces 'blocks'.
+    should_stop is checked after the read; when it returns True nothing is written and
+    result['cancelled'] is set.
+    """
+    if method not in ('auto', 'fill', 'blocks'):
+        raise ValueError("method must be 'auto', 'fill' or 'blocks'")
+    if not block_updates:
+        method = 'blocks'
+    if progress is not None:
+        progress(0.0, "reading world")
+    mask = world_diff_mask(mc, (x, y, z), indices, palette, refresh=refresh)
+    differing = int(mask.sum())
+    result: Dict[str, Any] = {'blocks_checked': int(indices.size), 'blocks_differing': differing,
+                              'method': method, 'writes': 0, 'failed': 0, 'requests': 0}
+    if should_stop is not None and should_stop():
+        result['cancelled'] = True
+        return result
+    if differing == 0:
+        logger.info(f"Region at {x},{y},{z} already matches; nothing to write")
+        return result
+
+    boxes = plan_fills(indices, mask) if method != 'blocks' else []
+    # A fill is worth it when it replaces at least a couple of single-block writes
+    if method == 'fill' or (method == 'auto' and len(boxes) * 2 <= differing):
+        result['method'] = 'fill'
+        with mc.batch(concurrent=True) as batch:
+            for x0, y0, z0, x1, y1, z1, value in boxes:
+                batch.fill_region(x + x0, y + y0, z + z0, x + x1, y + y1, z + z1, palette[value])
+        result.update(writes=len(batch), failed=batch.failed, requests=batch.requests_sent)
+    else:
+        result['method'] = 'blocks'
+        placed = mc.put_blocks(x, y, z, indices, palette, block_updates=block_updates, mask=mask,
+                               should_stop=should_stop, progress=progress)
+        result.update(writes=placed['placed'] + placed['unchanged'], failed=placed['failed'], requests=placed['requests'])
+    logger.info(f"Reconciled {differing}/{indices.size} differing blocks with {result['writes']} {result['method']} writes")
+    return result
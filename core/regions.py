@@ -0,0 +1,53 @@
+from typing import List, Tuple
+
+# Minecraft rejects /fill commands covering more blocks than this
+MAX_FILL_VOLUME = 32768
+CHUNK_SIZE = 16
+
+Box = Tuple[int, int, int, int, int, int]  # x1, y1, z1, x2, y2, z2 (inclusive, x1 <= x2 ...)
+
+
+def _chunk_spans(lo: int, hi: int) -> List[Tuple[int, int]]:
+    """Split [lo, hi] into runs that never cross a chunk boundary."""
+    spans = []
+    start = lo
+    while start <= hi:
+        end = min(hi, (start // CHUNK_SIZE + 1) * CHUNK_SIZE - 1)
+        spans.append((start, end))
+        start = end + 1
+    return spans
+
+
+def split_box(x1: int, y1: int, z1: int, x2: int, y2: int, z2: int, max_volume: int = MAX_FILL_VOLUME) -> List[Box]:
+    """
+    Split a fill box into sub-boxes of at most max_volume blocks.
+    Sub-boxes are tiles of whole chunks (clipped to the box) stacked in y slabs, and are
+    returned chunk by chunk (x, then z, then y) so consecutive fills touch nearby chunks.
+    A box that already fits is returned unchanged.
+    """
+    x1, x2 = sorted((int(x1), int(x2)))
+    y1, y2 = sorted((int(y1), int(y2)))
+    z1, z2 = sorted((int(z1), int(z2)))
+    dx, dy, dz = x2 - x1 + 1, y2 - y1 + 1, z2 - z1 + 1
+    if dx * dy * dz <= max_volume:
+        return [(x1, y1, z1, x2, y2, z2)]
+
+    xs = _chunk_spans(x1, x2)
+    zs = _chunk_spans(z1, z2)
+    # Upper bound on the footprint of a single chunk cell within this box
+    footprint = min(CHUNK_SIZE, dx) * min(CHUNK_SIZE, dz)
+    slab = max(1, min(dy, max_volume // footprint))
+    if footprint * slab > max_volume:
+        raise ValueError(f"max_volume {max_volume} is smaller than one chunk cell layer ({footprint} blocks)")
+    cells = max(1, max_volume // (footprint * slab))
+    tile_x = min(len(xs), cells)
+    tile_z = min(len(zs), max(1, cells // tile_x))
+
+    boxes: List[Box] = []
+    for i in range(0, len(xs), tile_x):
+        bx1, bx2 = xs[i][0], xs[min(i + tile_x, len(xs)) - 1][1]
+        for j in range(0, len(zs), tile_z):
+            bz1, bz2 = zs[j][0], zs[min(j + tile_z, len(zs)) - 1][1]
+            for by1 in range(y1, y2 + 1, slab):
+                boxes.append((bx1, by1, bz1, bx2, min(y2, by1 + slab - 1), bz2))
+    return boxes
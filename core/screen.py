@@ -1,29 +1,43 @@
-import os
 import time
-import json
+import queue
+import threading
 import numpy as np
 import logging
-from typing import Optional, Dict, Any, Tuple
-from PIL import Image, ImageEnhance
-from .utils import apply_floyd_steinberg, rgb_to_concrete
+from typing import Optional, Dict, Any, Tuple, List, Callable
+from .utils import BLOCK_NAMES, PALETTE_VERSION
+from .dither import DITHER_MODES
+from .pipeline import prepare_image, dither_parallel
+from .gridcache import QuantizedGridCache, default_grid_cache
+from .meshing import count_row_runs, greedy_rectangles
+from .state import ScreenStateStore, default_store
+from .frames import FrameSource, iter_frames
+from .metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Frames decoded and quantized ahead of the one being sent
+STREAM_PREFETCH = 2
+
+# Palette index for world blocks that are not part of the screen palette
+UNKNOWN_INDEX = 255
+
 class MinecraftScreen:
-    def __init__(self, interface: Any, origin_x: int, origin_y: int, origin_z: int, width: int, height: int, facing: str = 'north'):
+    def __init__(self, interface: Any, origin_x: int, origin_y: int, origin_z: int, width: int, height: int, facing: str = 'north',
+                 store: Optional[ScreenStateStore] = None, grid_cache: Optional[QuantizedGridCache] = None):
         self.mc = interface
         self.origin = (origin_x, origin_y, origin_z)
         self.width = width
         self.height = height
         self.facing = facing  # 'north', 'south', 'east', 'west'
         
-        # Create state directory
-        self.state_dir = '.state'
-        os.makedirs(self.state_dir, exist_ok=True)
-        
-        # Unique state file name based on location and facing
-        Safe_name = f"screen_{origin_x}_{origin_y}_{origin_z}_{facing}.json"
-        self.state_file = os.path.join(self.state_dir, Safe_name)
+        # Unique state key based on location, facing and size
+        self.store = store if store is not None else default_store
+        self.state_key = f"screen_{origin_x}_{origin_y}_{origin_z}_{facing}_{width}x{height}"
+        self.state_header = {'width': width, 'height': height, 'facing': facing, 'palette_version': PALETTE_VERSION}
+        self.grid_cache = grid_cache if grid_cache is not None else default_grid_cache
+        self.last_render_stats: Dict[str, Any] = {}
+        # Milliseconds spent per render stage since the last reset
+        self.last_timings: Dict[str, float] = {}
         
     def get_coords(self, x: int, y: int) -> Tuple[int, int, int]:
         """Map image x, y to Minecraft coordinates based on facing."""
@@ -40,84 +54,247 @@ class MinecraftScreen:
             return ox, my, oz + x
         return ox + x, my, oz
 
-    def render_image(self, image_path: str, use_dithering: bool = True, smart_diff: bool = True) -> int:
-        if not os.path.exists(image_path):
-            logger.error(f"Image not found: {image_path}")
-            raise FileNotFoundError(f"Image not found: {image_path}")
+    def prepare_pixels(self, image: Any) -> np.ndarray:
+        """Decode, resize and contrast-enhance an image (path, PIL image or array) to screen size."""
+        with metrics.timer('render_stage', 'decode', self.last_timings):
+            return prepare_image(image, (self.width, self.height))
 
-        img = Image.open(image_path).convert('RGB')
-        img = img.resize((self.width, self.height), Image.Resampling.LANCZOS)
-        img = ImageEnhance.Contrast(img).enhance(1.2)
-        pixels = np.array(img)
-        
-        if use_dithering:
-            pixels = apply_floyd_steinberg(pixels)
-        
-        new_blocks = {}
-        for y in range(self.height):
-            for x in range(self.width):
-                rgb = tuple(pixels[y, x])
-                block_type = rgb_to_concrete(rgb)
-                # Minecraft Y is up
-                my_offset = self.height - 1 - y
-                mx, my, mz = self.get_coords(x, my_offset)
-                new_blocks[f"{mx},{my},{mz}"] = block_type
-        
-        blocks_to_update = new_blocks
-        if smart_diff and os.path.exists(self.state_file):
-            try:
-                with open(self.state_file, 'r') as f:
-                    old_state = json.load(f)
-                blocks_to_update = {k: v for k, v in new_blocks.items() if old_state.get(k) != v}
-            except Exception as e:
-                logger.warning(f"Could not load old state from {self.state_file}: {e}")
+    def quantize(self, image: Any, dither_mode: str = 'floyd_steinberg', use_cache: bool = True) -> np.ndarray:
+        """
+        Image -> screen-sized palette-index grid (Floyd-Steinberg bands run on the worker pool).
+        Grids are cached by image content, so a known image skips decode and dither;
+        use_cache=False skips hashing and storing (e.g. animation frames that are
+        rarely seen again and would evict cached stills).
+        """
+        if not use_cache:
+            pixels = self.prepare_pixels(image)
+            with metrics.timer('render_stage', 'dither', self.last_timings):
+                return dither_parallel(pixels, dither_mode)
+        with metrics.timer('render_stage', 'cache_lookup', self.last_timings):
+            key = self.grid_cache.key(image, (self.width, self.height), dither_mode)
+            cached = self.grid_cache.get(key) if key is not None else None
+        if cached is not None:
+            return cached
+        pixels = self.prepare_pixels(image)
+        with metrics.timer('render_stage', 'dither', self.last_timings):
+            indices = dither_parallel(pixels, dither_mode)
+        return self.grid_cache.put(key, indices) if key is not None else indices
+
+    def apply_indices(self, indices: np.ndarray, previous: Optional[np.ndarray] = None) -> Tuple[int, bool]:
+        """
+        Send the fills that turn `previous` (None = unknown) into `indices`.
+        Returns (fill commands sent, whether every command succeeded) and records
+        the counts in last_render_stats.
+        """
+        with metrics.timer('render_stage', 'diff', self.last_timings):
+            if previous is not None and previous.shape == indices.shape:
+                changed = previous != indices
+            else:
+                changed = np.ones(indices.shape, dtype=bool)
         
-        if not blocks_to_update:
+        with metrics.timer('render_stage', 'mesh', self.last_timings):
+            naive = count_row_runs(indices, changed)
+            rects = greedy_rectangles(indices, changed)
+        self.last_render_stats = {
+            'changed_blocks': int(changed.sum()),
+            'naive_commands': naive,
+            'meshed_commands': len(rects),
+            'requests': 0,
+        }
+        if not rects:
+            return 0, True
+
+        # Rectangles are disjoint, so chunks of the render can go out concurrently
+        with metrics.timer('render_stage', 'send', self.last_timings), self.mc.batch(concurrent=True) as batch:
+            for x0, y0, x1, y1, idx in rects:
+                # Image rows run top-down, Minecraft Y is up
+                ax1, ay1, az1 = self.get_coords(x0, self.height - 1 - y1)
+                ax2, ay2, az2 = self.get_coords(x1, self.height - 1 - y0)
+                batch.fill_region(ax1, ay1, az1, ax2, ay2, az2, BLOCK_NAMES[idx])
+        sent = len(batch)
+        self.last_render_stats['requests'] = batch.requests_sent
+        logger.info(f"Sent {sent} fill commands ({naive} without meshing) in {batch.requests_sent} requests ({batch.failed} failed)")
+        return sent, batch.failed == 0
+
+    def read_world_indices(self) -> np.ndarray:
+        """
+        Read the screen's blocks back from the world as a palette-index grid in image
+        orientation. Blocks that are not part of the palette map to UNKNOWN_INDEX.
+        """
+        x1, y1, z1 = self.get_coords(0, 0)
+        x2, y2, z2 = self.get_coords(self.width - 1, self.height - 1)
+        ox, oy, oz = min(x1, x2), min(y1, y2), min(z1, z2)
+        # Always read fresh, and only the screen itself: the point is to catch blocks changed behind our back
+        world = self.mc.read_box(ox, oy, oz, abs(x2 - x1) + 1, abs(y2 - y1) + 1, abs(z2 - z1) + 1)
+        lookup = {f"minecraft:{name}": i for i, name in enumerate(BLOCK_NAMES)}
+        to_screen = np.array([lookup.get(name, UNKNOWN_INDEX) for name in world.palette], dtype=np.uint8)
+        columns = np.array([self.get_coords(x, 0) for x in range(self.width)])
+        rows = self.origin[1] + self.height - 1 - np.arange(self.height)
+        cells = world.indices[(rows - oy)[:, None], (columns[:, 2] - oz)[None, :], (columns[:, 0] - ox)[None, :]]
+        return to_screen[cells]
+
+    def render_image(self, image_path: str, use_dithering: bool = True, smart_diff: bool = True, dither_mode: Optional[str] = None,
+                     world_diff: bool = False, should_stop: Optional[Callable[[], bool]] = None,
+                     progress: Optional[Callable[[Optional[float], str], None]] = None) -> int:
+        """
+        Render an image file onto the screen and return the number of fill commands sent.
+        dither_mode is one of 'floyd_steinberg', 'ordered' or 'none'; when omitted it
+        follows use_dithering. world_diff diffs against the blocks actually in the world
+        (one bulk read) instead of the saved screen state. should_stop is checked before
+        any block is written; when it returns True nothing is sent and
+        last_render_stats['cancelled'] is set.
+        """
+        if dither_mode is None:
+            dither_mode = 'floyd_steinberg' if use_dithering else 'none'
+        if dither_mode not in DITHER_MODES:
+            raise ValueError(f"Unknown dithering mode '{dither_mode}'. Choose from: {', '.join(DITHER_MODES)}")
+
+        self.last_timings = {}
+        if progress is not None:
+            progress(0.0, "quantizing image")
+        indices = self.quantize(image_path, dither_mode)
+        with metrics.timer('render_stage', 'state_load', self.last_timings):
+            if world_diff:
+                old_indices = self.read_world_indices()
+            else:
+                old_indices = self.store.load(self.state_key, self.state_header) if smart_diff else None
+        if should_stop is not None and should_stop():
+            self.last_render_stats = {'cancelled': True, 'timings_ms': self.last_timings}
+            return 0
+        if progress is not None:
+            progress(0.5, "sending fills")
+        sent, ok = self.apply_indices(indices, old_indices)
+        self.last_render_stats['timings_ms'] = self.last_timings
+        if sent == 0:
             logger.info("No changes detected, skipping render.")
             return 0
+        if not ok:
+            # Keep the old state so the next render retries the blocks that never landed
+            logger.warning(f"Some fill commands failed; not updating state {self.state_key}")
+            return sent
+        
+        with metrics.timer('render_stage', 'state_save', self.last_timings):
+            self.store.save(self.state_key, self.state_header, indices)
+        return sent
 
-        # Horizontal batching
-        sent = 0
-        for y_img in range(self.height):
-            x_img = 0
-            while x_img < self.width:
-                my_offset = self.height - 1 - y_img
-                mx, my, mz = self.get_coords(x_img, my_offset)
-                key = f"{mx},{my},{mz}"
-                
-                if key not in blocks_to_update:
-                    x_img += 1
-                    continue
-                    
-                block_type = blocks_to_update[key]
-                run_start_x = x_img
-                while x_img < self.width:
-                    nmx, nmy, nmz = self.get_coords(x_img, my_offset)
-                    if blocks_to_update.get(f"{nmx},{nmy},{nmz}") != block_type:
+    def render_stream(self, frames: FrameSource, fps: float = 10.0, dither_mode: str = 'ordered', smart_diff: bool = True,
+                      loops: int = 1, max_frames: Optional[int] = None, should_stop: Optional[Callable[[], bool]] = None,
+                      progress: Optional[Callable[[Optional[float], str], None]] = None) -> Dict[str, Any]:
+        """
+        Play a frame sequence (GIF, image folder, iterable or generator) on the screen.
+        Decoding and quantization run one frame ahead in a background thread while the
+        previous frame is being sent. Each frame is diffed in memory against what is
+        currently shown. Frame n is due at start + n / fps; a frame whose slot has already
+        passed is dropped (before it is even quantized when possible), so playback keeps
+        to the wall clock when sending falls behind.
+        """
+        if fps <= 0:
+            raise ValueError("fps must be positive")
+        if dither_mode not in DITHER_MODES:
+            raise ValueError(f"Unknown dithering mode '{dither_mode}'. Choose from: {', '.join(DITHER_MODES)}")
+
+        ready: 'queue.Queue[Any]' = queue.Queue(maxsize=STREAM_PREFETCH)
+        done = object()
+        stop = threading.Event()
+        interval = 1.0 / fps
+        skipped = [0]  # frames the producer dropped without quantizing
+        start = time.monotonic()
+
+        def late(n: int) -> bool:
+            return time.monotonic() > start + (n + 1) * interval
+
+        def produce() -> None:
+            try:
+                for n, frame in enumerate(iter_frames(frames, loops)):
+                    if stop.is_set() or (max_frames is not None and n >= max_frames):
                         break
-                    x_img += 1
-                
-                run_end_x = x_img - 1
-                ax1, ay1, az1 = self.get_coords(run_start_x, my_offset)
-                ax2, ay2, az2 = self.get_coords(run_end_x, my_offset)
-                self.mc.fill_region(ax1, ay1, az1, ax2, ay2, az2, block_type)
-                sent += 1
-        
+                    if late(n):
+                        skipped[0] += 1
+                        continue
+                    ready.put((n, self.quantize(frame, dither_mode, use_cache=False)))
+            except Exception as e:
+                logger.error(f"Frame decode error: {e}")
+                ready.put(e)
+            ready.put(done)
+
+        producer = threading.Thread(target=produce, name='screen-stream-decode', daemon=True)
+        producer.start()
+
+        self.last_timings = {}
+        shown = self.store.load(self.state_key, self.state_header) if smart_diff else None
+        blocks_per_frame: List[int] = []
+        commands_per_frame: List[int] = []
+        frame_starts: List[float] = []
+        dropped = 0
+        error: Optional[Exception] = None
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump(new_blocks, f)
-        except Exception as e:
-            logger.error(f"Could not save state to {self.state_file}: {e}")
-            
-        return sent
+            while True:
+                item = ready.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    error = item
+                    break
+                n, indices = item
+                # Queued while we were sending and its slot has passed: go straight to the next one
+                if late(n) and not ready.empty():
+                    dropped += 1
+                    continue
+                if should_stop is not None and should_stop():
+                    break
+
+                delay = start + n * interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+                frame_starts.append(time.monotonic())
+                sent, ok = self.apply_indices(indices, shown)
+                blocks_per_frame.append(self.last_render_stats['changed_blocks'])
+                commands_per_frame.append(sent)
+                if progress is not None:
+                    fraction = (n + 1) / max_frames if max_frames else None
+                    progress(fraction, f"{len(blocks_per_frame)} frames rendered, {dropped + skipped[0]} dropped")
+                # After a partial failure the screen contents are unknown; redraw fully next frame
+                shown = indices if ok else None
+        finally:
+            stop.set()
+            # Unblock the producer if it is waiting on a full queue
+            while producer.is_alive():
+                try:
+                    ready.get_nowait()
+                except queue.Empty:
+                    producer.join(timeout=0.05)
+        dropped += skipped[0]
 
-    def destroy(self) -> None:
+        elapsed = time.monotonic() - start
+        if shown is not None:
+            self.store.save(self.state_key, self.state_header, shown)
+        elif blocks_per_frame:
+            self.store.delete(self.state_key)
+        if error is not None:
+            raise error
+
+        rendered = len(blocks_per_frame)
+        if rendered > 1 and frame_starts[-1] > frame_starts[0]:
+            achieved = (rendered - 1) / (frame_starts[-1] - frame_starts[0])
+        else:
+            achieved = rendered / elapsed if elapsed > 0 else 0.0
+        return {
+            'frames_rendered': rendered,
+            'frames_dropped': dropped,
+            'elapsed_seconds': round(elapsed, 3),
+            'target_fps': fps,
+            'achieved_fps': round(achieved, 2),
+            'blocks_changed_per_frame': blocks_per_frame,
+            'commands_per_frame': commands_per_frame,
+            'stage_timings_ms': dict(self.last_timings),
+        }
+
+    def destroy(self) -> Dict[str, int]:
+        """Clear the screen to air and forget its state. Returns the fill tally."""
         x1, y1, z1 = self.get_coords(0, 0)
         x2, y2, z2 = self.get_coords(self.width - 1, self.height - 1)
-        self.mc.fill_region(x1, y1, z1, x2, y2, z2, 'air')
-        if os.path.exists(self.state_file):
-            try:
-                os.remove(self.state_file)
-            except Exception as e:
-                logger.error(f"Could not delete state file {self.state_file}: {e}")
+        tally = self.mc.fill_box(x1, y1, z1, x2, y2, z2, 'air')
+        self.store.delete(self.state_key)
+        return tally
 
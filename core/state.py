@@ -0,0 +1,91 @@
+import os
+import json
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_DIR = '.state'
+DEFAULT_CAPACITY = 32
+
+
+class ScreenStateStore:
+    """
+    Screen states as uint8 palette-index grids: `<key>.npy` plus a small `<key>.json`
+    header (size, facing, palette version). Recently used states stay in an
+    in-process LRU so repeated renders of a hot screen never touch the disk.
+    """
+
+    def __init__(self, state_dir: str = DEFAULT_STATE_DIR, capacity: int = DEFAULT_CAPACITY):
+        self.state_dir = state_dir
+        self.capacity = capacity
+        self._cache: 'OrderedDict[str, Tuple[Dict[str, Any], np.ndarray]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.state_dir, key)
+        return f"{base}.npy", f"{base}.json"
+
+    def _remember(self, key: str, header: Dict[str, Any], grid: np.ndarray) -> None:
+        self._cache[key] = (header, grid)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+
+    def load(self, key: str, header: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Return the saved grid for key, or None if missing or saved with a different header."""
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                saved_header, grid = cached
+                return grid if saved_header == header else None
+
+        grid_path, header_path = self.paths(key)
+        if not (os.path.exists(grid_path) and os.path.exists(header_path)):
+            return None
+        try:
+            with open(header_path, 'r') as f:
+                saved_header = json.load(f)
+            grid = np.load(grid_path)
+        except Exception as e:
+            logger.warning(f"Could not load screen state {key}: {e}")
+            return None
+        grid.setflags(write=False)
+        with self._lock:
+            self._remember(key, saved_header, grid)
+        return grid if saved_header == header else None
+
+    def save(self, key: str, header: Dict[str, Any], grid: np.ndarray) -> None:
+        grid = np.array(grid, dtype=np.uint8, copy=True)
+        grid.setflags(write=False)
+        with self._lock:
+            self._remember(key, dict(header), grid)
+        grid_path, header_path = self.paths(key)
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            # Write then rename so a crash never leaves a half-written state behind
+            with open(f"{grid_path}.tmp", 'wb') as f:
+                np.save(f, grid)
+            with open(f"{header_path}.tmp", 'w') as f:
+                json.dump(header, f)
+            os.replace(f"{grid_path}.tmp", grid_path)
+            os.replace(f"{header_path}.tmp", header_path)
+        except Exception as e:
+            logger.error(f"Could not save screen state {key}: {e}")
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
+        for path in self.paths(key):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except Exception as e:
+                    logger.error(f"Could not delete state file {path}: {e}")
+
+
+default_store = ScreenStateStore()
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.2
+DEFAULT_MAX_IN_FLIGHT = 4
+
+
+class HttpTransport:
+    """
+    Pooled keep-alive HTTP client for the GDMC server.
+    Every request goes through one timeout/retry policy, and independent
+    requests can be dispatched concurrently up to `max_in_flight` at a time.
+    """
+
+    def __init__(self, base_url: str, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.base_url = base_url.rstrip('/')
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.backoff = backoff
+        self._session: Optional['requests.Session'] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> 'requests.Session':
+        """The pooled session, created (and requests imported) on the first request."""
+        if self._session is not None:
+            return self._session
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                # Connection failures are retried for every method since nothing reached the
+                # server; read/status retries only apply to idempotent methods so a slow
+                # /command POST is never replayed behind the caller's back.
+                retry = Retry(
+                    total=self.retries,
+                    connect=self.retries,
+                    read=self.retries,
+                    status=self.retries,
+                    backoff_factor=self.backoff,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset({'GET', 'PUT', 'HEAD', 'OPTIONS'}),
+                    raise_on_status=False,
+                )
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight, max_retries=retry)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def request(self, method: str, path: str, **kwargs: Any) -> 'requests.Response':
+        kwargs.setdefault('timeout', self.timeout)
+        body = kwargs.get('data')
+        bytes_out = len(body) if isinstance(body, (bytes, str)) else 0
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
+        except Exception:
+            metrics.observe('http', f'{method} {path}', time.perf_counter() - start, error=True, bytes_out=bytes_out)
+            raise
+        metrics.observe('http', f'{method} {path}', time.perf_counter() - start, error=response.status_code >= 400,
+                        bytes_out=bytes_out, bytes_in=len(response.content))
+        return response
+
+    def get(self, path: str, **kwargs: Any) -> 'requests.Response':
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> 'requests.Response':
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path: str, **kwargs: Any) -> 'requests.Response':
+        return self.request('PUT', path, **kwargs)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='gdmc-http')
+            return self._executor
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Run fn in the in-flight window; at most `max_in_flight` run at once."""
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """Apply fn to every item concurrently, returning results in input order."""
+        items = list(items)
+        if self.max_in_flight == 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        return list(self.executor.map(fn, items))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+
+class AsyncHttpTransport:
+    """
+    asyncio front-end over an HttpTransport.
+    Shares the pooled session and policy; a semaphore enforces the in-flight window.
+    """
+
+    def __init__(self, transport: HttpTransport, max_in_flight: Optional[int] = None):
+        self.transport = transport
+        self.max_in_flight = max_in_flight or transport.max_in_flight
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> 'requests.Response':
+        async with self.semaphore:
+            return await asyncio.to_thread(self.transport.request, method, path, **kwargs)
+
+    async def get(self, path: str, **kwargs: Any) -> 'requests.Response':
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any) -> 'requests.Response':
+        return await self.request('POST', path, **kwargs)
+
+    async def put(self, path: str, **kwargs: Any) -> 'requests.Response':
+        return await self.request('PUT', path, **kwargs)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking call (e.g. a batch flush) inside the in-flight window."""
+        async with self.semaphore:
+            return await asyncio.to_thread(fn, *args)
+
+    async def gather(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        return list(await asyncio.gather(*(self.run(fn, item) for item in items)))
@@ -1,3 +1,4 @@
+import hashlib
 import numpy as np
 from PIL import Image
 
@@ -15,6 +16,10 @@ CONCRETE_PALETTE = {
 
 PALETTE_NAMES = list(CONCRETE_PALETTE.keys())
 PALETTE_ARRAY = np.array([CONCRETE_PALETTE[name] for name in PALETTE_NAMES], dtype=np.float32)
+# Terracotta entries are blocks in their own right; everything else is concrete
+BLOCK_NAMES = [name if name.endswith('terracotta') else f"{name}_concrete" for name in PALETTE_NAMES]
+# Changes whenever the palette does, so cached tables and saved states can be invalidated
+PALETTE_VERSION = hashlib.sha1(PALETTE_ARRAY.tobytes() + ",".join(PALETTE_NAMES).encode()).hexdigest()[:12]
 
 def find_closest_color_index(rgb):
     rgb = np.array(rgb, dtype=np.float32)
@@ -27,7 +32,7 @@ def find_closest_palette_color(rgb):
 
 def rgb_to_concrete(rgb):
     idx = find_closest_color_index(rgb)
-    return f"{PALETTE_NAMES[idx]}_concrete"
+    return BLOCK_NAMES[idx]
 
 def is_uniform_region(pixels, y, x, threshold=10):
     h, w = pixels.shape[:2]
@@ -41,21 +46,7 @@ def is_uniform_region(pixels, y, x, threshold=10):
     return True
 
 def apply_floyd_steinberg(pixels, skip_uniform=True):
-    h, w = pixels.shape[:2]
-    img = pixels.astype(np.float32)
-    original = pixels.copy()
-    for y in range(h):
-        for x in range(w):
-            if skip_uniform and is_uniform_region(original, y, x):
-                img[y, x] = find_closest_palette_color(img[y, x])
-                continue
-            old_pixel = img[y, x].copy()
-            new_pixel = find_closest_palette_color(old_pixel)
-            img[y, x] = new_pixel
-            error = old_pixel - new_pixel
-            if x + 1 < w: img[y, x + 1] += error * (7 / 16)
-            if y + 1 < h:
-                if x > 0: img[y + 1, x - 1] += error * (3 / 16)
-                img[y + 1, x] += error * (5 / 16)
-                if x + 1 < w: img[y + 1, x + 1] += error * (1 / 16)
-    return np.clip(img, 0, 255).astype(np.uint8)
+    # Imported here because the dithering engine itself builds on this module's palette
+    from .dither import floyd_steinberg_indices
+    indices = floyd_steinberg_indices(pixels, skip_uniform=skip_uniform)
+    return PALETTE_ARRAY[indices].astype(np.uint8)
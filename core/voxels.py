@@ -0,0 +1,98 @@
+import numpy as np
+from typing import Optional, Dict, Any, Tuple, List, Iterator, Sequence
+from .blockcache import SECTION_SIZE
+from .minecraft import DEFAULT_PUT_BATCH
+
+# Palette entries meaning "leave whatever is there"
+KEEP = (None, '')
+
+
+def namespaced(block: str) -> str:
+    return block if ':' in block else f"minecraft:{block}"
+
+
+def parse_rle(spec: str) -> List[str]:
+    """
+    Expand a run-length description like "stone*12,air*4,oak_planks" into block names.
+    Runs fill the box x-fastest, then z, then y (the [y][z][x] layer order).
+    """
+    names: List[str] = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        block, sep, count = item.rpartition('*')
+        if not sep:
+            block, count = item, '1'
+        try:
+            n = int(count)
+        except ValueError:
+            raise ValueError(f"Invalid run length in '{item}'")
+        if n < 0:
+            raise ValueError(f"Negative run length in '{item}'")
+        names.extend([block.strip()] * n)
+    return names
+
+
+def grid_from_names(names: Sequence[Optional[str]], size: Optional[Tuple[int, int, int]] = None) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """
+    Build a (dy, dz, dx) index grid and palette from block names.
+    `names` is a flat sequence in [y][z][x] order (with size = (dx, dy, dz)) or a nested
+    [y][z][x] list. Empty names or None leave the existing block untouched.
+    """
+    if size is None:
+        nested = np.array(names, dtype=object)
+        if nested.ndim != 3:
+            raise ValueError("Block layers must be nested as [y][z][x]")
+        shape = nested.shape
+        flat = list(nested.ravel())
+    else:
+        dx, dy, dz = size
+        shape = (dy, dz, dx)
+        flat = list(names)
+        if len(flat) != dx * dy * dz:
+            raise ValueError(f"Expected {dx * dy * dz} blocks for a {dx}x{dy}x{dz} box, got {len(flat)}")
+    palette: Dict[Optional[str], int] = {}
+    indices = np.fromiter((palette.setdefault(n if n else None, len(palette)) for n in flat), dtype=np.int64, count=len(flat))
+    dtype = np.uint8 if len(palette) <= 256 else np.uint16
+    return indices.astype(dtype).reshape(shape), list(palette)
+
+
+def iter_block_batches(origin: Tuple[int, int, int], indices: np.ndarray, palette: Sequence[Optional[str]],
+                       batch_size: int = DEFAULT_PUT_BATCH, mask: Optional[np.ndarray] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield PUT /blocks payloads of at most batch_size blocks, walking the grid one chunk
+    section at a time (x, then z, then y) so each request stays within a few chunks.
+    `mask` optionally restricts which cells are written.
+    """
+    ox, oy, oz = origin
+    dy, dz, dx = indices.shape
+    names = [namespaced(p) if p not in KEEP else None for p in palette]
+    keep = np.array([n is None for n in names], dtype=bool)
+    # Section boundaries in grid coordinates, aligned to world chunk sections
+    def bounds(origin_axis: int, length: int) -> List[Tuple[int, int]]:
+        edges = [0]
+        first = (-origin_axis) % SECTION_SIZE or SECTION_SIZE
+        edge = first
+        while edge < length:
+            edges.append(edge)
+            edge += SECTION_SIZE
+        edges.append(length)
+        return list(zip(edges[:-1], edges[1:]))
+
+    batch: List[Dict[str, Any]] = []
+    for x0, x1 in bounds(ox, dx):
+        for z0, z1 in bounds(oz, dz):
+            for y0, y1 in bounds(oy, dy):
+                part = indices[y0:y1, z0:z1, x0:x1]
+                write = ~keep[part]
+                if mask is not None:
+                    write &= mask[y0:y1, z0:z1, x0:x1]
+                for ly, lz, lx in np.argwhere(write):
+                    batch.append({'x': ox + x0 + int(lx), 'y': oy + y0 + int(ly), 'z': oz + z0 + int(lz),
+                                  'id': names[part[ly, lz, lx]]})
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+    if batch:
+        yield batch
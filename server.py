@@ -1,10 +1,16 @@
 from mcp.server.fastmcp import FastMCP
 from core.minecraft import MinecraftInterface
-from core.screen import MinecraftScreen
+from core.metrics import metrics
+from core.jobs import Job, JobQueue
+from core.entities import spawn_entities as bulk_spawn
+from typing import List, Optional
 import os
 import math
 import logging
 
+# NumPy, Pillow and the screen/voxel modules are imported inside the tools that use
+# them, so the MCP handshake isn't held up by machinery most sessions never touch.
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -15,15 +21,68 @@ logger = logging.getLogger("minecraft-overwatch")
 # Initialize FastMCP server
 mcp = FastMCP("Minecraft Overwatch")
 
-# Initialize Minecraft interface
+# Minecraft interface settings
 GDMC_URL = os.environ.get("GDMC_URL", "http://localhost:9000")
-mc = MinecraftInterface(GDMC_URL)
+GDMC_MAX_IN_FLIGHT = int(os.environ.get("GDMC_MAX_IN_FLIGHT", "4"))
+# Write pacing: requests slower than the target latency (seconds) shrink batches and concurrency;
+# an optional throughput target caps commands/blocks sent per second
+GDMC_TARGET_LATENCY = float(os.environ.get("GDMC_TARGET_LATENCY", "0.5"))
+GDMC_TARGET_THROUGHPUT = float(os.environ.get("GDMC_TARGET_THROUGHPUT", "0")) or None
+# Cached block reads expire after this many seconds so edits by players show up (0 = keep until we write)
+GDMC_BLOCK_CACHE_TTL = float(os.environ.get("GDMC_BLOCK_CACHE_TTL", "5"))
+
+# Optional background player tracking, e.g. GDMC_PLAYER_POLL_INTERVAL=0.5
+GDMC_PLAYER_POLL_INTERVAL = float(os.environ.get("GDMC_PLAYER_POLL_INTERVAL", "0"))
+
+# Long operations run as background jobs; renders of different screens run in parallel
+GDMC_JOB_WORKERS = int(os.environ.get("GDMC_JOB_WORKERS", "2"))
+
+def announce_job(job: Job):
+    """Mirror job progress in the in-game chat."""
+    colors = {'running': 'gold', 'done': 'green', 'failed': 'red'}
+    if job.status == 'failed':
+        text = f"failed: {job.error}"
+    elif job.status == 'running':
+        percent = f" ({int(job.progress * 100)}%)" if job.progress is not None else ""
+        text = (job.message or "started") + percent
+    else:
+        text = job.message if job.status == 'done' and job.message else job.status
+    mc.tellraw(f"[Job {job.id}] {job.description}: {text}", colors.get(job.status, "gray"))
+
+# Created by init(). Image worker processes re-import the launching module, so importing
+# it must not build clients, start the player tracker or spin up job threads.
+mc: Optional[MinecraftInterface] = None
+jobs: Optional[JobQueue] = None
+
+def init():
+    """Create the GDMC interface and job queue (and the player tracker, if configured)."""
+    global mc, jobs
+    mc = MinecraftInterface(GDMC_URL, max_in_flight=GDMC_MAX_IN_FLIGHT, target_latency=GDMC_TARGET_LATENCY,
+                            target_throughput=GDMC_TARGET_THROUGHPUT, block_ttl=GDMC_BLOCK_CACHE_TTL or None)
+    if GDMC_PLAYER_POLL_INTERVAL > 0:
+        mc.track_players(["@p"], interval=GDMC_PLAYER_POLL_INTERVAL)
+    jobs = JobQueue(max_workers=GDMC_JOB_WORKERS, notify=announce_job)
+
+def job_hooks(job: Optional[Job]):
+    """Cancellation and progress callbacks for code running inside a job (none when run inline)."""
+    if job is None:
+        return {}
+    return {'should_stop': lambda: job.cancelled, 'progress': job.report}
+
+def tool():
+    """Register an MCP tool and record its latency under the 'tool' metrics category."""
+    def decorator(fn):
+        return mcp.tool()(metrics.instrument('tool')(fn))
+    return decorator
 
-@mcp.tool()
-def get_player_context():
-    """Get the current player's position, rotation, and cardinal facing."""
-    logger.info("Fetching player context...")
-    info = mc.get_player_info()
+@tool()
+def get_player_context(player: str = "@p"):
+    """
+    Get a player's position, rotation, and cardinal facing.
+    player: a player name or selector (defaults to the nearest player, @p).
+    """
+    logger.info(f"Fetching player context for {player}...")
+    info = mc.get_player_info(player)
     if not info:
         return "Could not connect to Minecraft. Ensure GDMC HTTP is running at " + GDMC_URL
     
@@ -38,81 +97,250 @@ def get_player_context():
     logger.info(f"Player context: {info['position']} facing {facing}")
     return info
 
-@mcp.tool()
+@tool()
 def place_block(x: int, y: int, z: int, block_type: str):
     """Place a single block at the specified coordinates."""
     logger.info(f"Placing {block_type} at {x}, {y}, {z}")
     success = mc.set_block(x, y, z, block_type)
     return f"Placed {block_type} at {x}, {y}, {z}" if success else f"Failed to place {block_type}."
 
-@mcp.tool()
-def fill_area(x1: int, y1: int, z1: int, x2: int, y2: int, z2: int, block_type: str):
-    """Fill a rectangular area with a specific block type."""
+@tool()
+def fill_area(x1: int, y1: int, z1: int, x2: int, y2: int, z2: int, block_type: str, diff_against_world: bool = False,
+              background: bool = False):
+    """
+    Fill a rectangular area with a specific block type.
+    Set diff_against_world to read the area first and only write blocks that differ.
+    Set background to run a large fill as a job: returns a job id immediately
+    (see get_job_status / cancel_job).
+    """
     logger.info(f"Filling area from {x1},{y1},{z1} to {x2},{y2},{z2} with {block_type}")
-    success = mc.fill_region(x1, y1, z1, x2, y2, z2, block_type)
-    return f"Filled area with {block_type}" if success else "Failed to fill area."
 
-@mcp.tool()
-def render_image_to_screen(image_path: str, x: int, y: int, z: int, facing: str, size: str = "medium"):
+    def fill(job: Optional[Job] = None):
+        if diff_against_world:
+            import numpy as np
+            from core.reconcile import reconcile, MAX_DIFF_VOLUME
+            shape = (abs(y2 - y1) + 1, abs(z2 - z1) + 1, abs(x2 - x1) + 1)
+            if math.prod(shape) <= MAX_DIFF_VOLUME:
+                lo = (min(x1, x2), min(y1, y2), min(z1, z2))
+                result = reconcile(mc, *lo, np.zeros(shape, dtype=np.uint8), [block_type], **job_hooks(job))
+                if result.get('cancelled'):
+                    return "Fill cancelled before any block was written."
+                return (f"Filled area with {block_type}: {result['blocks_differing']}/{result['blocks_checked']} blocks differed, "
+                        f"{result['writes']} {result['method']} writes ({result['failed']} failed).")
+            logger.info(f"Area of {math.prod(shape)} blocks is too large to diff against the world; filling it directly")
+        tally = mc.fill_box(x1, y1, z1, x2, y2, z2, block_type, **job_hooks(job))
+        if tally['skipped']:
+            return f"Fill cancelled after {tally['regions'] - tally['skipped']}/{tally['regions']} regions ({tally['failed']} failed)."
+        if tally['failed'] == 0:
+            return f"Filled area with {block_type} ({tally['regions']} regions)."
+        return f"Filled {tally['succeeded']}/{tally['regions']} regions with {block_type}; {tally['failed']} failed."
+
+    if background:
+        return jobs.submit('fill_area', fill, description=f"fill {block_type}").to_dict()
+    return fill()
+
+@tool()
+def place_voxels(x: int, y: int, z: int, dx: int = 0, dy: int = 0, dz: int = 0, blocks: str = "",
+                 layers: Optional[List[List[List[str]]]] = None, block_updates: bool = True, diff_against_world: bool = False,
+                 background: bool = False):
+    """
+    Build an arbitrary structure in bulk with its minimum corner at x, y, z.
+    Describe it either as:
+    - blocks: run-length text for a dx*dy*dz box, e.g. "stone*12,air*4,oak_planks*8",
+      filled x-fastest, then z, then y (bottom layer first)
+    - layers: nested list [y][z][x] of block names
+    Use "" for a cell to leave the existing block untouched.
+    Set block_updates to false to suppress physics (sand, water, redstone) while building.
+    Set diff_against_world to read the area first and only write blocks that differ.
+    Set background to run a large build as a job: returns a job id immediately.
+    """
+    from core.voxels import parse_rle, grid_from_names
+    from core.reconcile import reconcile, MAX_DIFF_VOLUME
+    try:
+        if layers:
+            indices, palette = grid_from_names(layers)
+        else:
+            indices, palette = grid_from_names(parse_rle(blocks), (dx, dy, dz))
+    except ValueError as e:
+        return f"Invalid voxel description: {e}"
+    size_y, size_z, size_x = indices.shape
+    logger.info(f"Placing {indices.size} voxels at {x},{y},{z} size {size_x}x{size_y}x{size_z}")
+
+    def build(job: Optional[Job] = None):
+        if diff_against_world:
+            if indices.size > MAX_DIFF_VOLUME:
+                return f"Structure of {indices.size} blocks is too large to diff against the world (max {MAX_DIFF_VOLUME})."
+            result = reconcile(mc, x, y, z, indices, palette, block_updates=block_updates, **job_hooks(job))
+            if result.get('cancelled'):
+                return "Build cancelled before any block was written."
+            return (f"{result['blocks_differing']}/{result['blocks_checked']} blocks differed; "
+                    f"{result['writes']} {result['method']} writes ({result['failed']} failed) in {result['requests']} requests.")
+        result = mc.put_blocks(x, y, z, indices, palette, block_updates=block_updates, **job_hooks(job))
+        return (f"Placed {result['placed']} blocks ({result['unchanged']} already in place, "
+                f"{result['failed']} failed) in {result['requests']} requests.")
+
+    if background:
+        return jobs.submit('place_voxels', build, description=f"build {size_x}x{size_y}x{size_z}").to_dict()
+    return build()
+
+@tool()
+def render_image_to_screen(image_path: str, x: int, y: int, z: int, facing: str, size: str = "medium", dithering: str = "floyd_steinberg",
+                           verify_world: bool = False, background: bool = True):
     """
     Render an image file to a Minecraft screen.
     Provide the anchor (bottom-left) coordinates and cardinal facing (north/south/east/west).
     Sizes: small (128x72), medium (192x108), large (256x144)
+    Dithering: 'floyd_steinberg' (best quality), 'ordered' (fastest), 'none'
+    Set verify_world to diff against the blocks actually in the world (repairs damaged screens).
+    By default the render runs as a background job and a job id is returned immediately;
+    a newer render to the same screen replaces one still pending. Set background to false
+    to wait for the render to finish.
     """
     sizes = {'small': (128, 72), 'medium': (192, 108), 'large': (256, 144)}
     w, h = sizes.get(size, (192, 108))
     
     logger.info(f"Rendering image {image_path} at ({x}, {y}, {z}) size {size}")
+    from core.screen import MinecraftScreen
     screen = MinecraftScreen(mc, x, y, z, w, h, facing=facing)
+
+    def render(job: Optional[Job] = None):
+        commands_sent = screen.render_image(image_path, dither_mode=dithering, world_diff=verify_world, **job_hooks(job))
+        stats = screen.last_render_stats
+        if stats.get('cancelled'):
+            return "Render cancelled before any blocks were written."
+        if commands_sent == 0:
+            return "Render skipped: No changes detected since last render at this location."
+        if job is not None:
+            job.report(1.0, f"Render complete! ({commands_sent} fills in {stats['requests']} requests)")
+        return (f"Successfully rendered {image_path}. Sent {commands_sent} fill commands "
+                f"({stats['naive_commands']} without rectangle merging) for {stats['changed_blocks']} changed blocks.")
+
+    if background:
+        return jobs.submit('render_image', render, key=screen.state_key,
+                           description=f"render {os.path.basename(image_path)}").to_dict()
+
     mc.tellraw(f"Rendering image: {os.path.basename(image_path)} at size {size}...", "gold")
-    
     try:
-        commands_sent = screen.render_image(image_path)
-        if commands_sent > 0:
-            mc.tellraw(f"Render complete! ({commands_sent} batches)", "green")
-            return f"Successfully rendered {image_path}. Sent {commands_sent} fill commands."
-        else:
-            return "Render skipped: No changes detected since last render at this location."
+        result = render()
+        stats = screen.last_render_stats
+        if stats.get('requests'):
+            mc.tellraw(f"Render complete! ({stats['meshed_commands']} fills in {stats['requests']} requests)", "green")
+        return result
     except Exception as e:
         logger.error(f"Render error: {e}")
         return f"Error rendering image: {str(e)}"
 
-@mcp.tool()
+@tool()
+def render_animation_to_screen(source: str, x: int, y: int, z: int, facing: str, size: str = "medium", fps: float = 5.0,
+                               dithering: str = "ordered", loops: int = 1, max_frames: int = 0, background: bool = True):
+    """
+    Play an animation on a Minecraft screen.
+    - source: an animated GIF/APNG/WebP file or a folder of images (played in name order)
+    - fps: target frame rate; frames are dropped when the server can't keep up
+    - dithering: 'ordered' (fastest), 'floyd_steinberg', 'none'
+    - loops: how many times to play the sequence
+    - max_frames: stop after this many frames (0 = no limit)
+    - background: run as a cancellable job and return its id immediately (default);
+      a newer render to the same screen stops the animation
+    """
+    sizes = {'small': (128, 72), 'medium': (192, 108), 'large': (256, 144)}
+    w, h = sizes.get(size, (192, 108))
+    
+    logger.info(f"Streaming {source} at ({x}, {y}, {z}) size {size} @ {fps} fps")
+    from core.screen import MinecraftScreen
+    screen = MinecraftScreen(mc, x, y, z, w, h, facing=facing)
+    name = os.path.basename(source.rstrip('/'))
+
+    def play(job: Optional[Job] = None):
+        stats = screen.render_stream(source, fps=fps, dither_mode=dithering, loops=max(1, loops),
+                                     max_frames=max_frames if max_frames > 0 else None, **job_hooks(job))
+        if job is not None:
+            job.report(1.0, f"Animation complete! ({stats['frames_rendered']} frames at {stats['achieved_fps']} fps)")
+        return stats
+
+    if background:
+        return jobs.submit('render_animation', play, key=screen.state_key, description=f"play {name}").to_dict()
+
+    mc.tellraw(f"Playing animation: {name} at size {size}...", "gold")
+    try:
+        stats = play()
+        mc.tellraw(f"Animation complete! ({stats['frames_rendered']} frames at {stats['achieved_fps']} fps)", "green")
+        return stats
+    except Exception as e:
+        logger.error(f"Animation error: {e}")
+        return f"Error playing animation: {str(e)}"
+
+@tool()
+def get_job_status(job_id: str = "", active_only: bool = False):
+    """
+    Status of background jobs (renders, animations, background fills and builds).
+    job_id: a job to inspect; empty lists recent jobs.
+    Statuses: queued, running, done, failed, cancelled, superseded (replaced by a newer render of the same screen).
+    """
+    if job_id:
+        job = jobs.get(job_id)
+        return job.to_dict() if job else f"No job with id {job_id}."
+    return [job.to_dict() for job in jobs.jobs(active_only=active_only)]
+
+@tool()
+def cancel_job(job_id: str):
+    """Cancel a queued job or stop a running one at its next checkpoint."""
+    if jobs.cancel(job_id):
+        return f"Cancellation requested for job {job_id}."
+    return f"Job {job_id} is not running or does not exist."
+
+@tool()
 def clear_screen(x: int, y: int, z: int, facing: str, size: str = "medium"):
     """Destroy/Clear a screen at the given location and size."""
     sizes = {'small': (128, 72), 'medium': (192, 108), 'large': (256, 144)}
     w, h = sizes.get(size, (192, 108))
     
     logger.info(f"Clearing screen at ({x}, {y}, {z}) size {size}")
+    from core.screen import MinecraftScreen
     screen = MinecraftScreen(mc, x, y, z, w, h, facing=facing)
-    screen.destroy()
-    return f"Cleared {size} screen at {x}, {y}, {z}"
+    tally = screen.destroy()
+    if tally['failed']:
+        return f"Cleared {tally['succeeded']}/{tally['regions']} regions of the {size} screen at {x}, {y}, {z}; {tally['failed']} failed."
+    return f"Cleared {size} screen at {x}, {y}, {z} ({tally['regions']} regions)"
 
-@mcp.tool()
+@tool()
 def get_build_area():
     """Get the currently defined build area in Minecraft."""
     logger.info("Fetching build area...")
     area = mc.get_build_area()
     return area if area else "No build area defined. Use /setbuildarea in-game."
 
-@mcp.tool()
-def get_blocks_in_region(x: int, y: int, z: int, dx: int, dy: int, dz: int):
+@tool()
+def get_blocks_in_region(x: int, y: int, z: int, dx: int, dy: int, dz: int, include_blocks: bool = False):
     """
     Get block types in a rectangular region.
-    Returns a string representation of the blocks.
+    Returns block counts and the bounding box of each block type.
+    Set include_blocks to also get a palette and a [y][z][x] grid of palette indices
+    (regions up to 4096 blocks). Repeated reads of the same area are served from cache.
     """
     logger.info(f"Inspecting blocks at {x},{y},{z} size {dx}x{dy}x{dz}")
-    blocks = mc.get_blocks(x, y, z, dx, dy, dz)
-    return blocks if blocks else "Failed to retrieve block data."
+    try:
+        grid = mc.read_region(x, y, z, dx, dy, dz)
+    except Exception as e:
+        logger.error(f"Block read error: {e}")
+        return "Failed to retrieve block data."
+    result = grid.summary()
+    if include_blocks:
+        if grid.indices.size > 4096:
+            result['blocks'] = "Region too large for a full listing; narrow it to 4096 blocks or fewer."
+        else:
+            result['palette'] = grid.palette
+            result['blocks'] = grid.indices.tolist()
+    return result
 
-@mcp.tool()
+@tool()
 def get_world_state():
     """Get information about the Minecraft world (time, weather, etc.)."""
     logger.info("Fetching world state...")
     state = mc.get_world_info()
     return state
 
-@mcp.tool()
+@tool()
 def run_minecraft_command(command: str):
     """
     Execute any raw Minecraft command. 
@@ -121,22 +349,30 @@ def run_minecraft_command(command: str):
     logger.info(f"Running raw command: {command}")
     return mc.execute_command(command)
 
-@mcp.tool()
-def spawn_entities(entity_type: str, x: int, y: int, z: int, count: int = 1, nbt: str = ""):
+@tool()
+def spawn_entities(entity_type: str, x: int, y: int, z: int, count: int = 1, nbt: str = "", pattern: str = "point",
+                   radius: float = 0.0, spacing: float = 2.0):
     """
-    Spawn one or more entities at a location.
-    Example: spawn_entities("zombie", 100, 64, 100, count=5)
+    Spawn one or more entities around a location in a few batched requests.
+    Example: spawn_entities("zombie", 100, 64, 100, count=50, pattern="ring", radius=12)
+    - pattern: 'point' (all at x,y,z), 'grid' (spacing blocks apart), 'ring' (circle of radius),
+      'random' (scattered within radius); with radius 0, ring and random size themselves from spacing
+    - nbt: NBT applied to every entity; may use $i/$n (index from 0/1), $x/$y/$z, e.g.
+      {CustomName:'"Guard $n"',NoAI:1b}
     """
-    logger.info(f"Spawning {count} {entity_type} at {x}, {y}, {z}")
-    results = []
-    for _ in range(count):
-        success = mc.spawn_entity(entity_type, x, y, z, nbt)
-        results.append(success)
-    
-    success_count = sum(results)
-    return f"Successfully spawned {success_count}/{count} {entity_type}."
+    logger.info(f"Spawning {count} {entity_type} at {x}, {y}, {z} ({pattern})")
+    try:
+        result = bulk_spawn(mc, entity_type, (x, y, z), count, pattern=pattern, radius=radius, spacing=spacing, nbt=nbt)
+    except ValueError as e:
+        return str(e)
+    summary = f"Successfully spawned {result['spawned']}/{count} {entity_type} in {result['requests']} requests."
+    failed_batches = [b for b in result['batches'] if b['succeeded'] < b['commands']]
+    if failed_batches:
+        details = "; ".join(f"{b['succeeded']}/{b['commands']} ({b['first_error']})" for b in failed_batches)
+        summary += f" Batches with failures: {details}"
+    return summary
 
-@mcp.tool()
+@tool()
 def control_world(feature: str, value: str):
     """
     Control world-wide features.
@@ -146,7 +382,7 @@ def control_world(feature: str, value: str):
     success = mc.set_world_property(feature, value)
     return f"World {feature} set to {value}." if success else f"Failed to set {feature}."
 
-@mcp.tool()
+@tool()
 def place_command_block(x: int, y: int, z: int, command: str, mode: str = "impulse", facing: str = "north", always_active: bool = False):
     """
     Place a command block with a script.
@@ -160,6 +396,70 @@ def place_command_block(x: int, y: int, z: int, command: str, mode: str = "impul
     success = mc.set_command_block(x, y, z, command, mode, facing, auto=always_active)
     return f"Placed {mode} command block at {x}, {y}, {z}" if success else "Failed to place command block."
 
-if __name__ == "__main__":
+@tool()
+def deploy_command_chain(script: str, x: int, y: int, z: int, facing: str = "east", head: str = "impulse",
+                         always_active: bool = False, redeploy_all: bool = False):
+    """
+    Deploy a multi-line script as a command block chain in one request.
+    - script: one command per line; '#' lines are comments, prefix a line after the first with '?' to make it conditional
+    - x, y, z: position of the head block; the chain runs towards facing
+    - facing: 'north', 'south', 'east', 'west', 'up', 'down'
+    - head: 'impulse' (runs once per redstone pulse) or 'repeating' (runs every tick)
+    - always_active: head runs without redstone
+    Redeploying to the same spot only rewrites blocks whose command changed; set redeploy_all to rewrite every block.
+    """
+    from core.commandblocks import deploy_chain
+    logger.info(f"Deploying command chain at {x},{y},{z} facing {facing}")
+    try:
+        result = deploy_chain(mc, script, x, y, z, facing=facing, head=head, always_active=always_active, force=redeploy_all)
+    except ValueError as e:
+        return str(e)
+    summary = (f"Deployed {result['blocks']}-block chain at {x}, {y}, {z}: {result['written']} written, "
+               f"{result['unchanged']} unchanged, {result['cleared']} old blocks cleared")
+    if result['failed']:
+        summary += f", {result['failed']} failed"
+    return summary + f" ({result['requests']} requests)."
+
+def rate_snapshot():
+    """Write pacing state per endpoint."""
+    return {"command": mc.rate.snapshot(), "blocks": mc.block_rate.snapshot()}
+
+@tool()
+def get_performance_stats(category: str = "", reset: bool = False):
+    """
+    Latency histograms (count, errors, p50/p95/p99) recorded since startup or the last reset,
+    plus the current write pacing (batch size, concurrency, retries) under 'rate_control'.
+    category: 'tool', 'http', 'render_stage' or 'rate_control' to narrow the report; empty for all.
+    reset: clear the recorded statistics after reading them.
+    """
+    stats = dict(metrics.snapshot(category or None))
+    if category in ("", "rate_control"):
+        stats["rate_control"] = rate_snapshot()
+    if reset:
+        metrics.reset()
+    return stats
+
+@tool()
+def set_write_rate(target_throughput: float = 0, target_latency: float = 0):
+    """
+    Tune how hard bulk writes push the server.
+    target_throughput: maximum commands (or blocks, for bulk placement) per second; 0 removes the cap.
+    target_latency: request latency in seconds above which batches and concurrency shrink; 0 keeps the current value.
+    """
+    for rate in (mc.rate, mc.block_rate):
+        rate.target_throughput = target_throughput if target_throughput > 0 else None
+        if target_latency > 0:
+            rate.target_latency = target_latency
+    return rate_snapshot()
+
+@mcp.resource("stats://performance", mime_type="application/json")
+def performance_stats_resource():
+    """Latency histograms for tools, GDMC endpoints and render stages, and the write pacing state."""
+    return {**metrics.snapshot(), "rate_control": rate_snapshot()}
+
+def main():
+    init()
     mcp.run()
 
+if __name__ == "__main__":
+    main()
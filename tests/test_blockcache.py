@@ -0,0 +1,92 @@
+import time
+import unittest
+from core.blockcache import normalize_box
+from tests.test_minecraft import RecordingInterface
+
+
+class FakeWorld(RecordingInterface):
+    """Stone below y=64, glass at one spot, air above; counts /blocks reads."""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = []
+
+    def get_block_list(self, x, y, z, dx, dy, dz):
+        self.reads.append((x, y, z, dx, dy, dz))
+        blocks = []
+        for by in range(y, y + dy):
+            for bz in range(z, z + dz):
+                for bx in range(x, x + dx):
+                    block = 'minecraft:stone' if by < 64 else 'minecraft:air'
+                    if (bx, by, bz) == (5, 70, 5):
+                        block = 'minecraft:glass'
+                    blocks.append({'x': bx, 'y': by, 'z': bz, 'id': block})
+        return blocks
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_region_grid_and_summary(self):
+        mc = FakeWorld()
+        grid = mc.read_region(0, 60, 0, 10, 12, 10)
+        self.assertEqual(grid.size, (10, 12, 10))
+        self.assertEqual(grid.block_at(5, 70, 5), 'minecraft:glass')
+        self.assertEqual(grid.block_at(0, 63, 9), 'minecraft:stone')
+        counts = grid.counts()
+        self.assertEqual(counts['minecraft:stone'], 400)
+        self.assertEqual(counts['minecraft:glass'], 1)
+        self.assertEqual(grid.bounding_boxes()['minecraft:stone'], (0, 60, 0, 9, 63, 9))
+
+    def test_overlapping_reads_are_served_from_cache(self):
+        mc = FakeWorld()
+        mc.read_region(0, 60, 0, 10, 12, 10)
+        reads = len(mc.reads)
+        mc.read_region(2, 62, 2, 5, 5, 5)
+        self.assertEqual(len(mc.reads), reads)
+        self.assertGreater(mc.block_cache.hits, 0)
+
+    def test_writes_invalidate_sections(self):
+        mc = FakeWorld()
+        mc.read_region(0, 60, 0, 10, 12, 10)
+        with mc.batch() as batch:
+            batch.set_block(1, 61, 1, 'dirt')
+        reads = len(mc.reads)
+        mc.read_region(0, 60, 0, 10, 12, 10)
+        self.assertEqual(len(mc.reads), reads + 1)
+
+    def test_ttl_refetches_external_changes(self):
+        mc = FakeWorld()
+        mc.block_ttl = 0.01
+        mc.read_region(0, 60, 0, 10, 12, 10)
+        reads = len(mc.reads)
+        time.sleep(0.02)
+        mc.read_region(0, 60, 0, 10, 12, 10)
+        self.assertEqual(mc.block_cache.ttl, 0.01)
+        self.assertGreater(len(mc.reads), reads)
+
+    def test_invalidation_during_fetch_is_not_undone(self):
+        class RacingWorld(FakeWorld):
+            def get_block_list(self, *box):
+                # A write lands while the read is in flight
+                self.block_cache.invalidate_box(0, 60, 0, 9, 71, 9)
+                return super().get_block_list(*box)
+
+        mc = RacingWorld()
+        mc.read_region(0, 60, 0, 10, 12, 10)
+        self.assertEqual(len(mc.block_cache), 0)
+        reads = len(mc.reads)
+        mc.read_region(0, 60, 0, 10, 12, 10)
+        self.assertGreater(len(mc.reads), reads)
+
+    def test_memory_budget_evicts(self):
+        mc = FakeWorld()
+        mc.block_cache.max_bytes = 5000
+        mc.read_region(0, 0, 0, 64, 16, 16)
+        self.assertLessEqual(mc.block_cache.nbytes, 5000)
+        self.assertLess(len(mc.block_cache), 4)
+
+    def test_normalize_box(self):
+        self.assertEqual(normalize_box(10, 5, 0, -3, 0, 2), (8, 5, 0, 3, 1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import tempfile
+import unittest
+from benchmarks.gdmc_mock import MockGDMCServer
+from core.commandblocks import ChainStore, compile_chain, deploy_chain, parse_script
+from core.minecraft import MinecraftInterface, snbt_string
+from tests.test_minecraft import RecordingInterface
+
+SCRIPT = """
+# greet everyone
+/say hello
+?tellraw @a {"text":"it said \\"hi\\""}
+effect give @a speed 10
+"""
+
+
+class TestCompile(unittest.TestCase):
+    def test_parse_script(self):
+        self.assertEqual(parse_script(SCRIPT), [
+            ('say hello', False),
+            ('tellraw @a {"text":"it said \\"hi\\""}', True),
+            ('effect give @a speed 10', False),
+        ])
+
+    def test_snbt_escaping(self):
+        self.assertEqual(snbt_string('say "a\\b"'), '"say \\"a\\\\b\\""')
+
+    def test_chain_layout(self):
+        chain = compile_chain(SCRIPT, 10, 64, 10, facing='south', head='repeating', always_active=True)
+        self.assertEqual([pos for pos, _ in chain], [(10, 64, 10), (10, 64, 11), (10, 64, 12)])
+        self.assertTrue(chain[0][1].startswith('minecraft:repeating_command_block[facing=south,conditional=false]'))
+        self.assertTrue(chain[1][1].startswith('minecraft:chain_command_block[facing=south,conditional=true]'))
+        self.assertIn('Command:"tellraw @a {\\"text\\":\\"it said \\\\\\"hi\\\\\\"\\"}"', chain[1][1])
+        self.assertTrue(all(spec.endswith('auto:1b}') for _, spec in chain))
+
+    def test_invalid_facing(self):
+        with self.assertRaises(ValueError):
+            compile_chain(SCRIPT, 0, 0, 0, facing='sideways')
+
+    def test_conditional_first_line_is_rejected(self):
+        with self.assertRaises(ValueError):
+            compile_chain("# comment\n?say hi\nsay bye", 0, 0, 0)
+
+
+class TestDeploy(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = ChainStore(self.tmp.name)
+
+    def test_single_request_tail_first(self):
+        mc = RecordingInterface()
+        result = deploy_chain(mc, SCRIPT, 0, 64, 0, store=self.store)
+        self.assertEqual(len(mc.bodies), 1)
+        self.assertEqual((result['blocks'], result['written']), (3, 3))
+        self.assertTrue(mc.bodies[0][-1].startswith('setblock 0 64 0 minecraft:command_block'))
+
+    def test_redeploy_rewrites_only_changes(self):
+        mc = RecordingInterface()
+        deploy_chain(mc, SCRIPT, 0, 64, 0, store=self.store)
+        # A fresh store reads the record back from disk
+        store = ChainStore(self.tmp.name)
+        result = deploy_chain(mc, SCRIPT.replace('speed 10', 'speed 20'), 0, 64, 0, store=store)
+        self.assertEqual((result['written'], result['unchanged']), (1, 2))
+        self.assertEqual(len(mc.bodies[-1]), 1)
+        self.assertTrue(mc.bodies[-1][0].startswith('data merge block 2 64 0 {Command:"effect give @a speed 20"'))
+        self.assertEqual(deploy_chain(mc, SCRIPT.replace('speed 10', 'speed 20'), 0, 64, 0, store=store)['requests'], 0)
+
+    def test_shorter_chain_clears_leftovers(self):
+        mc = RecordingInterface()
+        deploy_chain(mc, SCRIPT, 0, 64, 0, facing='up', store=self.store)
+        result = deploy_chain(mc, "say hello", 0, 64, 0, facing='up', store=self.store)
+        self.assertEqual(result['cleared'], 2)
+        self.assertEqual(mc.bodies[-1], ['setblock 0 65 0 minecraft:air', 'setblock 0 66 0 minecraft:air'])
+
+    def test_new_facing_clears_old_chain(self):
+        mc = RecordingInterface()
+        deploy_chain(mc, SCRIPT, 0, 64, 0, facing='east', store=self.store)
+        result = deploy_chain(mc, SCRIPT, 0, 64, 0, facing='up', store=self.store)
+        self.assertEqual((result['written'], result['cleared']), (3, 2))
+        self.assertEqual(mc.bodies[-1][-2:], ['setblock 1 64 0 minecraft:air', 'setblock 2 64 0 minecraft:air'])
+
+    def test_uncleared_leftovers_are_retried(self):
+        deploy_chain(RecordingInterface(), SCRIPT, 0, 64, 0, facing='east', store=self.store)
+        mc = RecordingInterface(fail_on={'setblock 2 64 0 minecraft:air'})
+        self.assertEqual(deploy_chain(mc, SCRIPT, 0, 64, 0, facing='south', store=self.store)['failed'], 1)
+        mc = RecordingInterface()
+        result = deploy_chain(mc, SCRIPT, 0, 64, 0, facing='south', store=self.store)
+        self.assertEqual((result['unchanged'], result['cleared']), (3, 1))
+        self.assertEqual(mc.bodies[-1], ['setblock 2 64 0 minecraft:air'])
+
+    def test_failed_blocks_are_retried(self):
+        chain = compile_chain(SCRIPT, 0, 64, 0)
+        mc = RecordingInterface(fail_on={f'setblock 2 64 0 {chain[2][1]}'})
+        self.assertEqual(deploy_chain(mc, SCRIPT, 0, 64, 0, store=self.store)['failed'], 1)
+        result = deploy_chain(RecordingInterface(), SCRIPT, 0, 64, 0, store=self.store)
+        self.assertEqual((result['written'], result['unchanged']), (1, 2))
+
+
+class TestDeployAgainstMockServer(unittest.TestCase):
+    """The mock rejects a setblock that keeps the block state, like vanilla Minecraft."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = ChainStore(tmp.name)
+        self.server = MockGDMCServer().start()
+        self.addCleanup(self.server.stop)
+        self.mc = MinecraftInterface(self.server.url)
+        self.addCleanup(self.mc.transport.close)
+
+    def test_edited_line_lands_on_redeploy(self):
+        self.assertEqual(deploy_chain(self.mc, SCRIPT, 0, 64, 0, store=self.store)['failed'], 0)
+        result = deploy_chain(self.mc, SCRIPT.replace('speed 10', 'speed 20'), 0, 64, 0, store=self.store)
+        self.assertEqual((result['written'], result['failed']), (1, 0))
+        self.assertEqual(self.server.stats()['commands_by_type']['data'], 1)
+
+    def test_unknown_state_is_cleared_first(self):
+        deploy_chain(self.mc, SCRIPT, 0, 64, 0, store=self.store)
+        # Forgotten record over an identical chain in the world: every block is rewritten
+        result = deploy_chain(self.mc, SCRIPT, 0, 64, 0, store=self.store, force=True)
+        self.assertEqual((result['written'], result['failed']), (3, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from core.dither import dither_indices, uniform_region_mask, bayer_matrix
+from core.utils import is_uniform_region, PALETTE_ARRAY
+
+
+class TestDither(unittest.TestCase):
+    def test_uniform_mask_matches_per_pixel_scan(self):
+        rng = np.random.default_rng(5)
+        pixels = rng.integers(100, 125, (16, 16, 3)).astype(np.uint8)
+        pixels[4:12, 4:12] = 60
+        expected = np.array([[is_uniform_region(pixels, y, x) for x in range(16)] for y in range(16)])
+        np.testing.assert_array_equal(uniform_region_mask(pixels), expected)
+
+    def test_flat_image_stays_flat(self):
+        pixels = np.full((20, 30, 3), (153, 51, 51), dtype=np.uint8)
+        for mode in ('floyd_steinberg', 'ordered', 'none'):
+            indices = dither_indices(pixels, mode)
+            self.assertEqual(indices.shape, (20, 30))
+            self.assertEqual(set(np.unique(indices)), {5})
+
+    def test_gradient_uses_valid_indices(self):
+        gradient = np.tile(np.linspace(0, 255, 64, dtype=np.uint8)[None, :, None], (8, 1, 3))
+        for mode in ('floyd_steinberg', 'ordered'):
+            indices = dither_indices(gradient, mode)
+            self.assertTrue(indices.max() < len(PALETTE_ARRAY))
+            # Dithering mixes several colours across the ramp
+            self.assertGreater(len(np.unique(indices)), 2)
+
+    def test_bayer_matrix_is_centred(self):
+        m = bayer_matrix(2)
+        self.assertEqual(m.shape, (4, 4))
+        self.assertAlmostEqual(float(m.mean()), 0.0, places=6)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            dither_indices(np.zeros((2, 2, 3), dtype=np.uint8), 'random')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import math
+import unittest
+from core.entities import spread_positions, render_nbt, spawn_entities
+from core.minecraft import summon_command
+from tests.test_minecraft import RecordingInterface
+
+
+class TestSpreadPositions(unittest.TestCase):
+    def test_grid_is_centred_and_spaced(self):
+        positions = spread_positions('grid', 9, (100, 64, 100), spacing=3)
+        self.assertEqual(positions[0], (97, 64, 97))
+        self.assertEqual(positions[-1], (103, 64, 103))
+        self.assertEqual(len(set(positions)), 9)
+
+    def test_ring_keeps_radius(self):
+        for x, y, z in spread_positions('ring', 12, (0, 70, 0), radius=10):
+            self.assertAlmostEqual(math.hypot(x, z), 10, delta=0.01)
+            self.assertEqual(y, 70)
+
+    def test_random_is_inside_radius_and_seeded(self):
+        a = spread_positions('random', 50, (5, 64, 5), radius=8, seed=1)
+        self.assertEqual(a, spread_positions('random', 50, (5, 64, 5), radius=8, seed=1))
+        self.assertTrue(all(math.hypot(x - 5, z - 5) <= 8.01 for x, _, z in a))
+
+    def test_random_without_radius_spreads_by_spacing(self):
+        positions = spread_positions('random', 100, (0, 64, 0), spacing=2, seed=2)
+        self.assertGreater(len(set(positions)), 95)
+        self.assertTrue(all(math.hypot(x, z) <= 2 * math.sqrt(100 / math.pi) + 0.01 for x, _, z in positions))
+
+    def test_unknown_pattern(self):
+        with self.assertRaises(ValueError):
+            spread_positions('spiral', 3, (0, 0, 0))
+
+
+class TestBulkSpawn(unittest.TestCase):
+    def test_nbt_template(self):
+        nbt = render_nbt("{CustomName:'\"Guard $n\"',Tags:[\"arena_$i\"]}", 4, 10, (1, 2, 3))
+        self.assertEqual(nbt, "{CustomName:'\"Guard 5\"',Tags:[\"arena_4\"]}")
+        self.assertEqual(summon_command('zombie', 1.5, 64, -2.25, '{NoAI:1b}'), 'summon zombie 1.50 64 -2.25 {NoAI:1b}')
+
+    def test_spawns_in_batches_with_per_batch_results(self):
+        mc = RecordingInterface()
+        result = spawn_entities(mc, 'zombie', (0, 64, 0), 2500, pattern='grid')
+        self.assertEqual(result['requests'], 3)
+        self.assertEqual([b['commands'] for b in result['batches']], [1000, 1000, 500])
+        self.assertEqual(result['spawned'], 2500)
+        self.assertEqual(sum(len(body) for body in mc.bodies), 2500)
+
+    def test_failures_are_reported_per_batch(self):
+        mc = RecordingInterface(fail_on={'summon skeleton 0 64 0'})
+        result = spawn_entities(mc, 'skeleton', (0, 64, 0), 3)
+        self.assertEqual(result['failed'], 3)
+        self.assertEqual(result['batches'], [{'commands': 3, 'succeeded': 0, 'first_error': 'summon skeleton 0 64 0'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+from benchmarks.gdmc_mock import MockGDMCServer
+from core.minecraft import MinecraftInterface
+
+
+class TestAgainstMockServer(unittest.TestCase):
+    """End-to-end checks of the HTTP layer against the in-process mock GDMC server."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockGDMCServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.reset_stats()
+        self.mc = MinecraftInterface(self.server.url)
+        self.addCleanup(self.mc.transport.close)
+
+    def test_batch_maps_per_line_results(self):
+        with self.mc.batch() as batch:
+            ok = batch.fill_region(0, 0, 0, 9, 9, 9, 'stone')
+            too_big = batch.add('fill 0 0 0 99 99 99 minecraft:stone')
+        self.assertTrue(ok.success)
+        self.assertFalse(too_big.success)
+        self.assertIn('Too many blocks', too_big.message)
+        self.assertEqual(self.server.stats()['requests'], 1)
+
+    def test_large_fill_is_split(self):
+        self.assertTrue(self.mc.fill_region(0, 0, 0, 99, 99, 99, 'stone'))
+        self.assertGreater(self.server.stats()['commands_by_type']['fill'], 1)
+
+    def test_player_info_in_one_request(self):
+        info = self.mc.get_player_info()
+        self.assertEqual(info['position'], (10, 64, -4))
+        self.assertEqual(self.server.stats()['requests'], 1)
+
+    def test_put_and_read_blocks(self):
+        indices = np.zeros((2, 2, 2), dtype=np.uint8)
+        result = self.mc.put_blocks(100, 64, 100, indices, ['glass'])
+        self.assertEqual(result['placed'], 8)
+        grid = self.mc.read_region(100, 64, 100, 2, 2, 2)
+        self.assertEqual(grid.counts(), {'minecraft:glass': 8})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from PIL import Image
+from core import pipeline
+from core.gridcache import QuantizedGridCache, content_digest
+from core.screen import MinecraftScreen
+from core.state import ScreenStateStore
+from tests.test_minecraft import RecordingInterface
+
+
+class TestQuantizedGridCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.image = os.path.join(self.tmp.name, 'image.png')
+        pixels = np.zeros((36, 64, 3), dtype=np.uint8)
+        pixels[:, 32:] = (153, 51, 51)
+        Image.fromarray(pixels).save(self.image)
+
+    def test_key_covers_content_size_and_mode(self):
+        cache = QuantizedGridCache()
+        key = cache.key(self.image, (64, 36), 'none')
+        self.assertEqual(key, cache.key(self.image, (64, 36), 'none'))
+        self.assertNotEqual(key, cache.key(self.image, (32, 18), 'none'))
+        self.assertNotEqual(key, cache.key(self.image, (64, 36), 'ordered'))
+        # Same pixels under another name hash the same way as arrays do
+        array = np.array(Image.open(self.image))
+        self.assertEqual(content_digest(array), content_digest(array.copy()))
+        self.assertIsNone(cache.key(os.path.join(self.tmp.name, 'missing.png'), (64, 36), 'none'))
+
+    def test_key_covers_band_layout(self):
+        # Banded (pooled) and full-image Floyd-Steinberg grids differ slightly
+        cache = QuantizedGridCache()
+        with mock.patch.dict(os.environ, {pipeline.WORKERS_ENV: '0'}):
+            full = cache.key(self.image, (64, 36), 'floyd_steinberg')
+        with mock.patch.dict(os.environ, {pipeline.WORKERS_ENV: '4'}):
+            banded = cache.key(self.image, (64, 36), 'floyd_steinberg')
+        self.assertNotEqual(full, banded)
+
+    def test_rewritten_file_changes_key(self):
+        cache = QuantizedGridCache()
+        key = cache.key(self.image, (64, 36), 'none')
+        Image.fromarray(np.full((36, 64, 3), 200, dtype=np.uint8)).save(self.image)
+        os.utime(self.image, ns=(0, 12345))
+        self.assertNotEqual(key, cache.key(self.image, (64, 36), 'none'))
+
+    def test_lru_and_disk(self):
+        grids = os.path.join(self.tmp.name, 'grids')
+        cache = QuantizedGridCache(capacity=1, cache_dir=grids)
+        cache.put('a', np.ones((2, 2)))
+        cache.put('b', np.zeros((2, 2)))
+        self.assertEqual(len(cache._grids), 1)
+        # Evicted from memory but still on disk
+        np.testing.assert_array_equal(cache.get('a'), np.ones((2, 2)))
+        self.assertIsNone(QuantizedGridCache().get('a'))
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_known_image_skips_decode_on_another_screen(self):
+        cache = QuantizedGridCache()
+        store = ScreenStateStore(os.path.join(self.tmp.name, 'state'))
+        mc = RecordingInterface()
+        first = MinecraftScreen(mc, 0, 64, 0, 64, 36, store=store, grid_cache=cache)
+        first.render_image(self.image, use_dithering=False)
+        self.assertIn('decode', first.last_timings)
+        second = MinecraftScreen(mc, 100, 64, 0, 64, 36, facing='east', store=store, grid_cache=cache)
+        self.assertEqual(second.render_image(self.image, use_dithering=False), 2)
+        self.assertNotIn('decode', second.last_timings)
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
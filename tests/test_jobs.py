@@ -0,0 +1,92 @@
+import threading
+import unittest
+from core.jobs import JobQueue
+from tests.test_minecraft import RecordingInterface
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.notified = []
+        self.queue = JobQueue(max_workers=2, notify=lambda job: self.notified.append((job.id, job.status)))
+        self.addCleanup(self.queue.shutdown, True)
+
+    def blocking_job(self, started: threading.Event, release: threading.Event):
+        def run(job):
+            started.set()
+            while not release.wait(0.01):
+                if job.cancelled:
+                    return 'stopped'
+            return 'finished'
+        return run
+
+    def test_result_and_notifications(self):
+        job = self.queue.submit('demo', lambda job: 42)
+        self.assertTrue(job.wait(2))
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.to_dict()['result'], 42)
+        self.assertEqual(job.progress, 1.0)
+        self.assertEqual(self.notified, [(job.id, 'running'), (job.id, 'done')])
+
+    def test_failure_is_recorded(self):
+        def boom(job):
+            raise RuntimeError("no server")
+        job = self.queue.submit('demo', boom)
+        job.wait(2)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.to_dict()['error'], "no server")
+
+    def test_same_key_coalesces_to_latest(self):
+        started, release = threading.Event(), threading.Event()
+        first = self.queue.submit('render', self.blocking_job(started, release), key='screen')
+        self.assertTrue(started.wait(2))
+        ran = []
+        second = self.queue.submit('render', lambda job: ran.append('second'), key='screen')
+        third = self.queue.submit('render', lambda job: ran.append('third'), key='screen')
+        self.assertTrue(third.wait(2))
+        self.assertEqual(first.status, 'superseded')
+        self.assertEqual(first.result, 'stopped')
+        self.assertEqual(second.status, 'superseded')
+        self.assertEqual(third.status, 'done')
+        self.assertEqual(ran, ['third'])
+
+    def test_different_keys_run_in_parallel(self):
+        barrier = threading.Barrier(2, timeout=2)
+        a = self.queue.submit('render', lambda job: barrier.wait(), key='a')
+        b = self.queue.submit('render', lambda job: barrier.wait(), key='b')
+        self.assertTrue(a.wait(3) and b.wait(3))
+        self.assertEqual((a.status, b.status), ('done', 'done'))
+
+    def test_cancel_running_and_finished(self):
+        started, release = threading.Event(), threading.Event()
+        job = self.queue.submit('fill', self.blocking_job(started, release))
+        self.assertTrue(started.wait(2))
+        self.assertTrue(self.queue.cancel(job.id))
+        job.wait(2)
+        self.assertEqual(job.status, 'cancelled')
+        self.assertFalse(self.queue.cancel(job.id))
+        self.assertFalse(self.queue.cancel('missing'))
+
+    def test_history_is_bounded(self):
+        queue = JobQueue(max_workers=1, history=3)
+        self.addCleanup(queue.shutdown, True)
+        for _ in range(6):
+            queue.submit('demo', lambda job: None).wait(2)
+        self.assertLessEqual(len(queue.jobs()), 4)
+
+
+class TestCancellableWrites(unittest.TestCase):
+
+    def test_fill_box_stops_between_slices(self):
+        mc = RecordingInterface()
+        reports = []
+        # A 512x64x512 fill is 512 regions: 8 slices of 4 in-flight requests * 16 regions
+        tally = mc.fill_box(0, 0, 0, 511, 63, 511, 'stone',
+                            should_stop=lambda: len(reports) >= 3, progress=lambda f, m: reports.append(f))
+        self.assertEqual(reports, [0.125, 0.25, 0.375])
+        self.assertEqual((tally['regions'], tally['skipped']), (512, 320))
+        self.assertEqual(max(len(body) for body in mc.bodies), 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
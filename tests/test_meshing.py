@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from core.meshing import count_row_runs, greedy_rectangles
+
+
+class TestMeshing(unittest.TestCase):
+    def assert_valid_cover(self, grid, mask, rects, max_area):
+        covered = np.zeros_like(mask)
+        for x0, y0, x1, y1, value in rects:
+            self.assertLessEqual((x1 - x0 + 1) * (y1 - y0 + 1), max_area)
+            self.assertTrue(np.all(grid[y0:y1 + 1, x0:x1 + 1] == value))
+            covered[y0:y1 + 1, x0:x1 + 1] = True
+        self.assertTrue(np.all(covered[mask]))
+
+    def test_solid_image_is_one_rect(self):
+        grid = np.full((72, 128), 3, dtype=np.uint8)
+        mask = np.ones_like(grid, dtype=bool)
+        self.assertEqual(greedy_rectangles(grid, mask), [(0, 0, 127, 71, 3)])
+        self.assertEqual(count_row_runs(grid, mask), 72)
+
+    def test_random_cover_respects_values_and_area(self):
+        rng = np.random.default_rng(0)
+        grid = rng.integers(0, 3, (40, 60)).astype(np.uint8)
+        mask = rng.random((40, 60)) < 0.7
+        rects = greedy_rectangles(grid, mask, max_area=50)
+        self.assert_valid_cover(grid, mask, rects, 50)
+
+    def test_volume_limit_splits_large_areas(self):
+        grid = np.zeros((144, 256), dtype=np.uint8)
+        mask = np.ones_like(grid, dtype=bool)
+        rects = greedy_rectangles(grid, mask)
+        self.assertEqual(len(rects), 2)
+        self.assert_valid_cover(grid, mask, rects, 32768)
+
+    def test_empty_mask(self):
+        grid = np.zeros((4, 4), dtype=np.uint8)
+        mask = np.zeros_like(grid, dtype=bool)
+        self.assertEqual(greedy_rectangles(grid, mask), [])
+        self.assertEqual(count_row_runs(grid, mask), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
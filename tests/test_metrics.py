@@ -0,0 +1,76 @@
+import unittest
+from benchmarks.gdmc_mock import MockGDMCServer
+from core.metrics import LatencyHistogram, Metrics, metrics
+from core.minecraft import MinecraftInterface
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_percentiles_use_bucket_bounds(self):
+        hist = LatencyHistogram()
+        for _ in range(90):
+            hist.observe(3.0)
+        for _ in range(10):
+            hist.observe(150.0)
+        self.assertEqual(hist.percentile(0.5), 5.0)
+        self.assertEqual(hist.percentile(0.95), 150.0)  # capped at the observed max
+        data = hist.to_dict()
+        self.assertEqual(data['count'], 100)
+        self.assertEqual(data['buckets'], {'<=5ms': 90, '<=200ms': 10})
+
+    def test_empty(self):
+        self.assertEqual(LatencyHistogram().to_dict()['p99_ms'], 0.0)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_timer_records_errors_and_timings(self):
+        m = Metrics(log_lines=False)
+        timings = {}
+        with m.timer('stage', 'ok', timings):
+            pass
+        with self.assertRaises(RuntimeError):
+            with m.timer('stage', 'boom'):
+                raise RuntimeError
+        snap = m.snapshot('stage')
+        self.assertEqual(snap['stage']['ok']['errors'], 0)
+        self.assertEqual(snap['stage']['boom']['errors'], 1)
+        self.assertIn('ok', timings)
+
+    def test_instrument_keeps_signature(self):
+        m = Metrics(log_lines=False)
+
+        @m.instrument('tool')
+        def add(a: int, b: int = 1) -> int:
+            """Add."""
+            return a + b
+
+        self.assertEqual(add(2), 3)
+        self.assertEqual(add.__name__, 'add')
+        self.assertEqual(add.__doc__, 'Add.')
+        self.assertEqual(m.snapshot()['tool']['add']['count'], 1)
+
+    def test_reset(self):
+        m = Metrics(log_lines=False)
+        m.observe('http', 'GET /blocks', 0.01)
+        m.reset()
+        self.assertNotIn('http', m.snapshot())
+
+
+class TestHttpMetrics(unittest.TestCase):
+
+    def test_requests_are_recorded_per_endpoint(self):
+        with MockGDMCServer() as server:
+            mc = MinecraftInterface(server.url)
+            self.addCleanup(mc.transport.close)
+            metrics.reset()
+            mc.fill_region(0, 0, 0, 3, 3, 3, 'stone')
+            mc.get_build_area()
+        http = metrics.snapshot('http')['http']
+        self.assertEqual(http['POST /command']['count'], 1)
+        self.assertGreater(http['POST /command']['bytes_out'], 0)
+        self.assertEqual(http['GET /buildarea']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+import unittest
+from core.minecraft import MinecraftInterface
+
+
+class RecordingInterface(MinecraftInterface):
+    """MinecraftInterface that records /command bodies instead of sending them."""
+
+    def __init__(self, fail_on=None):
+        super().__init__('http://test')
+        self.bodies = []
+        self.fail_on = fail_on or set()
+
+    def _post_commands(self, commands):
+        self.bodies.append(list(commands))
+        return [(c not in self.fail_on, c) for c in commands]
+
+
+class TestCommandBatch(unittest.TestCase):
+    def test_flushes_on_exit_and_maps_results(self):
+        mc = RecordingInterface(fail_on={'setblock 1 2 3 minecraft:stone'})
+        with mc.batch() as batch:
+            ok = batch.fill_region(0, 0, 0, 1, 1, 1, 'air')
+            bad = batch.set_block(1, 2, 3, 'stone')
+            self.assertFalse(ok.done)
+        self.assertEqual(len(mc.bodies), 1)
+        self.assertTrue(ok.success)
+        self.assertFalse(bad.success)
+        self.assertEqual(bad.message, 'setblock 1 2 3 minecraft:stone')
+        self.assertEqual((batch.succeeded, batch.failed), (1, 1))
+
+    def test_size_bounds_split_requests(self):
+        mc = RecordingInterface()
+        with mc.batch(max_commands=10) as batch:
+            for i in range(25):
+                batch.spawn_entity('zombie', i, 64, 0)
+        self.assertEqual([len(b) for b in mc.bodies], [10, 10, 5])
+        self.assertEqual(batch.requests_sent, 3)
+
+        mc = RecordingInterface()
+        with mc.batch(max_bytes=64) as batch:
+            for i in range(4):
+                batch.add(f'say {"x" * 20}')
+        self.assertEqual([len(b) for b in mc.bodies], [2, 2])
+
+    def test_concurrent_batch_resolves_every_result(self):
+        mc = RecordingInterface()
+        with mc.batch(max_commands=7, concurrent=True) as batch:
+            results = [batch.set_block(i, 64, 0, 'stone') for i in range(50)]
+        self.assertTrue(all(r.done and r.success for r in results))
+        self.assertEqual(sorted(len(b) for b in mc.bodies), [1] + [7] * 7)
+        self.assertEqual(batch.requests_sent, 8)
+
+    def test_rejects_multiline_commands(self):
+        with self.assertRaises(ValueError):
+            RecordingInterface().batch().add('say a\nsay b')
+
+    def test_error_waits_for_in_flight_before_invalidating(self):
+        landed = []
+
+        class SlowInterface(RecordingInterface):
+            def _post_commands(self, commands):
+                time.sleep(0.05)
+                landed.append(len(commands))
+                return super()._post_commands(commands)
+
+            def invalidate_blocks(self, *box):
+                invalidated.append(sum(landed))
+
+        invalidated = []
+        mc = SlowInterface()
+        with self.assertRaises(RuntimeError):
+            with mc.batch(max_commands=2, concurrent=True) as batch:
+                for i in range(5):
+                    batch.set_block(i, 64, 0, 'stone')
+                raise RuntimeError('boom')
+        # The two full chunks were sent; the queued fifth command was dropped
+        self.assertEqual(invalidated, [4] * 5)
+
+
+class TestAsyncTransport(unittest.TestCase):
+    def test_gather_respects_in_flight_window(self):
+        transport = RecordingInterface().async_transport()
+        transport.max_in_flight = 2
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def work(item):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return item * 2
+
+        self.assertEqual(asyncio.run(transport.gather(work, range(6))), [0, 2, 4, 6, 8, 10])
+        self.assertEqual(peak[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
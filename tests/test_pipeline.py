@@ -0,0 +1,57 @@
+import os
+import unittest
+from unittest import mock
+import numpy as np
+from core import pipeline
+from core.dither import floyd_steinberg_indices, dither_indices
+from core.utils import PALETTE_ARRAY
+
+
+def blurred_error(pixels, indices, k=4):
+    """Mean colour error after a k x k box blur, i.e. how the dithered image reads from afar."""
+    diff = PALETTE_ARRAY[indices].astype(np.float64) - pixels.astype(np.float64)
+    h, w = (diff.shape[0] // k) * k, (diff.shape[1] // k) * k
+    return np.abs(diff[:h, :w].reshape(h // k, k, w // k, k, 3).mean(axis=(1, 3))).mean()
+
+
+class TestBands(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        ramp = np.linspace(0, 255, 96)[None, :, None] * np.ones((80, 1, 3))
+        self.pixels = np.clip(ramp + rng.normal(0, 20, ramp.shape), 0, 255).astype(np.uint8)
+
+    def test_band_spans_cover_every_row_once(self):
+        spans = pipeline.band_spans(100, band_rows=32, overlap=8)
+        self.assertEqual(spans, [(0, 0, 32), (24, 32, 64), (56, 64, 96), (88, 96, 100)])
+
+    def test_banded_matches_full_pass_quality(self):
+        full = floyd_steinberg_indices(self.pixels)
+        banded = pipeline.dither_bands(self.pixels)
+        self.assertEqual(banded.shape, full.shape)
+        self.assertLess(blurred_error(self.pixels, banded), blurred_error(self.pixels, full) * 1.1)
+
+
+class TestPool(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {pipeline.WORKERS_ENV: '2'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pipeline.shutdown_pool)
+        rng = np.random.default_rng(4)
+        self.pixels = rng.integers(0, 256, (72, 96, 3)).astype(np.uint8)
+
+    def test_pool_matches_in_process_bands(self):
+        self.assertIsNotNone(pipeline.get_pool())
+        np.testing.assert_array_equal(pipeline.dither_parallel(self.pixels), pipeline.dither_bands(self.pixels))
+        np.testing.assert_array_equal(pipeline.dither_parallel(self.pixels, 'ordered'), dither_indices(self.pixels, 'ordered'))
+
+    def test_disabled_pool_runs_in_process(self):
+        with mock.patch.dict(os.environ, {pipeline.WORKERS_ENV: '0'}):
+            self.assertIsNone(pipeline.get_pool())
+            # No workers to spread bands over, so one full-image pass
+            np.testing.assert_array_equal(pipeline.dither_parallel(self.pixels), floyd_steinberg_indices(self.pixels))
+            self.assertEqual(pipeline.dither_layout(), 'full')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import time
+import unittest
+from core.players import parse_player_info
+from tests.test_minecraft import RecordingInterface
+
+
+class PlayerServer(RecordingInterface):
+    def _post_commands(self, commands):
+        self.bodies.append(list(commands))
+        replies = []
+        for command in commands:
+            if command.endswith('Pos'):
+                replies.append((True, 'Steve has the following entity data: [-0.5d, 64.0d, 12.75d]'))
+            else:
+                replies.append((True, 'Steve has the following entity data: [90.0f, -10.5f]'))
+        return replies
+
+
+class TestPlayers(unittest.TestCase):
+    def test_parse_floors_coordinates(self):
+        info = parse_player_info('data: [-0.5d, 64.0d, 12.75d]', 'data: [90.0f, -10.5f]')
+        self.assertEqual(info, {'position': (-1, 64, 12), 'yaw': 90.0, 'pitch': -10.5})
+        self.assertIsNone(parse_player_info('No entity was found', ''))
+
+    def test_single_request_and_ttl_cache(self):
+        mc = PlayerServer()
+        info = mc.get_player_info()
+        self.assertEqual(info['position'], (-1, 64, 12))
+        self.assertEqual(len(mc.bodies), 1)
+        self.assertEqual(len(mc.bodies[0]), 2)
+        info['facing'] = 'west'
+        self.assertNotIn('facing', mc.get_player_info())
+        self.assertEqual(len(mc.bodies), 1)
+        mc.get_player_info(max_age=0)
+        self.assertEqual(len(mc.bodies), 2)
+
+    def test_tracker_polls_all_players_in_one_request(self):
+        mc = PlayerServer()
+        tracker = mc.track_players(['Steve', 'Alex'], interval=0.01)
+        try:
+            deadline = time.monotonic() + 2
+            while tracker.polls < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            tracker.stop()
+        self.assertGreaterEqual(tracker.polls, 2)
+        self.assertEqual(len(mc.bodies[0]), 4)
+        requests = len(mc.bodies)
+        self.assertIsNotNone(mc.get_player_info('Alex', max_age=60))
+        self.assertEqual(len(mc.bodies), requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+from core.quantize import palette_lut, quantize_indices
+from core.utils import find_closest_color_index, PALETTE_ARRAY
+
+
+class TestQuantize(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.pixels = rng.integers(0, 256, (12, 20, 3)).astype(np.uint8)
+        self.expected = np.array([[find_closest_color_index(p) for p in row] for row in self.pixels])
+
+    def test_matches_per_pixel_nearest(self):
+        np.testing.assert_array_equal(quantize_indices(self.pixels), self.expected)
+        floats = self.pixels.astype(np.float32) + 0.4
+        expected = np.array([[find_closest_color_index(p) for p in row] for row in floats])
+        np.testing.assert_array_equal(quantize_indices(floats), expected)
+
+    def test_reduced_lut(self):
+        lut = palette_lut(5)
+        self.assertEqual(lut.shape, (32, 32, 32))
+        self.assertIs(lut, palette_lut(5))
+        # Palette colours themselves always land on their own entry
+        palette = PALETTE_ARRAY.astype(np.uint8)[None]
+        np.testing.assert_array_equal(quantize_indices(palette, lut_bits=8)[0], np.arange(len(PALETTE_ARRAY)))
+
+    def test_invalid_bits(self):
+        with self.assertRaises(ValueError):
+            palette_lut(9)
+
+
+if __name__ == '__main__':
+    unittest.main()
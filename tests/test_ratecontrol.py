@@ -0,0 +1,95 @@
+import time
+import unittest
+import numpy as np
+from benchmarks.gdmc_mock import MockGDMCServer
+from core.minecraft import MinecraftInterface
+from core.ratecontrol import RateController, is_idempotent
+
+
+class TestRateController(unittest.TestCase):
+    def test_slow_requests_shrink_then_fast_ones_recover(self):
+        rate = RateController(1000, 4, target_latency=0.1)
+        for _ in range(10):
+            rate.record(1000, 0.5, ok=True)
+        self.assertEqual((rate.batch_commands, rate.concurrency), (rate.min_batch, 1))
+        for _ in range(30):
+            rate.record(rate.batch_commands, 0.01, ok=True)
+        self.assertEqual((rate.batch_commands, rate.concurrency), (1000, 4))
+
+    def test_errors_halve_batch_and_concurrency(self):
+        rate = RateController(1000, 4)
+        rate.record(1000, 0.01, ok=False)
+        self.assertEqual((rate.batch_commands, rate.concurrency), (500, 2))
+        self.assertEqual(rate.snapshot()['errors'], 1)
+
+    def test_small_requests_do_not_grow_the_batch(self):
+        rate = RateController(1000, 4)
+        rate.record(1000, 5.0, ok=True)
+        size = rate.batch_commands
+        for _ in range(20):
+            rate.record(1, 0.001, ok=True)
+        self.assertEqual(rate.batch_commands, size)
+
+    def test_throughput_target_paces_requests(self):
+        rate = RateController(1000, 4, target_throughput=2000)
+        start = time.perf_counter()
+        for _ in range(5):
+            with rate.slot(100):
+                pass
+        # 500 commands at 2000/s: the fifth request may start 0.2s after the first
+        self.assertGreaterEqual(time.perf_counter() - start, 0.19)
+
+    def test_idempotent_commands(self):
+        self.assertTrue(is_idempotent('fill 0 0 0 1 1 1 minecraft:stone'))
+        self.assertTrue(is_idempotent('/setblock 0 0 0 minecraft:air'))
+        self.assertFalse(is_idempotent('summon zombie 0 64 0'))
+        self.assertFalse(is_idempotent('time add 100'))
+
+
+class TestRateControlAgainstMockServer(unittest.TestCase):
+    def setUp(self):
+        self.server = MockGDMCServer(command_cost=0.0001).start()
+        self.addCleanup(self.server.stop)
+        self.mc = MinecraftInterface(self.server.url, target_latency=0.02)
+        self.mc.rate.retry_backoff = 0.01
+        self.addCleanup(self.mc.transport.close)
+
+    def test_failed_fill_batch_is_retried(self):
+        self.server.fail_commands = 1
+        with self.mc.batch() as batch:
+            results = [batch.set_block(i, 64, 0, 'stone') for i in range(10)]
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual(self.mc.rate.retries, 1)
+        self.assertEqual(self.server.stats()['commands_by_type']['setblock'], 10)
+
+    def test_summon_is_never_replayed(self):
+        self.server.fail_commands = 1
+        self.assertFalse(self.mc.spawn_entity('zombie', 0, 64, 0))
+        self.server.fail_commands = 0
+        self.assertEqual(self.mc.rate.retries, 0)
+        self.assertNotIn('summon', self.server.stats()['commands_by_type'])
+
+    def test_slow_server_gets_smaller_batches(self):
+        with self.mc.batch() as batch:
+            for i in range(3000):
+                batch.set_block(i, 64, 0, 'stone')
+        self.assertEqual(batch.failed, 0)
+        self.assertLess(self.mc.rate.batch_commands, 1000)
+        self.assertGreater(self.server.stats()['requests'], 3)
+
+    def test_block_writes_adapt_separately(self):
+        self.server.command_cost = 0.00005
+        mc = MinecraftInterface(self.server.url, max_in_flight=1, target_latency=0.1)
+        self.addCleanup(mc.transport.close)
+        result = mc.put_blocks(0, 64, 0, np.zeros((16, 32, 32), dtype=np.uint8), ['stone'])
+        self.assertEqual(result['placed'], 16 * 32 * 32)
+        # The first wave goes out at the default size; later ones are smaller
+        self.assertLess(mc.block_rate.batch_commands, 4096)
+        self.assertGreater(result['requests'], 4)
+        # Neither the PUTs nor a player poll feed the /command controller
+        mc.get_player_info()
+        self.assertEqual((mc.rate.requests, mc.rate.batch_commands), (0, 1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
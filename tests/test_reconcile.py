@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from PIL import Image
+from core.reconcile import reconcile, plan_fills
+from core.screen import MinecraftScreen
+from core.state import ScreenStateStore
+from core.voxels import grid_from_names, parse_rle
+from tests.test_minecraft import RecordingInterface
+
+
+class MemoryWorld(RecordingInterface):
+    """A tiny world held in a dict that applies fill/setblock commands and /blocks writes."""
+
+    def __init__(self):
+        super().__init__()
+        self.world = {}
+        self.reads = 0
+        self.blocks_read = 0
+        self.written = 0
+
+    def get_block_list(self, x, y, z, dx, dy, dz):
+        self.reads += 1
+        self.blocks_read += dx * dy * dz
+        return [{'x': bx, 'y': by, 'z': bz, 'id': self.world.get((bx, by, bz), 'minecraft:air')}
+                for by in range(y, y + dy) for bz in range(z, z + dz) for bx in range(x, x + dx)]
+
+    def _post_commands(self, commands):
+        for command in commands:
+            parts = command.split()
+            if parts[0] == 'fill':
+                x1, y1, z1, x2, y2, z2 = map(int, parts[1:7])
+                for bx in range(min(x1, x2), max(x1, x2) + 1):
+                    for by in range(min(y1, y2), max(y1, y2) + 1):
+                        for bz in range(min(z1, z2), max(z1, z2) + 1):
+                            self.world[(bx, by, bz)] = parts[7]
+                            self.written += 1
+        return super()._post_commands(commands)
+
+    def _put_block_batch(self, blocks, params):
+        for b in blocks:
+            self.world[(b['x'], b['y'], b['z'])] = b['id']
+        self.written += len(blocks)
+        return len(blocks), 0, 0
+
+
+class TestReconcile(unittest.TestCase):
+    def test_reapplying_costs_one_read_and_no_writes(self):
+        mc = MemoryWorld()
+        indices, palette = grid_from_names(parse_rle("stone*32,glass*8,air*24"), (4, 4, 4))
+        first = reconcile(mc, 0, 64, 0, indices, palette)
+        self.assertEqual(first['blocks_differing'], 40)
+        self.assertEqual(first['method'], 'fill')
+        reads, bodies = mc.reads, len(mc.bodies)
+        second = reconcile(mc, 0, 64, 0, indices, palette)
+        self.assertEqual(second['blocks_differing'], 0)
+        self.assertEqual(second['writes'], 0)
+        self.assertEqual((mc.reads - reads, len(mc.bodies) - bodies), (1, 0))
+
+    def test_only_damaged_blocks_are_rewritten(self):
+        mc = MemoryWorld()
+        indices, palette = grid_from_names(parse_rle("stone*64"), (4, 4, 4))
+        reconcile(mc, 0, 64, 0, indices, palette)
+        mc.world[(1, 65, 2)] = 'minecraft:air'
+        result = reconcile(mc, 0, 64, 0, indices, palette, method='blocks')
+        self.assertEqual((result['blocks_differing'], result['writes']), (1, 1))
+        self.assertEqual(mc.world[(1, 65, 2)], 'minecraft:stone')
+
+    def test_no_block_updates_never_fills(self):
+        mc = MemoryWorld()
+        indices, palette = grid_from_names(parse_rle("sand*64"), (4, 4, 4))
+        result = reconcile(mc, 0, 64, 0, indices, palette, method='fill', block_updates=False)
+        self.assertEqual((result['method'], result['writes']), ('blocks', 64))
+        self.assertFalse(any(c.startswith('fill') for body in mc.bodies for c in body))
+
+    def test_plan_fills_stacks_layers(self):
+        indices = np.zeros((5, 3, 3), dtype=np.uint8)
+        mask = np.ones_like(indices, dtype=bool)
+        self.assertEqual(plan_fills(indices, mask), [(0, 0, 0, 2, 4, 2, 0)])
+        self.assertEqual(len(plan_fills(indices, mask, max_volume=18)), 3)
+
+    def test_screen_world_diff_repairs_damage(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        image = os.path.join(tmp.name, 'red.png')
+        Image.new('RGB', (16, 9), (153, 51, 51)).save(image)
+        mc = MemoryWorld()
+        screen = MinecraftScreen(mc, 0, 64, 0, 16, 9, facing='east', store=ScreenStateStore(tmp.name))
+        screen.render_image(image, use_dithering=False)
+        mc.world[(0, 66, -5)] = 'minecraft:air'
+        # The saved state still believes the screen is intact
+        self.assertEqual(screen.render_image(image, use_dithering=False), 0)
+        self.assertEqual(screen.render_image(image, use_dithering=False, world_diff=True), 1)
+        self.assertEqual(screen.last_render_stats['changed_blocks'], 1)
+        self.assertEqual(mc.world[(0, 66, -5)], 'minecraft:red_concrete')
+        # The verify read covers the screen itself, not the 16x16 section columns around it
+        reads, blocks = mc.reads, mc.blocks_read
+        screen.render_image(image, use_dithering=False, world_diff=True)
+        self.assertEqual((mc.reads - reads, mc.blocks_read - blocks), (1, 16 * 9))
+
+    def test_cancel_after_read_writes_nothing(self):
+        mc = MemoryWorld()
+        indices, palette = grid_from_names(parse_rle("stone*64"), (4, 4, 4))
+        result = reconcile(mc, 0, 64, 0, indices, palette, should_stop=lambda: True)
+        self.assertTrue(result['cancelled'])
+        self.assertEqual((mc.written, len(mc.bodies)), (0, 0))
+
+    def test_oversized_diff_is_rejected_before_reading(self):
+        mc = MemoryWorld()
+        with self.assertRaises(ValueError):
+            reconcile(mc, 0, 0, 0, np.zeros((256, 64, 64), dtype=np.uint8), ['stone'])
+        self.assertEqual(mc.reads, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
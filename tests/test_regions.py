@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+from core.regions import split_box
+from tests.test_minecraft import RecordingInterface
+
+
+class TestRegions(unittest.TestCase):
+    def assert_partition(self, box, parts, max_volume):
+        x1, y1, z1, x2, y2, z2 = box
+        counts = np.zeros((x2 - x1 + 1, y2 - y1 + 1, z2 - z1 + 1), dtype=np.int32)
+        for bx1, by1, bz1, bx2, by2, bz2 in parts:
+            self.assertLessEqual((bx2 - bx1 + 1) * (by2 - by1 + 1) * (bz2 - bz1 + 1), max_volume)
+            counts[bx1 - x1:bx2 - x1 + 1, by1 - y1:by2 - y1 + 1, bz1 - z1:bz2 - z1 + 1] += 1
+        self.assertTrue(np.all(counts == 1))
+
+    def test_small_box_is_untouched(self):
+        self.assertEqual(split_box(5, 64, 5, 0, 60, 0), [(0, 60, 0, 5, 64, 5)])
+
+    def test_large_screen_splits_on_chunk_boundaries(self):
+        box = (-8, 64, 3, 247, 207, 3)  # a 256x144 screen
+        parts = split_box(*box)
+        self.assert_partition(box, parts, 32768)
+        self.assertLessEqual(len(parts), 3)
+        for part in parts[1:]:
+            self.assertEqual(part[0] % 16, 0)
+
+    def test_volume_box_partition(self):
+        box = (3, 0, -20, 90, 40, 70)
+        parts = split_box(*box, max_volume=5000)
+        self.assert_partition(box, parts, 5000)
+        # Chunk-ordered: x tiles never go backwards
+        xs = [p[0] for p in parts]
+        self.assertEqual(xs, sorted(xs))
+
+    def test_fill_region_reports_tally(self):
+        mc = RecordingInterface()
+        tally = mc.fill_box(0, 0, 0, 99, 9, 99, 'stone')
+        self.assertEqual(tally['failed'], 0)
+        self.assertEqual(tally['regions'], tally['succeeded'])
+        self.assertGreater(tally['regions'], 1)
+        self.assertTrue(mc.fill_region(0, 0, 0, 1, 1, 1, 'stone'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+from PIL import Image
+from core.gridcache import QuantizedGridCache
+from core.screen import MinecraftScreen
+from core.state import ScreenStateStore
+from tests.test_minecraft import RecordingInterface
+
+
+class TestMinecraftScreen(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = ScreenStateStore(os.path.join(self.tmp.name, 'state'))
+        self.image = os.path.join(self.tmp.name, 'image.png')
+        pixels = np.zeros((36, 64, 3), dtype=np.uint8)
+        pixels[:, 32:] = (153, 51, 51)
+        Image.fromarray(pixels).save(self.image)
+
+    def make_screen(self, mc, width=64, height=36):
+        return MinecraftScreen(mc, 0, 64, 0, width, height, store=self.store)
+
+    def test_second_render_is_skipped(self):
+        mc = RecordingInterface()
+        screen = self.make_screen(mc)
+        sent = screen.render_image(self.image, use_dithering=False)
+        self.assertEqual(sent, 2)
+        self.assertGreater(screen.last_render_stats['naive_commands'], sent)
+        self.assertEqual(self.make_screen(mc).render_image(self.image, use_dithering=False), 0)
+
+    def test_failed_fills_keep_previous_state(self):
+        screen = self.make_screen(RecordingInterface(fail_on={'fill 0 64 0 31 99 0 minecraft:black_concrete'}))
+        screen.render_image(self.image, use_dithering=False)
+        self.assertIsNone(self.store.load(screen.state_key, screen.state_header))
+
+    def test_size_is_part_of_state_key(self):
+        mc = RecordingInterface()
+        self.make_screen(mc).render_image(self.image, use_dithering=False)
+        self.assertGreater(self.make_screen(mc, 32, 18).render_image(self.image, use_dithering=False), 0)
+
+    def test_stream_diffs_frames_in_memory(self):
+        mc = RecordingInterface()
+        screen = MinecraftScreen(mc, 0, 64, 0, 64, 36, store=self.store, grid_cache=QuantizedGridCache())
+        frames = [np.zeros((36, 64, 3), dtype=np.uint8) for _ in range(3)]
+        frames[1][:, :8] = (153, 51, 51)
+        # A low frame rate leaves every frame due long after it is ready, so none is dropped
+        stats = screen.render_stream(frames, fps=10, dither_mode='none')
+        self.assertEqual((stats['frames_rendered'], stats['frames_dropped']), (3, 0))
+        self.assertEqual(stats['blocks_changed_per_frame'], [64 * 36, 8 * 36, 8 * 36])
+        # Streamed frames stay out of the shared grid cache
+        self.assertEqual((len(screen.grid_cache), screen.grid_cache.misses), (0, 0))
+        # The last shown frame becomes the saved state
+        np.testing.assert_array_equal(self.store.load(screen.state_key, screen.state_header), screen.quantize(frames[2], 'none', use_cache=False))
+
+    def test_slow_server_drops_frames_to_keep_time(self):
+        class SlowInterface(RecordingInterface):
+            def _post_commands(self, commands):
+                time.sleep(0.15)
+                return super()._post_commands(commands)
+
+        screen = self.make_screen(SlowInterface())
+        quantize = screen.quantize
+
+        def slow_quantize(*args, **kwargs):
+            time.sleep(0.08)
+            return quantize(*args, **kwargs)
+
+        screen.quantize = slow_quantize
+        frames = [np.full((36, 64, 3), 255 * (i % 2), dtype=np.uint8) for i in range(20)]
+        stats = screen.render_stream(frames, fps=20, dither_mode='none')
+        self.assertEqual(stats['frames_rendered'] + stats['frames_dropped'], 20)
+        self.assertGreater(stats['frames_dropped'], 0)
+        # 20 frames at 20 fps take about a second, plus at most one frame still being sent
+        self.assertLess(stats['elapsed_seconds'], 20 / 20 + 0.5)
+
+    def test_stream_plays_gif_loops(self):
+        gif = os.path.join(self.tmp.name, 'anim.gif')
+        colours = [(255, 255, 255), (16, 16, 16)]
+        images = [Image.new('RGB', (64, 36), c) for c in colours]
+        images[0].save(gif, save_all=True, append_images=images[1:], duration=50)
+        stats = self.make_screen(RecordingInterface()).render_stream(gif, fps=1000, dither_mode='none', loops=2)
+        self.assertEqual(stats['frames_rendered'] + stats['frames_dropped'], 4)
+        self.assertEqual(stats['target_fps'], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
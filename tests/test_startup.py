@@ -0,0 +1,29 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from benchmarks.run import HEAVY_MODULES, STARTUP_PROBE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartup(unittest.TestCase):
+    def test_server_import_defers_heavy_modules(self):
+        out = subprocess.check_output([sys.executable, '-c', STARTUP_PROBE.format(heavy=HEAVY_MODULES)], cwd=ROOT,
+                                      stderr=subprocess.DEVNULL)
+        _, heavy = json.loads(out.decode().strip().splitlines()[-1])
+        self.assertEqual(heavy, [])
+
+    def test_transport_connects_lazily(self):
+        from core.minecraft import MinecraftInterface
+        mc = MinecraftInterface('http://localhost:1')
+        self.assertIsNone(mc.transport._session)
+        self.assertIsNone(mc._block_cache)
+        # Writes before any read have no cached sections to invalidate
+        mc.invalidate_blocks(0, 0, 0, 1, 1, 1)
+        self.assertIsNone(mc._block_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
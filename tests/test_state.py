@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from core.state import ScreenStateStore
+
+HEADER = {'width': 4, 'height': 3, 'facing': 'north', 'palette_version': 'v1'}
+
+
+class TestScreenStateStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_round_trip_through_disk(self):
+        grid = np.arange(12, dtype=np.uint8).reshape(3, 4)
+        ScreenStateStore(self.tmp.name).save('screen_a', HEADER, grid)
+        # A fresh store has an empty LRU and must read the .npy back
+        loaded = ScreenStateStore(self.tmp.name).load('screen_a', HEADER)
+        np.testing.assert_array_equal(loaded, grid)
+        self.assertEqual(loaded.dtype, np.uint8)
+
+    def test_header_mismatch_is_a_miss(self):
+        store = ScreenStateStore(self.tmp.name)
+        store.save('screen_a', HEADER, np.zeros((3, 4)))
+        self.assertIsNone(store.load('screen_a', dict(HEADER, palette_version='v2')))
+
+    def test_lru_serves_hot_states_without_disk(self):
+        store = ScreenStateStore(self.tmp.name, capacity=1)
+        store.save('screen_a', HEADER, np.ones((3, 4)))
+        for path in store.paths('screen_a'):
+            os.remove(path)
+        self.assertIsNotNone(store.load('screen_a', HEADER))
+        store.save('screen_b', HEADER, np.ones((3, 4)))
+        self.assertIsNone(store.load('screen_a', HEADER))
+
+    def test_delete(self):
+        store = ScreenStateStore(self.tmp.name)
+        store.save('screen_a', HEADER, np.ones((3, 4)))
+        store.delete('screen_a')
+        self.assertIsNone(store.load('screen_a', HEADER))
+        self.assertFalse(any(os.path.exists(p) for p in store.paths('screen_a')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from core.voxels import parse_rle, grid_from_names, iter_block_batches
+from tests.test_minecraft import RecordingInterface
+
+
+class BulkInterface(RecordingInterface):
+    def __init__(self):
+        super().__init__()
+        self.puts = []
+
+    def _put_block_batch(self, blocks, params):
+        self.puts.append((blocks, params))
+        return len(blocks), 0, 0
+
+
+class TestVoxels(unittest.TestCase):
+    def test_parse_rle(self):
+        self.assertEqual(parse_rle("stone*2, air ,glass*0,dirt*1"), ['stone', 'stone', 'air', 'dirt'])
+        with self.assertRaises(ValueError):
+            parse_rle("stone*x")
+
+    def test_grid_from_names(self):
+        indices, palette = grid_from_names(parse_rle("stone*4,air*4"), (2, 2, 2))
+        self.assertEqual(indices.shape, (2, 2, 2))
+        self.assertEqual(palette, ['stone', 'air'])
+        self.assertTrue(np.all(indices[0] == 0) and np.all(indices[1] == 1))
+        nested, palette = grid_from_names([[['stone', '']]])
+        self.assertEqual(palette, ['stone', None])
+        with self.assertRaises(ValueError):
+            grid_from_names(['stone'], (2, 1, 1))
+
+    def test_batches_are_chunk_ordered_and_bounded(self):
+        indices = np.zeros((2, 4, 40), dtype=np.uint8)
+        indices[:, :, 0] = 1  # "keep" column is skipped
+        batches = list(iter_block_batches((10, 64, 0), indices, ['stone', None], batch_size=50))
+        blocks = [b for batch in batches for b in batch]
+        self.assertEqual(len(blocks), 2 * 4 * 39)
+        self.assertTrue(all(len(batch) <= 50 for batch in batches))
+        chunk_order = [b['x'] // 16 for b in blocks]
+        self.assertEqual(chunk_order, sorted(chunk_order))
+        self.assertEqual(blocks[0]['id'], 'minecraft:stone')
+
+    def test_put_blocks_tally(self):
+        mc = BulkInterface()
+        indices, palette = grid_from_names(parse_rle("stone*100"), (10, 1, 10))
+        result = mc.put_blocks(0, 64, 0, indices, palette, block_updates=False, batch_size=30)
+        self.assertEqual(result, {'placed': 100, 'unchanged': 0, 'failed': 0, 'requests': 4})
+        self.assertEqual(mc.puts[0][1]['doBlockUpdates'], 'false')
+
+
+if __name__ == '__main__':
+    unittest.main()